@@ -0,0 +1,239 @@
+"""
+Timed mix automation.
+
+An AutomationEngine plays Ramps, moves of one crosspoint level from a
+start to an end level over a duration along a curve, as SetMixMessages.
+
+Ramps are compiled into steps before playback. The number of steps of a
+ramp is bounded by the MIDI bandwidth: the engine's share of
+bytes_per_second is divided between the ramps overlapping it, so
+concurrent ramps never queue up behind each other on the wire. With
+firmware smoothing enabled the ES-9 glides between levels itself, and
+ramps are stepped at only SMOOTHED_STEPS_PER_SECOND.
+
+Steps are sent on deadlines relative to one monotonic start time rather
+than by sleeping step intervals, so scheduling errors do not accumulate.
+A step sent more than late_tolerance after its deadline counts as late;
+when a late step's successor on the same crosspoint is already due, the
+late step is skipped so playback catches up instead of drifting.
+"""
+
+import asyncio
+import math
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    MIX_LEVEL_MAX,
+    Message,
+
+    SetMixMessage,
+    SetSmoothingMessage,
+)
+from metrics import (
+    LATENCY_BUCKETS,
+    Histogram,
+)
+from writequeue import MIDI_DIN_BYTES_PER_SECOND
+
+# wire bytes of one SetMixMessage, including F0/F7
+SET_MIX_WIRE_LENGTH = len(SetMixMessage(0, 0, 0).data) + 2
+
+# part of the bandwidth automation may use, leaving room for requests and replies
+DEFAULT_BANDWIDTH_SHARE = 0.8
+
+# step rate per ramp when the firmware smooths between levels
+SMOOTHED_STEPS_PER_SECOND = 20.0
+
+# step rate per ramp when bandwidth is not limited
+UNPACED_STEPS_PER_SECOND = 1000.0
+
+_GAIN_RANGE_DB = 60.0
+
+def _ease_in(t: float) -> float:
+    # level rising at a constant rate in dB over _GAIN_RANGE_DB
+    return (10 ** (_GAIN_RANGE_DB / 20 * t) - 1) / (10 ** (_GAIN_RANGE_DB / 20) - 1)
+
+CURVES = {
+    'linear': lambda t: t,
+    'ease_in': _ease_in,
+    'ease_out': lambda t: 1.0 - _ease_in(1.0 - t),
+    'scurve': lambda t: t * t * (3.0 - 2.0 * t),
+    'step': lambda t: 1.0 if t >= 1.0 else 0.0,
+}
+
+class Ramp:
+    """
+    Move crosspoint (mix_id, input_id) from start_level to end_level,
+    starting at start seconds after playback begins and lasting duration
+    seconds. curve is one of CURVES, mapping elapsed fraction to level fraction.
+    """
+    __slots__ = ('mix_id', 'input_id', 'start_level', 'end_level', 'start', 'duration', 'curve')
+
+    def __init__(self, mix_id: int, input_id: int, start_level: int, end_level: int, start: float = 0.0, duration: float = 1.0, curve: str = 'linear'):
+        assert 0 <= mix_id <= 15, "Mix ID must be in range 0-15"
+        assert 0 <= input_id <= 7, "Input ID must be in range 0-7"
+        assert 0 <= start_level <= MIX_LEVEL_MAX and 0 <= end_level <= MIX_LEVEL_MAX, f"Level must be in range 0-{MIX_LEVEL_MAX}"
+        assert start >= 0 and duration >= 0, "Start and duration must not be negative"
+        assert curve in CURVES, f"Unknown curve {curve!r}"
+        self.mix_id = mix_id
+        self.input_id = input_id
+        self.start_level = start_level
+        self.end_level = end_level
+        self.start = start
+        self.duration = duration
+        self.curve = curve
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+def es9_curve_ramps(mix_id: int, input_id: int, points: list[tuple[float, int]], curve: str = 'linear') -> list[Ramp]:
+    """
+    Ramps through breakpoints (time in seconds, level), in time order.
+    """
+    assert len(points) >= 2, "A curve needs at least two points"
+    ramps = []
+    for (t0, level0), (t1, level1) in zip(points, points[1:]):
+        assert t1 >= t0, "Curve points must be in time order"
+        ramps.append(Ramp(mix_id, input_id, level0, level1, t0, t1 - t0, curve))
+    return ramps
+
+class AutomationEngine:
+    """
+    Plays Ramps through send, called with each Message (e.g. ES9Client.send).
+
+    on_late(time, mix_id, input_id, lateness) is called for every late step,
+    time being the step's offset from the start of playback.
+
+    With smoothing, run() enables firmware smoothing on the ramped mixes and
+    restores it when playback ends, is cancelled or fails: mixes in
+    previous_smoothing (mix ID -> enabled) get that state back, the others
+    are switched off, the firmware default.
+    """
+    def __init__(
+        self,
+        send,
+        bytes_per_second: float | None = MIDI_DIN_BYTES_PER_SECOND,
+        bandwidth_share: float = DEFAULT_BANDWIDTH_SHARE,
+        smoothing: bool = False,
+        previous_smoothing: dict[int, bool] | None = None,
+        late_tolerance: float = 0.005,
+        on_late=None,
+    ):
+        assert 0 < bandwidth_share <= 1, "Bandwidth share must be in range (0, 1]"
+        self._send = send
+        self.bytes_per_second = bytes_per_second
+        self.bandwidth_share = bandwidth_share
+        self.smoothing = smoothing
+        self.previous_smoothing = previous_smoothing or {}
+        self.late_tolerance = late_tolerance
+        self.on_late = on_late
+        self.ramps = []
+
+        self.sent_steps = 0
+        self.skipped_steps = 0
+        self.late_steps = 0
+        self.lateness = Histogram(LATENCY_BUCKETS) # seconds past the deadline, per sent step
+
+    def add(self, ramp: Ramp):
+        self.ramps.append(ramp)
+
+    @property
+    def steps_per_second(self) -> float:
+        """
+        SetMixMessages per second available to automation.
+        """
+        if not self.bytes_per_second:
+            return UNPACED_STEPS_PER_SECOND
+        return self.bytes_per_second * self.bandwidth_share / SET_MIX_WIRE_LENGTH
+
+    def _overlapping(self, ramp: Ramp) -> int:
+        return sum(1 for other in self.ramps if other is ramp or (other.start < ramp.end and ramp.start < other.end))
+
+    def compile(self) -> list[tuple[float, int, int, int, float]]:
+        """
+        Steps of all ramps as (time, mix_id, input_id, level, next_time)
+        tuples in time order, next_time being the time of the following
+        step on the same crosspoint (inf for the last one).
+        """
+        steps = []
+        for ramp in self.ramps:
+            rate = self.steps_per_second / self._overlapping(ramp)
+            if self.smoothing:
+                rate = min(rate, SMOOTHED_STEPS_PER_SECOND)
+            count = max(1, min(math.ceil(ramp.duration * rate), abs(ramp.end_level - ramp.start_level)))
+            curve = CURVES[ramp.curve]
+            span = ramp.end_level - ramp.start_level
+
+            steps.append((ramp.start, ramp.mix_id, ramp.input_id, ramp.start_level))
+            for k in range(1, count + 1):
+                steps.append((ramp.start + ramp.duration * k / count, ramp.mix_id, ramp.input_id, round(ramp.start_level + span * curve(k / count))))
+
+        steps.sort(key=lambda step: step[0]) # stable, so a ramp ending where the next starts stays in order
+        # drop repeated levels, and link each step to its successor on the crosspoint
+        compiled = []
+        last = {} # (mix_id, input_id) -> index into compiled
+        for time, mix_id, input_id, level in steps:
+            key = (mix_id, input_id)
+            previous = last.get(key)
+            if previous is not None:
+                if compiled[previous][3] == level:
+                    continue
+                compiled[previous][4] = time
+            last[key] = len(compiled)
+            compiled.append([time, mix_id, input_id, level, math.inf])
+        return [tuple(step) for step in compiled]
+
+    def _smoothing_messages(self, enabled: bool | None) -> list[Message]:
+        """
+        SetSmoothingMessages for the ramped mixes, None meaning their previous state.
+        """
+        return [
+            SetSmoothingMessage(mix_id, self.previous_smoothing.get(mix_id, False) if enabled is None else enabled)
+            for mix_id in sorted({ramp.mix_id for ramp in self.ramps})
+        ]
+
+    async def run(self):
+        """
+        Play every added ramp, returning when the last step has been sent.
+        """
+        steps = self.compile()
+        if not self.smoothing:
+            await self._play(steps)
+            return
+
+        for msg in self._smoothing_messages(True):
+            self._send(msg)
+        try:
+            await self._play(steps)
+        finally:
+            for msg in self._smoothing_messages(None):
+                self._send(msg)
+
+    async def _play(self, steps: list[tuple[float, int, int, int, float]]):
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        for time, mix_id, input_id, level, next_time in steps:
+            deadline = t0 + time
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            now = loop.time()
+            lateness = max(0.0, now - deadline)
+            if lateness > self.late_tolerance:
+                self.late_steps += 1
+                if self.on_late is not None:
+                    self.on_late(time, mix_id, input_id, lateness)
+                if now >= t0 + next_time:
+                    self.skipped_steps += 1
+                    continue
+
+            self._send(SetMixMessage.unchecked(mix_id, input_id, level))
+            self.sent_steps += 1
+            self.lateness.observe(lateness)
+
+        if self.late_steps:
+            logger.warning(f"Automation: {self.late_steps} late steps, {self.skipped_steps} skipped")
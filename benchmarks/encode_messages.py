@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+
+"""
+file: encode_messages.py
+description: measure Message construction throughput in messages/sec.
+"""
+
+import click
+import time
+
+from interface import (
+    SetDCOffsetMessage,
+    SetFilterMessage,
+    SetMixMessage,
+
+    es9_py_pb2,
+)
+
+def measure(construct, duration: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        for level in range(0, 32768, 328):
+            construct(level)
+        count += 100
+    return count / (time.perf_counter() - start)
+
+CASES = {
+    'SetMixMessage': lambda level: SetMixMessage(3, 5, level),
+    'SetMixMessage.unchecked': lambda level: SetMixMessage.unchecked(3, 5, level),
+    'SetFilterMessage': lambda level: SetFilterMessage(3, 1, True, es9_py_pb2.FilterType.PEAK, level, 8192, -level),
+    'SetFilterMessage.unchecked': lambda level: SetFilterMessage.unchecked(3, 1, True, es9_py_pb2.FilterType.PEAK, level, 8192, -level),
+    'SetDCOffsetMessage': lambda level: SetDCOffsetMessage(es9_py_pb2.Channel.CHANNEL_OUTPUT_1, level // 11),
+    'SetDCOffsetMessage.unchecked': lambda level: SetDCOffsetMessage.unchecked(es9_py_pb2.Channel.CHANNEL_OUTPUT_1, level // 11),
+}
+
+@click.command()
+@click.option('--duration', type=float, default=1.0, help='Seconds to spend on each message type')
+def cli(
+  duration: float,
+):
+    for name, construct in CASES.items():
+        print(f"{name}: {measure(construct, duration):.0f} messages/sec")
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,34 @@
+#! /usr/bin/env python3
+
+"""
+file: parse_configuration_dump.py
+description: measure es9_parse_configuration_dump throughput in dumps/sec.
+"""
+
+import click
+import time
+
+from interface import es9_parse_configuration_dump
+
+from benchmarks.samples import sample_configuration_dump_payload
+
+@click.command()
+@click.option('--duration', type=float, default=2.0, help='Seconds to spend parsing dumps')
+def cli(
+  duration: float,
+):
+    payload = sample_configuration_dump_payload()
+
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            es9_parse_configuration_dump(payload)
+        count += 100
+    elapsed = time.perf_counter() - start
+
+    print(f"es9_parse_configuration_dump: {count / elapsed:.0f} dumps/sec ({count} dumps in {elapsed:.2f} s)")
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,56 @@
+"""
+file: samples.py
+description: representative report payloads shared by the benchmarks.
+"""
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_OFFSET_ROUTE_IN,
+    CONFIGURATION_DUMP_OFFSET_ROUTE_OUT,
+    CONFIGURATION_DUMP_OFFSET_MIX,
+    CONFIGURATION_DUMP_OFFSET_FILTERS,
+    CONFIGURATION_DUMP_WORD_COUNT,
+    MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID,
+    MAP_ES9_CHANNEL_BY_OUTPUT_ROUTE_ID,
+    MIX_DUMP_CROSSPOINT_COUNT,
+)
+
+def sample_configuration_words() -> list[int]:
+    """
+    Configuration dump words with every routing, crosspoint and filter slot populated.
+    """
+    words = [0] * CONFIGURATION_DUMP_WORD_COUNT
+    input_route_ids = sorted(MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID)
+    output_route_ids = sorted(MAP_ES9_CHANNEL_BY_OUTPUT_ROUTE_ID)
+    for i in range(32):
+        words[CONFIGURATION_DUMP_OFFSET_ROUTE_IN + i] = input_route_ids[i % len(input_route_ids)]
+        words[CONFIGURATION_DUMP_OFFSET_ROUTE_OUT + i] = output_route_ids[i % len(output_route_ids)]
+    for i in range(128):
+        words[CONFIGURATION_DUMP_OFFSET_MIX + i] = (i * 257) % 32769
+    for i in range(64):
+        offset = CONFIGURATION_DUMP_OFFSET_FILTERS + i * 4
+        words[offset:offset + 4] = [(i % 8) << 1 | 1, 16384, 8192, 0]
+    return words
+
+def _pack(words: list[int]) -> bytearray:
+    payload = bytearray()
+    for word in words:
+        payload += bytes(((word >> 14) & 0x7F, (word >> 7) & 0x7F, word & 0x7F))
+    return payload
+
+def sample_configuration_dump_payload() -> bytes:
+    """
+    Build a representative configuration dump payload,
+    with every routing, crosspoint and filter slot populated.
+    """
+    return bytes(bytearray(CONFIGURATION_DUMP_HEADER_LENGTH) + _pack(sample_configuration_words()))
+
+def sample_mix_dump_payload() -> bytes:
+    """
+    Build a representative mix dump payload, every crosspoint populated.
+    """
+    crosspoints = [(i * 257) % 32769 for i in range(MIX_DUMP_CROSSPOINT_COUNT)]
+    return bytes(_pack(crosspoints) + bytes(i % 0x80 for i in range(32)))
+
+def sample_usage_payload() -> bytes:
+    return bytes((0x08, 0x00, 0x10, 0x00, 0x18, 0x00, 0x1F, 0x7F))
@@ -0,0 +1,202 @@
+#! /usr/bin/env python3
+
+"""
+file: suite.py
+description: run every ES-9 benchmark and write the results as JSON.
+
+Covers report parsing throughput, encode throughput of every Message
+subclass, and end-to-end latency against the in-process simulator over a
+loopback link. Compare the JSON of two runs to spot regressions.
+"""
+
+import asyncio
+import click
+import json
+import platform
+import statistics
+import time
+
+from datetime import datetime, timezone
+
+from client import ES9Client
+from interface import (
+    APPLY_CONFIGURATION_DUMP_CHUNK_COUNT,
+    APPLY_CONFIGURATION_DUMP_CHUNK_WORDS,
+    Message,
+
+    ApplyConfigurationDumpMessage,
+    RequestConfigurationDumpMessage,
+    RequestMixMessage,
+    RequestResetMessage,
+    RequestRestoreMessage,
+    RequestSampleRateMessage,
+    RequestSaveMessage,
+    RequestUsageMessage,
+    RequestVersionStringMessage,
+    SetDCOffsetMessage,
+    SetFilterMessage,
+    SetHighPassFiltersMessage,
+    SetInputsMessage,
+    SetLinksMessage,
+    SetMidiChannelsMessage,
+    SetMixMessage,
+    SetOptionsMessage,
+    SetOutputsMessage,
+    SetSmoothingMessage,
+    SetVirtualMixMessage,
+
+    es9_parse_configuration_dump,
+    es9_parse_mix_dump,
+    es9_parse_usage,
+
+    es9_py_pb2,
+)
+from simulator import (
+    ES9Simulator,
+    loopback_ports,
+)
+
+from benchmarks.samples import (
+    sample_configuration_dump_payload,
+    sample_configuration_words,
+    sample_mix_dump_payload,
+    sample_usage_payload,
+)
+
+_HPF = es9_py_pb2.Configuration.HighPassFilterConfiguration(channel_pair_1_2_enabled=True, channel_pair_9_10_enabled=True)
+_OPTIONS = es9_py_pb2.Configuration.OptionsConfiguration(use_spdif=True, use_midi_through=True)
+_ROUTING = bytes(range(0x70, 0x78))
+
+# one representative construction per Message subclass, taking a varying int
+ENCODE_CASES = {
+    ApplyConfigurationDumpMessage: lambda i: ApplyConfigurationDumpMessage(i % APPLY_CONFIGURATION_DUMP_CHUNK_COUNT, bytes(1 + APPLY_CONFIGURATION_DUMP_CHUNK_WORDS * 3)),
+    RequestVersionStringMessage: lambda i: RequestVersionStringMessage(),
+    RequestConfigurationDumpMessage: lambda i: RequestConfigurationDumpMessage(),
+    RequestSaveMessage: lambda i: RequestSaveMessage(RequestSaveMessage.Slot.HOSTED),
+    RequestRestoreMessage: lambda i: RequestRestoreMessage(RequestRestoreMessage.Slot.HOSTED),
+    RequestResetMessage: lambda i: RequestResetMessage(),
+    RequestMixMessage: lambda i: RequestMixMessage(),
+    RequestUsageMessage: lambda i: RequestUsageMessage(),
+    RequestSampleRateMessage: lambda i: RequestSampleRateMessage(),
+    SetHighPassFiltersMessage: lambda i: SetHighPassFiltersMessage(_HPF),
+    SetOptionsMessage: lambda i: SetOptionsMessage(_OPTIONS),
+    SetLinksMessage: lambda i: SetLinksMessage(es9_py_pb2.MixerLink.MIXER_LINK_BUS_3_4, i & 1),
+    SetMidiChannelsMessage: lambda i: SetMidiChannelsMessage(i % 17, 16 - i % 17),
+    SetDCOffsetMessage: lambda i: SetDCOffsetMessage(es9_py_pb2.Channel.CHANNEL_OUTPUT_3, i % 3176),
+    SetFilterMessage: lambda i: SetFilterMessage(i % 16, i % 4, True, es9_py_pb2.FilterType.PEAK, i, 8192, -i),
+    SetSmoothingMessage: lambda i: SetSmoothingMessage(i % 16, i & 1),
+    SetInputsMessage: lambda i: SetInputsMessage(i % 4, _ROUTING),
+    SetOutputsMessage: lambda i: SetOutputsMessage(i % 4, _ROUTING),
+    SetMixMessage: lambda i: SetMixMessage(i % 16, i % 8, i),
+}
+
+# not implemented yet, so there is nothing to measure
+ENCODE_SKIPPED = {SetVirtualMixMessage}
+
+assert set(ENCODE_CASES) | ENCODE_SKIPPED == set(Message.__subclasses__()), "Every Message subclass needs an encode case"
+
+def throughput(operation, duration: float, batch: int = 100) -> dict:
+    """
+    Call operation(i) repeatedly for duration seconds.
+    """
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        for i in range(batch):
+            operation(i)
+        count += batch
+    elapsed = time.perf_counter() - start
+    return {'ops_per_sec': count / elapsed, 'count': count}
+
+def latency_summary(samples: list[float]) -> dict:
+    """
+    Percentiles of latency samples, in milliseconds.
+    """
+    percentiles = statistics.quantiles(samples, n=100, method='inclusive')
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1e3,
+        'p50_ms': percentiles[49] * 1e3,
+        'p90_ms': percentiles[89] * 1e3,
+        'p99_ms': percentiles[98] * 1e3,
+        'max_ms': max(samples) * 1e3,
+    }
+
+def bench_parse(duration: float) -> dict:
+    configuration_dump = sample_configuration_dump_payload()
+    mix_dump = sample_mix_dump_payload()
+    usage = sample_usage_payload()
+    return {
+        'es9_parse_configuration_dump': throughput(lambda i: es9_parse_configuration_dump(configuration_dump), duration),
+        'es9_parse_mix_dump': throughput(lambda i: es9_parse_mix_dump(mix_dump), duration),
+        'es9_parse_usage': throughput(lambda i: es9_parse_usage(usage), duration),
+    }
+
+def bench_encode(duration: float) -> dict:
+    return {message_type.__name__: throughput(construct, duration) for message_type, construct in ENCODE_CASES.items()}
+
+async def bench_round_trip(iterations: int, burst: int, bytes_per_second: float | None, latency: float) -> dict:
+    to_device, from_device = loopback_ports(bytes_per_second, latency)
+    simulator = ES9Simulator(words=sample_configuration_words())
+    simulator_task = asyncio.create_task(simulator.run(to_device, from_device))
+
+    configuration_latency = []
+    burst_latency = []
+    try:
+        async with ES9Client(to_device, from_device, timeout=30.0) as client:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await client.request_configuration()
+                configuration_latency.append(time.perf_counter() - start)
+
+            for n in range(iterations):
+                # a burst of mix writes, complete once the mix dump reflects the last one
+                start = time.perf_counter()
+                for i in range(burst):
+                    client.send(SetMixMessage(i % 16, i // 16 % 8, (n * burst + i) % 32769))
+                await client.request_mix()
+                burst_latency.append(time.perf_counter() - start)
+    finally:
+        simulator_task.cancel()
+
+    return {
+        'link': {'bytes_per_second': bytes_per_second, 'latency_s': latency},
+        'configuration_request_to_parsed': latency_summary(configuration_latency),
+        f'mix_write_burst_{burst}': latency_summary(burst_latency),
+    }
+
+@click.command()
+@click.option('--duration', type=float, default=0.5, help='Seconds to spend on each throughput benchmark')
+@click.option('--iterations', type=int, default=200, help='Round trips per latency benchmark')
+@click.option('--burst', type=int, default=128, help='SetMixMessages per write burst')
+@click.option('--bytes-per-second', type=float, default=None, help='Simulated link bandwidth, unlimited by default (3125 for MIDI DIN)')
+@click.option('--latency', type=float, default=0.0, help='Simulated one-way link latency in seconds')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), default=None, help='JSON results file, stdout by default')
+def cli(
+  duration: float,
+  iterations: int,
+  burst: int,
+  bytes_per_second: float | None,
+  latency: float,
+  output: str | None,
+):
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parse': bench_parse(duration),
+        'encode': bench_encode(duration),
+        'round_trip': asyncio.run(bench_round_trip(iterations, burst, bytes_per_second, latency)),
+    }
+
+    text = json.dumps(results, indent=2)
+    if output is None:
+        print(text)
+    else:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Wrote benchmark results to {output}")
+
+if __name__ == '__main__':
+    cli()
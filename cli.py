@@ -1,22 +1,66 @@
 import asyncio
 import mido
 import click
+import os
+
+from array import array
 
 from datetime import datetime
 
+from automation import (
+    CURVES,
+    AutomationEngine,
+    Ramp,
+)
+from client import ES9Client
+from configfile import (
+    PlanCache,
+
+    es9_apply_configuration_file,
+)
+from demux import SysExDemux
+from devices import (
+    DeviceManager,
+
+    es9_discover_port_pairs,
+)
 from interface import (
-    ES9_SYSEX_HEADER,
+    MIX_LEVEL_MAX,
     MessageType,
 
     SetHighPassFiltersMessage,
     SetLinksMessage,
 
-    es9_parse_configuration_dump,
-    es9_parse_mix_dump,
+    es9_configuration_dump_messages,
+
     es9_parse_message_report,
 
     es9_py_pb2,
 )
+from metrics import (
+    Metrics,
+
+    es9_load_metrics,
+    es9_prometheus_text,
+)
+from monitor import UsageMonitor
+from planner import plan_changes
+from receiver import CallbackReceiver
+from scenes import (
+    SceneStore,
+
+    es9_recall_scene,
+)
+from simulator import ES9Simulator
+from snapshots import (
+    SnapshotStore,
+
+    es9_capture_snapshot_words,
+)
+from tracker import (
+    ConfigurationDumpTracker,
+    MixDumpTracker,
+)
 
 def sniff_sysex(port_name: str):
     print(f"Opening MIDI input: {port_name}")
@@ -41,40 +85,60 @@ def cli():
 
 @cli.command()
 @click.option('--port', type=str, required=True, help='MIDI input port name to listen on')
+@click.option('--receive', type=click.Choice(['callback', 'thread']), default='callback', show_default=True,
+              help='Receive via the rtmidi input callback, or a blocking read on a worker thread')
+@click.option('--stats-file', type=click.Path(dir_okay=False), default=None, help='Periodically write message and latency metrics to this JSON file')
+@click.option('--prometheus-textfile', type=click.Path(dir_okay=False), default=None, help='Periodically write metrics for the Prometheus textfile collector')
+@click.option('--stats-interval', type=float, default=10.0, show_default=True, help='Seconds between metrics writes')
 def serve(
-    port: str
+    port: str,
+    receive: str,
+    stats_file: str | None,
+    prometheus_textfile: str | None,
+    stats_interval: float,
 ):
-    def blocking_poll_configuration():
-        with mido.open_input(port) as rx:
-            for msg in rx:
-                if msg.type == 'sysex':
-
-                    data = bytes(msg.data)
-                    if not data.startswith(ES9_SYSEX_HEADER):
-                        continue
+    metrics = Metrics() if stats_file or prometheus_textfile else None
+    configuration_tracker = ConfigurationDumpTracker()
+    mix_tracker = MixDumpTracker()
 
-                    message_type = data[4]
-                    payload = data[5:-1]  # Exclude header and F7
+    def on_message_report(payload):
+        message = es9_parse_message_report(payload)
+        print(f"Received message: {message}")
 
-                    match message_type:
-                        case MessageType.REPORT_MESSAGE.value:
-                            message = es9_parse_message_report(payload)
-                            print(f"Received message: {message}")
+    def on_configuration_dump(payload):
+        changes = configuration_tracker.update(payload)
+        if changes is None:
+            print("Received Configuration Dump:")
+            print(configuration_tracker.configuration())
+        for change in changes or ():
+            print(f"Configuration changed: {change}")
 
-                        case MessageType.REPORT_CONFIGURATION_DUMP.value:
-                            config = es9_parse_configuration_dump(payload)
-                            print("Received Configuration Dump:")
-                            print(config)
+    def on_mix_dump(payload):
+        changes = mix_tracker.update(payload)
+        if changes is None:
+            print("Received Mix Configuration Dump:")
+            print(mix_tracker.configuration())
+        for change in changes or ():
+            print(f"Mix changed: {change}")
 
-                        case MessageType.REPORT_MIX.value:
-                            mix_config = es9_parse_mix_dump(payload)
-                            print("Received Mix Configuration Dump:")
-                            print(mix_config)
+    demux = SysExDemux(metrics=metrics)
+    demux.register(MessageType.REPORT_MESSAGE, on_message_report)
+    demux.register(MessageType.REPORT_CONFIGURATION_DUMP, on_configuration_dump)
+    demux.register(MessageType.REPORT_MIX, on_mix_dump)
 
+    def blocking_poll_configuration():
+        with mido.open_input(port) as rx:
+            for msg in rx:
+                if msg.type == 'sysex':
+                    demux.dispatch(bytes(msg.data))
 
     async def coro_poll_configuration():
-        # Offload blocking MIDI receive loop
-        await asyncio.to_thread(blocking_poll_configuration)
+        if receive == 'callback':
+            async with CallbackReceiver(demux, port):
+                await asyncio.Event().wait() # handlers run from the rtmidi callback
+        else:
+            # Offload blocking MIDI receive loop
+            await asyncio.to_thread(blocking_poll_configuration)
 
     async def coro_toggle_mix_level():
         pass
@@ -101,14 +165,371 @@ def serve(
         #         print(f"Sent SetMixMessage to set mix {mix_id} input {input_id} to level {level_off}")
         #         await asyncio.sleep(2)
 
+    def write_metrics():
+        if stats_file:
+            metrics.save(stats_file)
+        if prometheus_textfile:
+            metrics.write_prometheus_textfile(prometheus_textfile)
+
+    async def coro_write_metrics():
+        if metrics is None:
+            return
+        try:
+            while True:
+                await asyncio.sleep(stats_interval)
+                write_metrics()
+        finally:
+            write_metrics()
+
     async def main():
         poll_task = asyncio.create_task(coro_poll_configuration())
         toggle_task = asyncio.create_task(coro_toggle_mix_level())
-        await asyncio.gather(poll_task, toggle_task)
+        metrics_task = asyncio.create_task(coro_write_metrics())
+        await asyncio.gather(poll_task, toggle_task, metrics_task)
     
     asyncio.run(main())
 
 
+@cli.command()
+@click.option('--outport', type=str, default='ES-9 MIDI Out', show_default=True, help='MIDI output port name to send requests to')
+@click.option('--inport', type=str, default='ES-9 MIDI In', show_default=True, help='MIDI input port name to receive reports on')
+@click.option('--interval', type=float, default=0.5, show_default=True, help='Seconds between usage polls while the port is quiet')
+@click.option('--window', type=float, default=5.0, show_default=True, help='Seconds of history for min/max/mean and alerts')
+@click.option('--threshold', type=float, default=None, help='Alert when the mean load of a DSP block over the window exceeds this fraction (0-1)')
+@click.option('--capacity', type=int, default=3600, show_default=True, help='Number of samples kept')
+def monitor(
+    outport: str,
+    inport: str,
+    interval: float,
+    window: float,
+    threshold: float | None,
+    capacity: int,
+):
+    """Watch the DSP load of the four ES-9 DSP blocks."""
+    def on_sample(timestamp, usage):
+        blocks = []
+        for block, load in enumerate(usage):
+            low, high, mean = usage_monitor.window_stats(block, window)
+            blocks.append(f"dsp{block} {load:6.1%} ({low:.0%}-{high:.0%}, mean {mean:.1%})")
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] {usage_monitor.sample_rate_hz} Hz  " + "  ".join(blocks))
+
+    def on_alert(block, mean, raised):
+        if raised:
+            print(f"ALERT: dsp{block} mean load {mean:.1%} over {window:g} s exceeds {threshold:.0%}")
+        else:
+            print(f"Cleared: dsp{block} mean load back to {mean:.1%}")
+
+    async def main():
+        nonlocal usage_monitor
+        with mido.open_output(outport) as tx, mido.open_input(inport) as rx:
+            async with ES9Client(tx, rx) as client:
+                usage_monitor = UsageMonitor(
+                    client,
+                    interval=interval,
+                    capacity=capacity,
+                    threshold=threshold,
+                    alert_window=window,
+                    on_sample=on_sample,
+                    on_alert=on_alert,
+                )
+                await usage_monitor.run()
+
+    usage_monitor = None
+    asyncio.run(main())
+
+@cli.command()
+@click.option('--outport', type=str, default='ES-9 MIDI Out', show_default=True, help='MIDI output port name to send requests to')
+@click.option('--inport', type=str, default='ES-9 MIDI In', show_default=True, help='MIDI input port name to receive reports on')
+@click.option('--mix', 'mix_id', type=click.IntRange(0, 15), required=True, help='Mix ID (0-7: mixer 1 outputs 1-8, 8-15: mixer 2 outputs 1-8)')
+@click.option('--input', 'input_id', type=click.IntRange(0, 7), required=True, help='Mixer input (0-7)')
+@click.option('--to', 'end_level', type=click.IntRange(0, MIX_LEVEL_MAX), required=True, help='Final crosspoint level')
+@click.option('--from', 'start_level', type=click.IntRange(0, MIX_LEVEL_MAX), default=None, help='Initial crosspoint level [default: current level]')
+@click.option('--duration', type=float, default=1.0, show_default=True, help='Ramp duration in seconds')
+@click.option('--curve', type=click.Choice(sorted(CURVES)), default='linear', show_default=True)
+@click.option('--smoothing', is_flag=True, help='Enable firmware smoothing on the mix and send fewer steps')
+def ramp(
+    outport: str,
+    inport: str,
+    mix_id: int,
+    input_id: int,
+    end_level: int,
+    start_level: int | None,
+    duration: float,
+    curve: str,
+    smoothing: bool,
+):
+    """Ramp one crosspoint level over time."""
+    async def main():
+        with mido.open_output(outport) as tx, mido.open_input(inport) as rx:
+            async with ES9Client(tx, rx) as client:
+                nonlocal start_level
+                previous_smoothing = None
+                if start_level is None or smoothing:
+                    view = await client.configuration_view()
+                    if start_level is None:
+                        start_level = view.crosspoint_level(mix_id, input_id)
+                    previous_smoothing = {mix_id: view.smoothing_enabled(mix_id)}
+                engine = AutomationEngine(client.send, smoothing=smoothing, previous_smoothing=previous_smoothing)
+                engine.add(Ramp(mix_id, input_id, start_level, end_level, duration=duration, curve=curve))
+                await engine.run()
+                print(f"Sent {engine.sent_steps} steps, {engine.late_steps} late, {engine.skipped_steps} skipped, "
+                      f"lateness p99 <= {engine.lateness.quantile(0.99) or 0.0:g} s")
+
+    asyncio.run(main())
+
+DEFAULT_PLAN_CACHE = os.path.expanduser('~/.cache/es9/plans')
+
+@cli.command()
+@click.argument('file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--outport', type=str, default='ES-9 MIDI Out', show_default=True, help='MIDI output port name to send requests to')
+@click.option('--inport', type=str, default='ES-9 MIDI In', show_default=True, help='MIDI input port name to receive reports on')
+@click.option('--timeout', type=float, default=2.0, show_default=True, help='Timeout in seconds to wait for responses')
+@click.option('--plan-cache', type=click.Path(file_okay=False), default=DEFAULT_PLAN_CACHE, show_default=True, help='Directory of compiled plans')
+@click.option('--no-cache', is_flag=True, help='Always compile the file, and do not store the plan')
+@click.option('--strict-links', is_flag=True, help='Reject input routing the firmware would rewrite because of stereo links, instead of correcting it')
+def apply(
+    file: str,
+    outport: str,
+    inport: str,
+    timeout: float,
+    plan_cache: str,
+    no_cache: bool,
+    strict_links: bool,
+):
+    """Apply a declarative configuration file (.textproto, .json or .toml)."""
+    cache = None if no_cache else PlanCache(plan_cache)
+
+    async def main():
+        with mido.open_output(outport) as tx, mido.open_input(inport) as rx:
+            async with ES9Client(tx, rx, timeout=timeout) as client:
+                return await es9_apply_configuration_file(client, file, cache, timeout, strict_links)
+
+    try:
+        count, cached = asyncio.run(main())
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f"Sent {count} messages to apply {file}{' (cached plan)' if cached else ''}")
+
+@cli.command()
+@click.option('--match', type=str, default='ES-9', show_default=True, help='Substring identifying ES-9 port names')
+@click.option('--timeout', type=float, default=1.0, show_default=True, help='Timeout in seconds to wait for responses')
+def units(
+    match: str,
+    timeout: float,
+):
+    """Discover connected ES-9 units and query them all concurrently."""
+    port_pairs = es9_discover_port_pairs(match=match)
+    if not port_pairs:
+        print(f"No MIDI port pairs matching {match!r} found")
+        return
+
+    async def main():
+        async with DeviceManager.open(port_pairs, timeout=timeout) as manager:
+            async def query(unit):
+                version = await unit.client.request_version()
+                sample_rate_hz = await unit.client.request_sample_rate()
+                print(f"{unit.name}: firmware {version}, {sample_rate_hz} Hz")
+            return await manager.run(query)
+
+    for result in asyncio.run(main()).values():
+        if not result.ok:
+            print(result)
+
+DEFAULT_SNAPSHOT_STORE = os.path.expanduser('~/.local/share/es9/snapshots')
+
+@cli.group()
+@click.option('--store', type=click.Path(file_okay=False), default=DEFAULT_SNAPSHOT_STORE, show_default=True, help='Snapshot store directory')
+@click.option('--outport', type=str, default='ES-9 MIDI Out', show_default=True, help='MIDI output port name to send requests to')
+@click.option('--inport', type=str, default='ES-9 MIDI In', show_default=True, help='MIDI input port name to receive reports on')
+@click.option('--timeout', type=float, default=2.0, show_default=True, help='Timeout in seconds to wait for responses')
+@click.pass_context
+def snapshot(ctx, store: str, outport: str, inport: str, timeout: float):
+    """Save, inspect and restore device state snapshots."""
+    ctx.obj = {'store': SnapshotStore(store), 'outport': outport, 'inport': inport, 'timeout': timeout}
+
+@snapshot.command('save')
+@click.option('--label', type=str, default='', help='Free-form description stored in the index')
+@click.pass_obj
+def snapshot_save(obj, label: str):
+    """Capture the current configuration and mix dumps."""
+    async def main():
+        with mido.open_output(obj['outport']) as tx, mido.open_input(obj['inport']) as rx:
+            async with ES9Client(tx, rx, timeout=obj['timeout']) as client:
+                return await es9_capture_snapshot_words(client)
+
+    configuration_words, mix_words, dump_header = asyncio.run(main())
+    digest = obj['store'].put(configuration_words, mix_words, dump_header, label)
+    print(f"Saved snapshot {digest[:12]} {label}")
+
+@snapshot.command('list')
+@click.pass_obj
+def snapshot_list(obj):
+    """List saved snapshots, oldest first."""
+    for entry in obj['store'].entries():
+        timestamp = datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{timestamp}  {entry.digest[:12]}  {entry.label}")
+
+@snapshot.command('show')
+@click.argument('digest', type=str)
+@click.option('--diff', 'other', type=str, default=None, help='Show only the fields that differ from this snapshot')
+@click.pass_obj
+def snapshot_show(obj, digest: str, other: str | None):
+    """Print a snapshot, or its differences from another."""
+    with obj['store'].get(digest) as snap:
+        if other is None:
+            print(snap.configuration())
+            print(snap.mix_configuration())
+            return
+        with obj['store'].get(other) as other_snap:
+            changes = other_snap.diff(snap)
+            for change in changes:
+                print(change)
+            print(f"{len(changes)} fields differ between {other_snap.digest[:12]} and {snap.digest[:12]}")
+
+@snapshot.command('restore')
+@click.argument('digest', type=str)
+@click.option('--full', is_flag=True, help='Load every dump word with ApplyConfigurationDumpMessages instead of sending only the changes')
+@click.pass_obj
+def snapshot_restore(obj, digest: str, full: bool):
+    """Return the device to a saved configuration."""
+    with obj['store'].get(digest) as snap:
+        target = snap.configuration()
+        words = array('I', snap.configuration_words)
+        stored = snap.configuration_word_count
+        header = bytes(snap.dump_header)
+
+    async def main():
+        with mido.open_output(obj['outport']) as tx, mido.open_input(obj['inport']) as rx:
+            async with ES9Client(tx, rx, timeout=obj['timeout']) as client:
+                if full:
+                    if stored < len(words):
+                        # an older snapshot: keep the device's words past the ones it stored
+                        words[stored:] = (await client.configuration_view(max_age=0)).words[stored:len(words)]
+                    messages = list(es9_configuration_dump_messages(target, words, header))
+                else:
+                    messages = plan_changes(await client.request_configuration(), target)
+                for msg in messages:
+                    client.send(msg)
+                return len(messages)
+
+    count = asyncio.run(main())
+    print(f"Sent {count} messages to restore snapshot {digest}")
+
+DEFAULT_SCENE_STORE = os.path.expanduser('~/.local/share/es9/scenes')
+
+@cli.group()
+@click.option('--store', type=click.Path(file_okay=False), default=DEFAULT_SCENE_STORE, show_default=True, help='Scene store directory')
+@click.option('--outport', type=str, default='ES-9 MIDI Out', show_default=True, help='MIDI output port name to send requests to')
+@click.option('--inport', type=str, default='ES-9 MIDI In', show_default=True, help='MIDI input port name to receive reports on')
+@click.option('--timeout', type=float, default=2.0, show_default=True, help='Timeout in seconds to wait for responses')
+@click.pass_context
+def scene(ctx, store: str, outport: str, inport: str, timeout: float):
+    """Store named scenes and switch between them."""
+    ctx.obj = {'store': SceneStore(store), 'outport': outport, 'inport': inport, 'timeout': timeout}
+
+@scene.command('save')
+@click.argument('name', type=str)
+@click.option('--snapshot', 'digest', type=str, default=None, help='Take the configuration from this snapshot instead of the device')
+@click.option('--snapshot-store', type=click.Path(file_okay=False), default=DEFAULT_SNAPSHOT_STORE, show_default=True, help='Snapshot store directory')
+@click.pass_obj
+def scene_save(obj, name: str, digest: str | None, snapshot_store: str):
+    """Store the current configuration as a scene, replacing any previous version."""
+    if digest is not None:
+        with SnapshotStore(snapshot_store).get(digest) as snap:
+            config = snap.configuration()
+    else:
+        async def main():
+            with mido.open_output(obj['outport']) as tx, mido.open_input(obj['inport']) as rx:
+                async with ES9Client(tx, rx, timeout=obj['timeout']) as client:
+                    return await client.request_configuration()
+        config = asyncio.run(main())
+
+    obj['store'].put(name, config)
+    print(f"Saved scene {name}, transitions to and from {len(obj['store'].names()) - 1} other scenes compiled")
+
+@scene.command('list')
+@click.pass_obj
+def scene_list(obj):
+    """List scenes, marking the one the device was last confirmed to be in."""
+    current = obj['store'].current()
+    for name in obj['store'].names():
+        print(f"{'*' if name == current else ' '} {name}")
+
+@scene.command('show')
+@click.argument('name', type=str)
+@click.pass_obj
+def scene_show(obj, name: str):
+    """Print a scene's configuration."""
+    print(obj['store'].get(name))
+
+@scene.command('delete')
+@click.argument('name', type=str)
+@click.pass_obj
+def scene_delete(obj, name: str):
+    """Delete a scene and its transitions."""
+    obj['store'].delete(name)
+
+@scene.command('recall')
+@click.argument('name', type=str)
+@click.pass_obj
+def scene_recall(obj, name: str):
+    """Switch the device to a scene with its precompiled burst."""
+    async def main():
+        with mido.open_output(obj['outport']) as tx, mido.open_input(obj['inport']) as rx:
+            async with ES9Client(tx, rx, timeout=obj['timeout']) as client:
+                return await es9_recall_scene(client, obj['store'], name, obj['timeout'])
+
+    count, remaining = asyncio.run(main())
+    print(f"Sent {count} messages to recall scene {name}")
+    if remaining:
+        print(f"Device does not match scene {name}: {len(remaining)} changes still needed")
+
+@cli.command()
+@click.argument('stats_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--prometheus', type=click.Path(dir_okay=False), default=None, help='Also write the metrics for the Prometheus textfile collector')
+def stats(
+    stats_file: str,
+    prometheus: str | None,
+):
+    """Show message and latency metrics written by serve or config_es9."""
+    snapshot = es9_load_metrics(stats_file)
+
+    for direction in ('sent', 'received'):
+        messages = snapshot[f'{direction}_messages']
+        wire_bytes = snapshot[f'{direction}_bytes']
+        print(f"{direction.capitalize()}: {sum(messages.values())} messages, {sum(wire_bytes.values())} bytes")
+        for name in sorted(messages):
+            print(f"  {name:<28} {messages[name]:>10} messages {wire_bytes.get(name, 0):>12} bytes")
+
+    for title, key in (('Parse time', 'parse_seconds'), ('Round trip', 'round_trip_seconds')):
+        if snapshot[key]:
+            print(f"{title} (bucket upper bounds):")
+        for name, histogram in sorted(snapshot[key].items()):
+            mean_ms = histogram.sum / histogram.count * 1e3
+            p50, p90, p99 = (histogram.quantile(q) * 1e3 for q in (0.5, 0.9, 0.99))
+            print(f"  {name:<28} n={histogram.count} mean={mean_ms:.3f} ms p50<={p50:g} ms p90<={p90:g} ms p99<={p99:g} ms")
+
+    if prometheus:
+        with open(prometheus, 'w') as f:
+            f.write(es9_prometheus_text(snapshot))
+        print(f"Wrote Prometheus metrics to {prometheus}")
+
+@cli.command()
+@click.option('--port', type=str, default='ES-9 Simulator', show_default=True, help='Name of the virtual MIDI ports to create')
+def simulate(
+    port: str
+):
+    """Run a simulated ES-9 behind virtual MIDI input and output ports."""
+    simulator = ES9Simulator()
+
+    async def main():
+        with mido.open_input(port, virtual=True) as rx, mido.open_output(port, virtual=True) as tx:
+            print(f"Simulating an ES-9 on virtual port: {port} (Ctrl+C to quit)")
+            await simulator.run(rx, tx)
+
+    asyncio.run(main())
+
 @cli.command()
 @click.argument('mask', type=str)
 def hpf(
@@ -0,0 +1,218 @@
+import asyncio
+import mido
+import time
+
+from collections import deque
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    ES9_SYSEX_HEADER,
+    MessageType,
+    Message,
+
+    RequestConfigurationDumpMessage,
+    RequestMixMessage,
+    RequestSampleRateMessage,
+    RequestUsageMessage,
+    RequestVersionStringMessage,
+
+    es9_parse_configuration_dump,
+    es9_parse_message_report,
+    es9_parse_mix_dump,
+    es9_parse_sample_rate_hz,
+    es9_parse_usage,
+
+    es9_py_pb2,
+)
+from view import ConfigurationView
+from statecache import (
+    DEFAULT_TTL,
+    StateCache,
+)
+
+_TYPE_INDEX = len(ES9_SYSEX_HEADER)
+
+class ES9Client:
+    """
+    Asyncio client for one ES-9.
+
+    A single background task drains the input port and hands each report
+    to the oldest request waiting for that MessageType, so requests for
+    different report types can be in flight at the same time. Every request
+    is bounded by a timeout.
+
+    output is any object with a mido-style send(), input any object with a
+    mido-style iter_pending(). metrics is an optional metrics.Metrics.
+
+    The client owns a StateCache (state) that follows every message sent
+    and every report received; configuration() and configuration_view()
+    read through it.
+    """
+    def __init__(self, output, input, timeout: float = 1.0, poll_interval: float = 0.001, metrics=None, cache_ttl: float | None = DEFAULT_TTL):
+        self._metrics = metrics
+        self.state = StateCache(cache_ttl)
+        self._output = output
+        self._input = input
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._pending = {} # reply MessageType value -> deque of futures
+        self._listeners = []
+        self._receive_task = None
+        self.last_traffic = 0.0 # time.monotonic() of the last message sent or received
+
+    async def __aenter__(self) -> 'ES9Client':
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        if self._receive_task is None:
+            self._receive_task = asyncio.create_task(self._receive_loop())
+
+    async def close(self):
+        if self._receive_task is not None:
+            self._receive_task.cancel()
+            try:
+                await self._receive_task
+            except asyncio.CancelledError:
+                pass
+            self._receive_task = None
+
+        for futures in self._pending.values():
+            for future in futures:
+                future.cancel()
+        self._pending.clear()
+
+    def add_listener(self, callback):
+        """
+        Register callback(message_type: int, payload: bytes),
+        called for every ES-9 message received, including replies.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    @property
+    def pending_requests(self) -> int:
+        """
+        Number of requests waiting for a reply.
+        """
+        return sum(len(futures) for futures in self._pending.values())
+
+    def send(self, msg: Message):
+        logger.debug(f"Sending SysEx message: {msg.data.hex(' ').upper()}")
+        self._output.send(mido.Message('sysex', data=msg.data))
+        self.last_traffic = time.monotonic()
+        self.state.apply_sent(msg)
+        if self._metrics is not None:
+            self._metrics.record_sent(msg.msg_type, len(msg.data))
+
+    def dispatch(self, data: bytes):
+        """
+        Handle one received SysEx message (mido data, without F0/F7).
+        """
+        if not data.startswith(ES9_SYSEX_HEADER):
+            return
+
+        message_type = data[_TYPE_INDEX]
+        payload = data[_TYPE_INDEX + 1:] # mido data already excludes F7
+        self.last_traffic = time.monotonic()
+        if self._metrics is not None:
+            self._metrics.record_received(message_type, len(data))
+
+        self.state.apply_report(message_type, payload)
+        for callback in self._listeners:
+            callback(message_type, payload)
+
+        futures = self._pending.get(message_type)
+        while futures:
+            future = futures.popleft()
+            if not future.done():
+                future.set_result(payload)
+                break
+
+    async def _receive_loop(self):
+        while True:
+            for msg in self._input.iter_pending():
+                if msg.type == 'sysex':
+                    self.dispatch(bytes(msg.data))
+            await asyncio.sleep(self._poll_interval)
+
+    async def request(self, msg: Message, reply_type: MessageType, timeout: float | None = None, reply_name: str | None = None) -> bytes:
+        """
+        Send msg and wait for the next report of reply_type.
+        Returns the report payload, or raises TimeoutError.
+        reply_name names the report in the timeout error, for report types
+        whose value is shared with a request type (default: reply_type.name).
+        """
+        future = asyncio.get_running_loop().create_future()
+        futures = self._pending.setdefault(reply_type.value, deque())
+        futures.append(future)
+        start = time.perf_counter()
+        self.send(msg)
+
+        try:
+            payload = await asyncio.wait_for(future, self._timeout if timeout is None else timeout)
+            if self._metrics is not None:
+                self._metrics.record_round_trip(reply_type, time.perf_counter() - start)
+            return payload
+        except TimeoutError:
+            raise TimeoutError(f"No {reply_name or reply_type.name} received in response to {type(msg).__name__}")
+        finally:
+            if future in futures:
+                futures.remove(future)
+
+    async def request_configuration(self, timeout: float | None = None) -> es9_py_pb2.Configuration:
+        payload = await self.request(RequestConfigurationDumpMessage(), MessageType.REPORT_CONFIGURATION_DUMP, timeout)
+        return es9_parse_configuration_dump(payload)
+
+    async def configuration(self, max_age: float | None = None, timeout: float | None = None) -> es9_py_pb2.Configuration:
+        """
+        Current configuration, served from the state cache while it is
+        fresh (see StateCache.fresh), otherwise requested from the device.
+        The result is a copy that may be modified freely.
+        """
+        if self.state.fresh(max_age):
+            self.state.hits += 1
+            return self.state.configuration()
+        self.state.misses += 1
+        payload = await self.request(RequestConfigurationDumpMessage(), MessageType.REPORT_CONFIGURATION_DUMP, timeout)
+        if not self.state.valid: # e.g. a reset sent while the dump was in flight
+            return es9_parse_configuration_dump(payload)
+        return self.state.configuration()
+
+    async def configuration_view(self, max_age: float | None = None, timeout: float | None = None) -> ConfigurationView:
+        """
+        Like configuration(), but returns a read-only ConfigurationView that
+        decodes only the sections that are read. Prefer it for polling.
+        """
+        if self.state.fresh(max_age):
+            self.state.hits += 1
+            return self.state.view()
+        self.state.misses += 1
+        payload = await self.request(RequestConfigurationDumpMessage(), MessageType.REPORT_CONFIGURATION_DUMP, timeout)
+        if not self.state.valid:
+            return ConfigurationView.from_payload(payload)
+        return self.state.view()
+
+    async def request_mix(self, timeout: float | None = None) -> es9_py_pb2.MixConfiguration:
+        payload = await self.request(RequestMixMessage(), MessageType.REPORT_MIX, timeout)
+        return es9_parse_mix_dump(payload)
+
+    async def request_usage(self, timeout: float | None = None) -> es9_py_pb2.Usage:
+        payload = await self.request(RequestUsageMessage(), MessageType.REPORT_USAGE, timeout)
+        return es9_parse_usage(payload)
+
+    async def request_sample_rate(self, timeout: float | None = None) -> int:
+        payload = await self.request(RequestSampleRateMessage(), MessageType.REPORT_SAMPLE_RATE, timeout)
+        return es9_parse_sample_rate_hz(payload)
+
+    async def request_version(self, timeout: float | None = None) -> str:
+        # REPORT_MESSAGE shares its value with SET_OPTIONS, so the enum would name it SET_OPTIONS
+        payload = await self.request(RequestVersionStringMessage(), MessageType.REPORT_MESSAGE, timeout, reply_name='REPORT_MESSAGE')
+        return es9_parse_message_report(payload)
@@ -0,0 +1,78 @@
+"""
+ES-9 7-bit word codec.
+
+The ES-9 carries every multi-byte value over SysEx as a word split into
+three 7-bit bytes, most significant first:
+
+    word = (b0 << 14) | (b1 << 7) | b2
+
+All functions here work directly on bytes, bytearray or memoryview
+buffers, so callers can decode from and encode into slices of a larger
+SysEx message without copying it first.
+"""
+
+from array import array
+
+WORD_SIZE = 3 # bytes per packed word
+WORD_MASK = 0x1FFFFF # 21 bits
+
+def _build_word16_table() -> bytes:
+    # b0, b1 and b2 of every 16-bit value, written column by column
+    table = bytearray(0x10000 * WORD_SIZE)
+    view = memoryview(table)
+    view[0::WORD_SIZE] = b''.join(bytes((b0,)) * 0x4000 for b0 in range(4))
+    view[1::WORD_SIZE] = b''.join(bytes((b1,)) * 0x80 for b1 in range(0x80)) * 4
+    view[2::WORD_SIZE] = bytes(range(0x80)) * 0x200
+    return bytes(table)
+
+# Every 16-bit value pre-encoded as 3 bytes, for building messages
+_WORD16_TABLE = _build_word16_table()
+
+def decode_word(src, offset: int = 0) -> int:
+    """
+    Decode the single word starting at offset.
+    """
+    return (src[offset] << 14) | (src[offset + 1] << 7) | src[offset + 2]
+
+def encode_word(value: int) -> bytes:
+    """
+    Encode a single word as 3 bytes.
+    Signed 16-bit values should be masked with 0xFFFF by the caller.
+    """
+    return bytes(((value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F))
+
+def encode_word16(value: int) -> bytes:
+    """
+    Encode the low 16 bits of value (levels, frequencies, Q, gain, signed
+    offsets) as 3 bytes, using the precomputed table.
+    """
+    offset = (value & 0xFFFF) * WORD_SIZE
+    return _WORD16_TABLE[offset:offset + WORD_SIZE]
+
+def decode_words(src) -> array:
+    """
+    Decode every whole packed word in src into a new array('I').
+    """
+    it = iter(memoryview(src)[:len(src) - len(src) % WORD_SIZE])
+    return array('I', [(b0 << 14) | (b1 << 7) | b2 for b0, b1, b2 in zip(it, it, it)])
+
+def encode_words_into(dst, words, offset: int = 0) -> int:
+    """
+    Encode a sequence of words into the preallocated buffer dst
+    (bytearray or writable memoryview) starting at offset.
+    Returns the offset just past the last encoded word.
+    """
+    end = offset + len(words) * WORD_SIZE
+    view = memoryview(dst)
+    view[offset:end:WORD_SIZE] = bytes([(w >> 14) & 0x7F for w in words])
+    view[offset + 1:end:WORD_SIZE] = bytes([(w >> 7) & 0x7F for w in words])
+    view[offset + 2:end:WORD_SIZE] = bytes([w & 0x7F for w in words])
+    return end
+
+def encode_words(words) -> bytes:
+    """
+    Encode a sequence of words into a new bytes object.
+    """
+    dst = bytearray(len(words) * WORD_SIZE)
+    encode_words_into(dst, words)
+    return bytes(dst)
@@ -0,0 +1,210 @@
+"""
+Declarative configuration files.
+
+A configuration file describes the target state of an ES-9 as a partial
+es9_py_pb2.Configuration, in one of:
+
+    .textproto / .txtpb   protobuf text format
+    .json                 protobuf JSON mapping
+    .toml                 the same mapping as TOML tables
+
+Fields the file does not mention keep their current value on the device.
+In JSON and TOML, enum values may drop their type prefix, e.g.
+"INPUT_1" for CHANNEL_INPUT_1 or "MIX_1_2" for MIXER_LINK_MIX_1_2.
+
+Applying a file compiles it, merged onto the current device state, into
+the Set* messages plan_changes() finds. The compiled plan is cached on
+disk as a burst (see scenes.Burst), keyed by the digest of the file and
+a fingerprint of the device's configuration dump words, so applying the
+same file to the same state again neither parses the file nor plans.
+"""
+
+import hashlib
+import json
+import os
+import tomllib
+
+from google.protobuf import (
+    json_format,
+    text_format,
+)
+from google.protobuf.descriptor import FieldDescriptor
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    CONFIGURATION_DUMP_LAYOUT,
+    MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL,
+    MAP_ES9_OUTPUT_ROUTE_ID_BY_CHANNEL,
+    MIX_LEVEL_MAX,
+    Message,
+
+    es9_encode_configuration_words,
+    es9_try_recover_channel_from_input_route_id,
+    es9_try_recover_channel_from_output_route_id,
+
+    es9_py_pb2,
+)
+from planner import plan_changes
+from scenes import (
+    BURST_SUFFIX,
+    Burst,
+
+    es9_encode_burst,
+)
+
+DEFAULT_PLAN_CACHE_ENTRIES = 256
+
+_TEXT_SUFFIXES = ('.textproto', '.txtpb')
+
+def es9_file_digest(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def es9_state_fingerprint(words) -> str:
+    """
+    Fingerprint of a device state given as configuration dump words.
+    """
+    return hashlib.sha256(memoryview(words).cast('B')).hexdigest()
+
+def _expand_enum_names(descriptor, mapping: dict):
+    # resolve enum values given without their type prefix, in place
+    for key, value in mapping.items():
+        field = descriptor.fields_by_name.get(key) or descriptor.fields_by_camelcase_name.get(key)
+        if field is None:
+            continue # reported by json_format
+        if field.type == FieldDescriptor.TYPE_MESSAGE and isinstance(value, dict):
+            _expand_enum_names(field.message_type, value)
+        elif field.type == FieldDescriptor.TYPE_ENUM and isinstance(value, str) and value not in field.enum_type.values_by_name:
+            matches = [name for name in field.enum_type.values_by_name if name.endswith('_' + value.upper())]
+            if len(matches) == 1:
+                mapping[key] = matches[0]
+
+def _field_limits(path: tuple[str, ...]) -> tuple[int, int] | None:
+    # value range the Set* messages accept for a numeric field, None for fields that need no check
+    if path[0].endswith('_crosspoint_configuration'):
+        return 0, MIX_LEVEL_MAX
+    if path[0] == 'midi_channels_configuration':
+        return 0, 16
+    if path[0] == 'output_dc_offset_configuration':
+        return -3176, 3176
+    if path[-1] in ('frequency_hz', 'q_factor'):
+        return 0, 0xFFFF
+    if path[-1] == 'gain':
+        return -0x8000, 0x7FFF
+    return None
+
+def _validate_configuration(path: str, config: es9_py_pb2.Configuration):
+    """
+    Raise ValueError naming the first field of config the ES-9 cannot represent.
+    """
+    for field_path, word, shift, mask, transform in CONFIGURATION_DUMP_LAYOUT:
+        value = config
+        for field in field_path:
+            value = getattr(value, field)
+        name = '.'.join(field_path)
+
+        if transform in (es9_try_recover_channel_from_input_route_id, es9_try_recover_channel_from_output_route_id):
+            direction, route_ids = ('an input', MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL) if transform is es9_try_recover_channel_from_input_route_id else ('an output', MAP_ES9_OUTPUT_ROUTE_ID_BY_CHANNEL)
+            if value != es9_py_pb2.Channel.CHANNEL_UNSPECIFIED and value not in route_ids:
+                raise ValueError(f"{path}: {name}: {es9_py_pb2.Channel.Name(value)} cannot be routed to {direction}")
+            continue
+
+        limits = _field_limits(field_path)
+        if limits is not None and not limits[0] <= round(value) <= limits[1]:
+            raise ValueError(f"{path}: {name}: {value} is out of range {limits[0]} to {limits[1]}")
+
+def es9_load_configuration_file(path: str, base: es9_py_pb2.Configuration | None = None) -> es9_py_pb2.Configuration:
+    """
+    Read a configuration file, merged onto a copy of base (the current
+    state) when given. Raises ValueError for files that do not parse.
+    """
+    config = es9_py_pb2.Configuration()
+    if base is not None:
+        config.CopyFrom(base)
+
+    suffix = os.path.splitext(path)[1].lower()
+    try:
+        if suffix in _TEXT_SUFFIXES:
+            with open(path) as f:
+                text_format.Merge(f.read(), config)
+        elif suffix in ('.json', '.toml'):
+            with open(path, 'rb') as f:
+                mapping = json.load(f) if suffix == '.json' else tomllib.load(f)
+            _expand_enum_names(config.DESCRIPTOR, mapping)
+            json_format.ParseDict(mapping, config)
+        else:
+            raise ValueError(f"Unsupported configuration file type {suffix!r}, expected one of .textproto, .txtpb, .json, .toml")
+    except (text_format.ParseError, json_format.ParseError, json.JSONDecodeError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"{path}: {e}") from e
+    return config
+
+def es9_compile_configuration_file(path: str, current: es9_py_pb2.Configuration, strict_links: bool = False) -> list[Message]:
+    """
+    Validate a configuration file against the current state and return
+    the messages that move the device to it. Raises ValueError for files
+    that do not parse or hold values the ES-9 cannot represent, and with
+    strict_links for routing that conflicts with stereo links.
+    """
+    target = es9_load_configuration_file(path, current)
+    _validate_configuration(path, target)
+    return plan_changes(current, target, strict_links)
+
+class PlanCache:
+    """
+    Directory of compiled plans, one burst file per (file digest, state
+    fingerprint), keeping the max_entries most recently used.
+    """
+    def __init__(self, root: str, max_entries: int = DEFAULT_PLAN_CACHE_ENTRIES):
+        self.root = root
+        self.max_entries = max_entries
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, file_digest: str, fingerprint: str) -> str:
+        return os.path.join(self.root, f'{file_digest[:16]}-{fingerprint[:16]}{BURST_SUFFIX}')
+
+    def get(self, file_digest: str, fingerprint: str) -> Burst | None:
+        path = self._path(file_digest, fingerprint)
+        try:
+            with open(path, 'rb') as f:
+                burst = Burst(f.read())
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return burst
+
+    def put(self, file_digest: str, fingerprint: str, messages: list[Message]):
+        path = self._path(file_digest, fingerprint)
+        with open(f'{path}.tmp', 'wb') as f:
+            f.write(es9_encode_burst(messages))
+        os.replace(f'{path}.tmp', path)
+
+        entries = sorted((entry for entry in os.scandir(self.root) if entry.name.endswith(BURST_SUFFIX)), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:max(0, len(entries) - self.max_entries)]:
+            os.remove(entry.path)
+
+async def es9_apply_configuration_file(client, path: str, cache: PlanCache | None = None, timeout: float | None = None, strict_links: bool = False) -> tuple[int, bool]:
+    """
+    Move the device to the state a configuration file describes through
+    an ES9Client, reusing a cached plan for this file and device state.
+    Returns the number of messages sent and whether the plan was cached.
+    With strict_links the file is always compiled, since a cached plan
+    may hold routing that was corrected rather than rejected.
+    """
+    current = await client.configuration(timeout=timeout)
+    file_digest = es9_file_digest(path)
+    words = client.state.words
+    fingerprint = es9_state_fingerprint(words if words is not None else es9_encode_configuration_words(current))
+
+    burst = cache.get(file_digest, fingerprint) if cache is not None and not strict_links else None
+    if burst is not None:
+        messages = burst.messages
+    else:
+        messages = es9_compile_configuration_file(path, current, strict_links)
+        if cache is not None:
+            cache.put(file_digest, fingerprint, messages)
+
+    for msg in messages:
+        client.send(msg)
+    return len(messages), burst is not None
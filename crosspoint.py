@@ -0,0 +1,198 @@
+"""
+NumPy view of the crosspoint levels of both mixers.
+
+CrosspointMatrix holds the 128 crosspoint levels as a (2, 8, 8) integer
+array indexed [mixer, output, input], the order the configuration and
+mix dumps store them in, so loading from dump words is a single copy
+instead of 128 protobuf field accesses. by_mix is a (16, 8) view of the
+same array indexed [mix ID, input], matching SetMixMessage.
+
+Levels are linear with 0 dB at MIX_LEVEL_UNITY (0x2000), 6 dB per
+doubling, up to MIX_LEVEL_MAX (+12 dB); anything below MIX_LEVEL_FLOOR_DB
+is off, as in the Expert Sleepers configurator.
+"""
+
+import numpy as np
+
+import codec
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_OFFSET_MIX,
+    MIX_DUMP_CROSSPOINT_COUNT,
+    MIX_LEVEL_MAX,
+
+    SetMixMessage,
+
+    es9_mix_crosspoint_field_path,
+    es9_unpack_mix_dump_words,
+
+    es9_py_pb2,
+)
+
+MIX_LEVEL_UNITY = 0x2000 # 0 dB
+MIX_LEVEL_FLOOR_DB = -72.0
+
+MIXERS = 2
+MIXER_OUTPUTS = 8
+MIXER_INPUTS = 8
+
+def es9_db_to_level(db):
+    """
+    Crosspoint level of a gain in dB, for scalars or arrays.
+    """
+    db = np.asarray(db, dtype=np.float64)
+    with np.errstate(over='ignore'):
+        level = np.minimum(np.rint(MIX_LEVEL_UNITY * np.exp2(db / 6.0)), MIX_LEVEL_MAX)
+    level = np.where(db < MIX_LEVEL_FLOOR_DB, 0, level).astype(np.int32)
+    return level if level.ndim else int(level)
+
+def es9_level_to_db(level):
+    """
+    Gain in dB of a crosspoint level (-inf for 0), for scalars or arrays.
+    """
+    level = np.asarray(level, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        db = 6.0 * np.log2(level / MIX_LEVEL_UNITY)
+    return db if db.ndim else float(db)
+
+def _selection(mixer, output, input) -> tuple:
+    # None selects everything along an axis
+    return tuple(slice(None) if index is None else index for index in (mixer, output, input))
+
+class CrosspointMatrix:
+    """
+    Crosspoint levels of both mixers, see the module docstring.
+    Selections take mixer (0-1), output (0-7) and input (0-7) indexes,
+    slices or index arrays, None meaning all.
+    """
+    __slots__ = ('levels',)
+
+    def __init__(self, levels=None):
+        if levels is None:
+            self.levels = np.zeros((MIXERS, MIXER_OUTPUTS, MIXER_INPUTS), dtype=np.int32)
+        else:
+            self.levels = np.array(levels, dtype=np.int32).reshape(MIXERS, MIXER_OUTPUTS, MIXER_INPUTS)
+
+    @classmethod
+    def from_words(cls, words) -> 'CrosspointMatrix':
+        """
+        Load from MIX_DUMP_CROSSPOINT_COUNT crosspoint words, e.g. the
+        start of unpacked mix dump words.
+        """
+        assert len(words) >= MIX_DUMP_CROSSPOINT_COUNT, "Invalid word count for crosspoints"
+        return cls(np.frombuffer(words, dtype=np.uint32, count=MIX_DUMP_CROSSPOINT_COUNT) & 0xFFFF)
+
+    @classmethod
+    def from_configuration_words(cls, words) -> 'CrosspointMatrix':
+        return cls.from_words(words[CONFIGURATION_DUMP_OFFSET_MIX:CONFIGURATION_DUMP_OFFSET_MIX + MIX_DUMP_CROSSPOINT_COUNT])
+
+    @classmethod
+    def from_configuration_dump(cls, payload: bytes) -> 'CrosspointMatrix':
+        """
+        Load from a configuration dump SysEx payload, as passed to es9_parse_configuration_dump.
+        """
+        return cls.from_configuration_words(codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:]))
+
+    @classmethod
+    def from_mix_dump(cls, payload: bytes) -> 'CrosspointMatrix':
+        """
+        Load from a mix dump SysEx payload, as passed to es9_parse_mix_dump.
+        """
+        return cls.from_words(es9_unpack_mix_dump_words(payload))
+
+    @classmethod
+    def from_configuration(cls, config: es9_py_pb2.Configuration | es9_py_pb2.MixConfiguration) -> 'CrosspointMatrix':
+        """
+        Load from the crosspoint fields of a Configuration or MixConfiguration.
+        """
+        matrix = cls()
+        by_mix = matrix.by_mix
+        for mix_id in range(MIXERS * MIXER_OUTPUTS):
+            section, output, _field = es9_mix_crosspoint_field_path(mix_id, 0)
+            levels = getattr(getattr(config, section), output)
+            for ch in range(MIXER_INPUTS):
+                by_mix[mix_id, ch] = getattr(levels, f'input{ch + 1}_level')
+        return matrix
+
+    def apply_to(self, config: es9_py_pb2.Configuration | es9_py_pb2.MixConfiguration):
+        """
+        Write the levels into the crosspoint fields of a Configuration or MixConfiguration.
+        """
+        by_mix = self.by_mix
+        for mix_id in range(MIXERS * MIXER_OUTPUTS):
+            section, output, _field = es9_mix_crosspoint_field_path(mix_id, 0)
+            levels = getattr(getattr(config, section), output)
+            for ch in range(MIXER_INPUTS):
+                setattr(levels, f'input{ch + 1}_level', int(by_mix[mix_id, ch]))
+
+    @property
+    def by_mix(self) -> np.ndarray:
+        return self.levels.reshape(MIXERS * MIXER_OUTPUTS, MIXER_INPUTS)
+
+    def copy(self) -> 'CrosspointMatrix':
+        return CrosspointMatrix(self.levels)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CrosspointMatrix) and np.array_equal(self.levels, other.levels)
+
+    def db(self) -> np.ndarray:
+        """
+        Levels in dB, -inf where off.
+        """
+        return es9_level_to_db(self.levels)
+
+    def set_db(self, db, mixer=None, output=None, input=None):
+        self.levels[_selection(mixer, output, input)] = es9_db_to_level(db)
+
+    def set_level(self, level, mixer=None, output=None, input=None):
+        level = np.asarray(level)
+        assert np.all((level >= 0) & (level <= MIX_LEVEL_MAX)), f"Level must be in range 0-{MIX_LEVEL_MAX}"
+        self.levels[_selection(mixer, output, input)] = level
+
+    def scale(self, factor, mixer=None, output=None, input=None):
+        """
+        Multiply levels by a linear factor, clipped to MIX_LEVEL_MAX.
+        """
+        selection = _selection(mixer, output, input)
+        self.levels[selection] = np.clip(np.rint(self.levels[selection] * np.asarray(factor, dtype=np.float64)), 0, MIX_LEVEL_MAX)
+
+    def gain(self, db, mixer=None, output=None, input=None):
+        """
+        Change levels by db, clipped to MIX_LEVEL_MAX. Levels that are off stay off.
+        """
+        self.scale(np.exp2(np.asarray(db, dtype=np.float64) / 6.0), mixer, output, input)
+
+    def mute(self, mixer=None, output=None, input=None):
+        self.levels[_selection(mixer, output, input)] = 0
+
+    def copy_row(self, source_mix_id: int, target_mix_id: int):
+        """
+        Copy the input levels of one mix (mixer output) to another.
+        """
+        self.by_mix[target_mix_id] = self.by_mix[source_mix_id]
+
+    def copy_column(self, source_input: int, target_input: int, mixer=None):
+        """
+        Copy the levels of one mixer input, across all outputs, to another input.
+        """
+        self.levels[_selection(mixer, None, target_input)] = self.levels[_selection(mixer, None, source_input)]
+
+    def apply_gain_group(self, crosspoints: list[tuple[int, int]], db: float):
+        """
+        Change a group of crosspoints, given as (mix ID, input) pairs, by the same gain.
+        """
+        mix_ids, inputs = np.asarray(crosspoints, dtype=np.intp).reshape(-1, 2).T
+        by_mix = self.by_mix
+        by_mix[mix_ids, inputs] = np.clip(np.rint(by_mix[mix_ids, inputs] * 2.0 ** (db / 6.0)), 0, MIX_LEVEL_MAX)
+
+    def changes(self, target: 'CrosspointMatrix') -> list[SetMixMessage]:
+        """
+        The SetMixMessages that turn these levels into target's, one per
+        differing crosspoint, in mix ID and input order.
+        """
+        target_by_mix = target.by_mix
+        assert np.all((target_by_mix >= 0) & (target_by_mix <= MIX_LEVEL_MAX)), f"Level must be in range 0-{MIX_LEVEL_MAX}"
+        mix_ids, inputs = np.nonzero(self.by_mix != target_by_mix)
+        levels = target_by_mix[mix_ids, inputs]
+        return [SetMixMessage.unchecked(mix_id, ch, level) for mix_id, ch, level in zip(mix_ids.tolist(), inputs.tolist(), levels.tolist())]
@@ -0,0 +1,167 @@
+"""
+Streaming SysEx demultiplexer for ES-9 traffic.
+
+SysExDemux accepts either raw MIDI bytes (feed), in which SysEx messages
+may arrive split across reads and interleaved with real-time bytes, or
+complete SysEx messages as delivered by mido (dispatch). Messages that do
+not carry the ES-9 header are rejected as soon as the header bytes are
+seen, without being buffered any further. ES-9 messages are routed
+through a table keyed by MessageType to handlers that receive the
+payload as a memoryview, without copying it out of the message.
+"""
+
+import re
+import time
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    ES9_SYSEX_HEADER,
+    MessageType,
+)
+
+SYSEX_START = 0xF0
+SYSEX_END = 0xF7
+REALTIME_FIRST = 0xF8 # 0xF8-0xFF may appear anywhere, even inside SysEx
+
+# largest ES-9 message is the configuration dump, a little over 2 KiB
+DEFAULT_MAX_LENGTH = 4096
+
+_TYPE_INDEX = len(ES9_SYSEX_HEADER)
+_PAYLOAD_START = _TYPE_INDEX + 1
+_STATUS_BYTE = re.compile(rb'[\x80-\xff]')
+
+class SysExDemux:
+    """
+    Reassembles SysEx messages and dispatches ES-9 reports by MessageType.
+
+    Handlers are called as handler(payload: memoryview), where payload
+    follows the report convention used throughout interface.py: the bytes
+    after the header and type byte, up to the F7 that mido and feed()
+    already strip. The view
+    shares memory with the received message; handlers that keep the
+    payload beyond the call should copy it with bytes(payload).
+    """
+    def __init__(self, max_length: int = DEFAULT_MAX_LENGTH, metrics=None):
+        self._handlers = {} # MessageType value -> handler
+        self._max_length = max_length
+        self._metrics = metrics # optional metrics.Metrics
+        self._buffer = bytearray()
+        self._in_sysex = False
+        self._rejected = False # current SysEx is not ES-9 traffic, discard it
+
+        self.messages = 0 # ES-9 messages dispatched to a handler
+        self.unhandled = 0 # ES-9 messages with no registered handler
+        self.rejected = 0 # SysEx messages without the ES-9 header
+        self.dropped = 0 # SysEx messages aborted or too long
+
+    def register(self, message_type: MessageType, handler):
+        """
+        Route messages of message_type to handler, replacing any previous one.
+        """
+        self._handlers[message_type.value] = handler
+
+    def unregister(self, message_type: MessageType):
+        self._handlers.pop(message_type.value, None)
+
+    def dispatch(self, data: bytes | bytearray) -> bool:
+        """
+        Dispatch one complete SysEx message (mido data, without F0/F7).
+        Returns True if a handler was called.
+        """
+        if not data.startswith(ES9_SYSEX_HEADER) or len(data) < _PAYLOAD_START:
+            self.rejected += 1
+            return False
+
+        msg_type = data[_TYPE_INDEX]
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.record_received(msg_type, len(data))
+
+        handler = self._handlers.get(msg_type)
+        if handler is None:
+            self.unhandled += 1
+            return False
+
+        self.messages += 1
+        if metrics is None:
+            handler(memoryview(data)[_PAYLOAD_START:])
+        else:
+            start = time.perf_counter()
+            handler(memoryview(data)[_PAYLOAD_START:])
+            metrics.record_parse(msg_type, time.perf_counter() - start)
+        return True
+
+    def feed(self, data: bytes | bytearray):
+        """
+        Consume a chunk of raw MIDI bytes, dispatching every SysEx message
+        completed by it. Partial messages are kept until the next call.
+        """
+        i = 0
+        n = len(data)
+        while i < n:
+            if not self._in_sysex:
+                start = data.find(SYSEX_START, i)
+                if start < 0:
+                    return
+                self._start()
+                i = start + 1
+                continue
+
+            match = _STATUS_BYTE.search(data, i)
+            end = match.start() if match else n
+            if end > i and not self._rejected:
+                self._append(data, i, end)
+            if match is None:
+                return
+
+            status = data[end]
+            i = end + 1
+            if status >= REALTIME_FIRST:
+                continue # real-time bytes do not interrupt SysEx
+            if status == SYSEX_END:
+                self._complete()
+            elif status == SYSEX_START:
+                self.dropped += 1 # unterminated, a new SysEx starts here
+                self._start()
+            else:
+                self.dropped += 1 # any other status byte aborts SysEx
+                self._in_sysex = False
+
+    def reset(self):
+        """
+        Discard any partially received message.
+        """
+        self._in_sysex = False
+        self._buffer.clear()
+
+    def _start(self):
+        self._in_sysex = True
+        self._rejected = False
+        self._buffer.clear()
+
+    def _append(self, data, start: int, end: int):
+        buffer = self._buffer
+        checked = len(buffer) >= _TYPE_INDEX
+        buffer += data[start:end]
+
+        if not checked and len(buffer) >= _TYPE_INDEX and not buffer.startswith(ES9_SYSEX_HEADER):
+            self.rejected += 1
+            self._rejected = True
+            buffer.clear()
+        elif len(buffer) > self._max_length:
+            logger.warning(f"Dropping SysEx message longer than {self._max_length} bytes")
+            self.dropped += 1
+            self._rejected = True
+            buffer.clear()
+
+    def _complete(self):
+        self._in_sysex = False
+        if self._rejected:
+            return
+        if len(self._buffer) < _TYPE_INDEX:
+            self.rejected += 1
+            return
+        # copy once, so the buffer can be reused while handlers hold the payload
+        self.dispatch(bytes(self._buffer))
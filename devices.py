@@ -0,0 +1,197 @@
+"""
+Orchestration of several ES-9 units from one process.
+
+es9_discover_port_pairs() finds the MIDI input/output port pairs of the
+connected ES-9 modules. DeviceManager holds one Unit per module, each
+with its own ES9Client (and receive task) and its own
+CoalescingWriteQueue, and runs operations on all units concurrently, so
+a change across the rack takes as long as the slowest unit rather than
+the sum of all of them. Per-unit outcomes, including errors, are
+collected in UnitResults instead of aborting the other units.
+"""
+
+import asyncio
+import mido
+import re
+import time
+
+import logging
+logger = logging.getLogger(__name__)
+
+from client import ES9Client
+from interface import (
+    Message,
+
+    es9_py_pb2,
+)
+from planner import plan_changes
+from writequeue import (
+    MIDI_DIN_BYTES_PER_SECOND,
+    CoalescingWriteQueue,
+)
+
+_DIRECTION = re.compile(r'\b(in|out|input|output)\b', re.IGNORECASE)
+
+def _port_key(name: str) -> str:
+    # "ES-9 MIDI In 24:0" and "ES-9 MIDI Out 24:0" pair up as "ES-9 MIDI 24:0"
+    return ' '.join(_DIRECTION.sub(' ', name).split())
+
+def es9_discover_port_pairs(input_names: list[str] | None = None, output_names: list[str] | None = None, match: str = 'ES-9') -> list[tuple[str, str, str]]:
+    """
+    Pair up the input and output ports whose name contains match.
+    Returns (unit name, output port name, input port name) tuples, sorted by unit name.
+    """
+    input_names = mido.get_input_names() if input_names is None else input_names
+    output_names = mido.get_output_names() if output_names is None else output_names
+
+    outputs = {_port_key(name): name for name in output_names if match in name}
+    pairs = []
+    for name in input_names:
+        key = _port_key(name)
+        if match in name and key in outputs:
+            pairs.append((key, outputs[key], name))
+    return sorted(pairs)
+
+class Unit:
+    """
+    One ES-9: its client and its outbound write queue.
+    """
+    def __init__(self, name: str, client: ES9Client, bytes_per_second: float | None = MIDI_DIN_BYTES_PER_SECOND):
+        self.name = name
+        self.client = client
+        self.queue = CoalescingWriteQueue(client.send, bytes_per_second)
+
+    async def start(self):
+        self.client.start()
+        self.queue.start()
+
+    async def close(self):
+        await self.queue.close()
+        await self.client.close()
+
+    async def send_all(self, messages: list[Message]):
+        """
+        Queue messages and wait until they are all on the wire.
+        """
+        for msg in messages:
+            self.queue.put(msg)
+        await self.queue.drain()
+
+class UnitResult:
+    __slots__ = ('name', 'messages', 'elapsed', 'error')
+
+    def __init__(self, name: str, messages: int = 0, elapsed: float = 0.0, error: BaseException | None = None):
+        self.name = name
+        self.messages = messages # messages sent to the unit
+        self.elapsed = elapsed # seconds
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return f"{self.name}: failed after {self.elapsed:.3f} s: {self.error!r}"
+        return f"{self.name}: {self.messages} messages in {self.elapsed:.3f} s"
+
+class DeviceManager:
+    """
+    Runs operations on every unit concurrently.
+
+    Use open() to build a manager from port names, or pass ready-made
+    Units (e.g. over simulator loopback ports).
+    """
+    def __init__(self, units: list[Unit]):
+        names = [unit.name for unit in units]
+        assert len(set(names)) == len(names), "Unit names must be unique"
+        self.units = {unit.name: unit for unit in units}
+        self._ports = []
+
+    @classmethod
+    def open(cls, port_pairs: list[tuple[str, str, str]], timeout: float = 1.0, bytes_per_second: float | None = MIDI_DIN_BYTES_PER_SECOND) -> 'DeviceManager':
+        """
+        Open the ports of every (unit name, output port, input port) pair,
+        e.g. as returned by es9_discover_port_pairs().
+        """
+        units = []
+        ports = []
+        try:
+            for name, output_name, input_name in port_pairs:
+                output = mido.open_output(output_name)
+                ports.append(output)
+                input = mido.open_input(input_name)
+                ports.append(input)
+                units.append(Unit(name, ES9Client(output, input, timeout=timeout), bytes_per_second))
+            manager = cls(units)
+        except BaseException:
+            # do not leak the ports of the pairs opened before the failure
+            for port in ports:
+                port.close()
+            raise
+        manager._ports = ports
+        return manager
+
+    async def __aenter__(self) -> 'DeviceManager':
+        await asyncio.gather(*(unit.start() for unit in self.units.values()))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.gather(*(unit.close() for unit in self.units.values()))
+        for port in self._ports:
+            port.close()
+        self._ports = []
+
+    async def run(self, operation) -> dict[str, UnitResult]:
+        """
+        Await operation(unit) for every unit concurrently. operation returns
+        the number of messages it sent. Errors are caught per unit.
+        """
+        async def run_unit(unit: Unit) -> UnitResult:
+            start = time.perf_counter()
+            try:
+                messages = await operation(unit)
+            except Exception as e:
+                logger.error(f"ES-9 {unit.name}: {e!r}")
+                return UnitResult(unit.name, 0, time.perf_counter() - start, e)
+            return UnitResult(unit.name, messages or 0, time.perf_counter() - start)
+
+        results = await asyncio.gather(*(run_unit(unit) for unit in self.units.values()))
+        return {result.name: result for result in results}
+
+    async def send(self, messages: list[Message]) -> dict[str, UnitResult]:
+        """
+        Send the same messages to every unit.
+        """
+        async def operation(unit: Unit) -> int:
+            await unit.send_all(messages)
+            return len(messages)
+        return await self.run(operation)
+
+    async def apply(self, target) -> dict[str, UnitResult]:
+        """
+        Move every unit to a target configuration, sending only the changes.
+        target is either one Configuration for all units, or a callable
+        target(unit_name, config) returning the unit's target Configuration;
+        config is a copy of the unit's current state that it may edit and return.
+        """
+        async def operation(unit: Unit) -> int:
+            current = await unit.client.configuration()
+            if callable(target):
+                config = es9_py_pb2.Configuration()
+                config.CopyFrom(current)
+                unit_target = target(unit.name, config)
+            else:
+                unit_target = target
+            messages = plan_changes(current, unit_target)
+            await unit.send_all(messages)
+            return len(messages)
+        return await self.run(operation)
+
+    async def configurations(self) -> dict[str, es9_py_pb2.Configuration | BaseException]:
+        """
+        Current configuration of every unit, or the error that prevented reading it.
+        """
+        names = list(self.units)
+        configs = await asyncio.gather(*(self.units[name].client.configuration() for name in names), return_exceptions=True)
+        return dict(zip(names, configs))
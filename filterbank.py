@@ -0,0 +1,196 @@
+"""
+NumPy model of the mix input filters.
+
+FilterBank decodes the 64 filters (4 per mix, applied in series to the
+mix input) from the filter words of a configuration dump or from
+mix_input_filter_configuration in one vectorized pass, into (16, 4)
+arrays indexed [mix ID, filter instance] of physical values: frequency
+in Hz, Q, and gain in dB.
+
+response() evaluates the complex frequency response of each mix's
+filter chain at any number of frequencies at once. The firmware's filter
+design is not published, so each filter is modelled as the matching
+audio EQ cookbook biquad (first order low and high pass by the bilinear
+transform); expect small deviations near Nyquist.
+"""
+
+import numpy as np
+
+import codec
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_OFFSET_FILTERS,
+    EQ_FREQUENCY_MIN_HZ,
+    EQ_FREQUENCY_MULT,
+    EQ_GAIN_FULL_SCALE_DB,
+    EQ_Q_MIN,
+    EQ_Q_MULT,
+
+    es9_py_pb2,
+)
+
+MIXES = 16
+FILTERS_PER_MIX = 4
+FILTER_WORDS = 4
+FILTER_WORD_COUNT = MIXES * FILTERS_PER_MIX * FILTER_WORDS
+
+DEFAULT_SAMPLE_RATE_HZ = 48000
+
+_FilterType = es9_py_pb2.FilterType
+
+def es9_equalizer_filter_frequencies_to_float(v) -> np.ndarray:
+    """
+    es9_equalizer_filter_frequency_to_float for arrays of words.
+    """
+    return EQ_FREQUENCY_MIN_HZ * np.exp(EQ_FREQUENCY_MULT * np.asarray(v, dtype=np.float64))
+
+def es9_equalizer_filter_qs_to_float(v) -> np.ndarray:
+    """
+    es9_equalizer_filter_q_to_float for arrays of words.
+    """
+    return EQ_Q_MIN * np.exp(EQ_Q_MULT * np.asarray(v, dtype=np.float64))
+
+def es9_equalizer_filter_gains_to_db(v) -> np.ndarray:
+    """
+    es9_equalizer_filter_gain_to_db for arrays of words or signed gains.
+    """
+    gain = (np.asarray(v, dtype=np.int64) & 0xFFFF).astype(np.uint16).view(np.int16)
+    return gain * (EQ_GAIN_FULL_SCALE_DB / 32767.0)
+
+class FilterBank:
+    """
+    Decoded mix input filters, see the module docstring. Every attribute
+    is a (16, 4) array indexed [mix ID, filter instance].
+    """
+    __slots__ = ('enabled', 'filter_type', 'frequency_hz', 'q_factor', 'gain_db')
+
+    def __init__(self, enabled, filter_type, frequency_hz, q_factor, gain_db):
+        shape = (MIXES, FILTERS_PER_MIX)
+        self.enabled = np.array(enabled, dtype=bool).reshape(shape)
+        self.filter_type = np.array(filter_type, dtype=np.int32).reshape(shape) # es9_py_pb2.FilterType values
+        self.frequency_hz = np.array(frequency_hz, dtype=np.float64).reshape(shape)
+        self.q_factor = np.array(q_factor, dtype=np.float64).reshape(shape)
+        self.gain_db = np.array(gain_db, dtype=np.float64).reshape(shape)
+
+    @classmethod
+    def from_storage(cls, type_words, frequency, q_factor, gain) -> 'FilterBank':
+        """
+        Decode arrays of storage values: type_words holds the type storage
+        index << 1 | enabled, as in the first word of each filter.
+        """
+        type_words = np.asarray(type_words, dtype=np.int64)
+        index = type_words >> 1
+        if np.any(index > _FilterType.INVERT_PHASE - _FilterType.LOW_PASS_1ST_ORDER):
+            raise ValueError(f"Invalid filter type storage value: {type_words[index > 7].flat[0]}")
+        return cls(
+            type_words & 0x01,
+            index + _FilterType.LOW_PASS_1ST_ORDER,
+            es9_equalizer_filter_frequencies_to_float(frequency),
+            es9_equalizer_filter_qs_to_float(q_factor),
+            es9_equalizer_filter_gains_to_db(gain),
+        )
+
+    @classmethod
+    def from_words(cls, words) -> 'FilterBank':
+        """
+        Decode FILTER_WORD_COUNT filter words, as stored from CONFIGURATION_DUMP_OFFSET_FILTERS.
+        """
+        assert len(words) >= FILTER_WORD_COUNT, "Invalid word count for filters"
+        words = np.frombuffer(words, dtype=np.uint32, count=FILTER_WORD_COUNT).reshape(MIXES, FILTERS_PER_MIX, FILTER_WORDS)
+        return cls.from_storage(words[..., 0], words[..., 1] & 0xFFFF, words[..., 2] & 0xFFFF, words[..., 3])
+
+    @classmethod
+    def from_configuration_words(cls, words) -> 'FilterBank':
+        return cls.from_words(words[CONFIGURATION_DUMP_OFFSET_FILTERS:CONFIGURATION_DUMP_OFFSET_FILTERS + FILTER_WORD_COUNT])
+
+    @classmethod
+    def from_configuration_dump(cls, payload: bytes) -> 'FilterBank':
+        """
+        Decode from a configuration dump SysEx payload, as passed to es9_parse_configuration_dump.
+        """
+        return cls.from_configuration_words(codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:]))
+
+    @classmethod
+    def from_configuration(cls, config: es9_py_pb2.Configuration) -> 'FilterBank':
+        """
+        Decode mix_input_filter_configuration, whose fields hold the storage values.
+        """
+        storage = np.zeros((4, MIXES * FILTERS_PER_MIX), dtype=np.int64)
+        filters = config.mix_input_filter_configuration
+        for i in range(MIXES * FILTERS_PER_MIX):
+            f = getattr(filters, f'mix{i // FILTERS_PER_MIX + 1}_filter{i % FILTERS_PER_MIX + 1}')
+            # an unset filter_type decodes as LOW_PASS_1ST_ORDER, like an all-zero dump
+            index = max(f.filter_type - _FilterType.LOW_PASS_1ST_ORDER, 0)
+            storage[:, i] = (index << 1 | f.enabled, round(f.frequency_hz), round(f.q_factor), round(f.gain))
+        return cls.from_storage(*storage)
+
+    def coefficients(self, sample_rate_hz: float = DEFAULT_SAMPLE_RATE_HZ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Biquad coefficients b and a of every filter, each a (16, 4, 3)
+        array, normalized to a[..., 0] == 1. Disabled filters pass through.
+        """
+        w0 = 2.0 * np.pi * np.minimum(self.frequency_hz, 0.499 * sample_rate_hz) / sample_rate_hz
+        cos_w0 = np.cos(w0)
+        alpha = np.sin(w0) / (2.0 * self.q_factor)
+        A = 10.0 ** (self.gain_db / 40.0)
+        sqrt_A_alpha = 2.0 * np.sqrt(A) * alpha
+        K = np.tan(w0 / 2.0)
+        ones = np.ones_like(w0)
+        zeros = np.zeros_like(w0)
+
+        # (b0, b1, b2, a0, a1, a2) per filter type
+        designs = {
+            _FilterType.LOW_PASS_1ST_ORDER: (K, K, zeros, K + 1.0, K - 1.0, zeros),
+            _FilterType.HIGH_PASS_1ST_ORDER: (ones, -ones, zeros, K + 1.0, K - 1.0, zeros),
+            _FilterType.LOW_PASS_2ND_ORDER: ((1.0 - cos_w0) / 2.0, 1.0 - cos_w0, (1.0 - cos_w0) / 2.0, 1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha),
+            _FilterType.HIGH_PASS_2ND_ORDER: ((1.0 + cos_w0) / 2.0, -(1.0 + cos_w0), (1.0 + cos_w0) / 2.0, 1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha),
+            _FilterType.LOW_SHELF: (
+                A * ((A + 1.0) - (A - 1.0) * cos_w0 + sqrt_A_alpha),
+                2.0 * A * ((A - 1.0) - (A + 1.0) * cos_w0),
+                A * ((A + 1.0) - (A - 1.0) * cos_w0 - sqrt_A_alpha),
+                (A + 1.0) + (A - 1.0) * cos_w0 + sqrt_A_alpha,
+                -2.0 * ((A - 1.0) + (A + 1.0) * cos_w0),
+                (A + 1.0) + (A - 1.0) * cos_w0 - sqrt_A_alpha,
+            ),
+            _FilterType.HIGH_SHELF: (
+                A * ((A + 1.0) + (A - 1.0) * cos_w0 + sqrt_A_alpha),
+                -2.0 * A * ((A - 1.0) + (A + 1.0) * cos_w0),
+                A * ((A + 1.0) + (A - 1.0) * cos_w0 - sqrt_A_alpha),
+                (A + 1.0) - (A - 1.0) * cos_w0 + sqrt_A_alpha,
+                2.0 * ((A - 1.0) - (A + 1.0) * cos_w0),
+                (A + 1.0) - (A - 1.0) * cos_w0 - sqrt_A_alpha,
+            ),
+            _FilterType.PEAK: (1.0 + alpha * A, -2.0 * cos_w0, 1.0 - alpha * A, 1.0 + alpha / A, -2.0 * cos_w0, 1.0 - alpha / A),
+            _FilterType.INVERT_PHASE: (-ones, zeros, zeros, ones, zeros, zeros),
+        }
+        conditions = [self.enabled & (self.filter_type == filter_type) for filter_type in designs]
+        bypass = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+        b0, b1, b2, a0, a1, a2 = (
+            np.select(conditions, [design[i] for design in designs.values()], default=bypass[i])
+            for i in range(6)
+        )
+        return np.stack((b0, b1, b2), axis=-1) / a0[..., None], np.stack((a0, a1, a2), axis=-1) / a0[..., None]
+
+    def response(self, frequencies, sample_rate_hz: float = DEFAULT_SAMPLE_RATE_HZ, mix_ids=None) -> np.ndarray:
+        """
+        Complex response of each mix's filter chain at frequencies (Hz),
+        a (16, n) array, or (len(mix_ids), n) for a selection of mixes.
+        """
+        b, a = self.coefficients(sample_rate_hz)
+        if mix_ids is not None:
+            b, a = b[mix_ids], a[mix_ids]
+        z1 = np.exp(-2j * np.pi * np.asarray(frequencies, dtype=np.float64) / sample_rate_hz) # z^-1
+        z = np.stack((np.ones_like(z1), z1, z1 * z1)) # (3, n)
+        return np.prod((b @ z) / (a @ z), axis=-2)
+
+    def magnitude_db(self, frequencies, sample_rate_hz: float = DEFAULT_SAMPLE_RATE_HZ, mix_ids=None) -> np.ndarray:
+        with np.errstate(divide='ignore'):
+            return 20.0 * np.log10(np.abs(self.response(frequencies, sample_rate_hz, mix_ids)))
+
+    def phase(self, frequencies, sample_rate_hz: float = DEFAULT_SAMPLE_RATE_HZ, mix_ids=None, unwrap: bool = True) -> np.ndarray:
+        """
+        Phase in radians, unwrapped along frequency unless unwrap is False.
+        """
+        phase = np.angle(self.response(frequencies, sample_rate_hz, mix_ids))
+        return np.unwrap(phase, axis=-1) if unwrap else phase
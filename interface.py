@@ -1,6 +1,10 @@
+import math
 import mido
+from array import array
 from enum import Enum
 
+import codec
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -179,17 +183,28 @@ def es9_filter_type_from_storage_value(value: int) -> es9_py_pb2.FilterType:
         case _:
             raise ValueError(f"Invalid filter type storage value: {value}")
 
+def es9_filter_type_from_storage_index(index: int) -> es9_py_pb2.FilterType:
+    return es9_filter_type_from_storage_value(index << 1)
+
+def es9_filter_type_to_storage_index(filter_type: es9_py_pb2.FilterType) -> int:
+    assert es9_py_pb2.FilterType.LOW_PASS_1ST_ORDER <= filter_type <= es9_py_pb2.FilterType.INVERT_PHASE, "Invalid filter type"
+    return filter_type - es9_py_pb2.FilterType.LOW_PASS_1ST_ORDER
+
+# filter words are exponential in frequency and Q, as in the Expert Sleepers configurator
+EQ_FREQUENCY_MIN_HZ = 10.0
+EQ_FREQUENCY_MULT = math.log(22000.0 / EQ_FREQUENCY_MIN_HZ) / 32767.0
+EQ_Q_MIN = 0.1
+EQ_Q_MULT = math.log(18.0 / EQ_Q_MIN) / 32767.0
+EQ_GAIN_FULL_SCALE_DB = 15.0 # gain word 32767
+
 def es9_equalizer_filter_frequency_to_float(v: int) -> float:
-    import math
-    min_val = 10.0
-    mult = math.log(22000.0 / min_val) / 32767.0
-    return min_val * math.exp(mult * v)
+    return EQ_FREQUENCY_MIN_HZ * math.exp(EQ_FREQUENCY_MULT * v)
 
 def es9_equalizer_filter_q_to_float(v: int) -> float:
-    import math
-    min_val = 0.1
-    mult = math.log(18.0 / min_val) / 32767.0
-    return min_val * math.exp(mult * v)
+    return EQ_Q_MIN * math.exp(EQ_Q_MULT * v)
+
+def es9_equalizer_filter_gain_to_db(v: int) -> float:
+    return es9_int16_from_storage_value(v) * EQ_GAIN_FULL_SCALE_DB / 32767.0
 
 def es9_try_recover_channel_from_output_route_id(route_id: int) -> es9_py_pb2.Channel:
     try:
@@ -207,19 +222,23 @@ def es9_try_recover_channel_from_input_route_id(route_id: int) -> es9_py_pb2.Cha
         logger.error(f"Failed to recover ES-9 channel from input route ID: {route_id:02X}")
         return es9_py_pb2.Channel.CHANNEL_UNSPECIFIED
 
+ES9_INPUT_CHANNELS = frozenset((
+    es9_py_pb2.Channel.CHANNEL_INPUT_1, es9_py_pb2.Channel.CHANNEL_INPUT_2, es9_py_pb2.Channel.CHANNEL_INPUT_3, es9_py_pb2.Channel.CHANNEL_INPUT_4,
+    es9_py_pb2.Channel.CHANNEL_INPUT_5, es9_py_pb2.Channel.CHANNEL_INPUT_6, es9_py_pb2.Channel.CHANNEL_INPUT_7, es9_py_pb2.Channel.CHANNEL_INPUT_8,
+    es9_py_pb2.Channel.CHANNEL_INPUT_9, es9_py_pb2.Channel.CHANNEL_INPUT_10, es9_py_pb2.Channel.CHANNEL_INPUT_11, es9_py_pb2.Channel.CHANNEL_INPUT_12,
+    es9_py_pb2.Channel.CHANNEL_INPUT_13, es9_py_pb2.Channel.CHANNEL_INPUT_14,
+))
+
+ES9_OUTPUT_CHANNELS = frozenset((
+    es9_py_pb2.Channel.CHANNEL_OUTPUT_1, es9_py_pb2.Channel.CHANNEL_OUTPUT_2, es9_py_pb2.Channel.CHANNEL_OUTPUT_3, es9_py_pb2.Channel.CHANNEL_OUTPUT_4,
+    es9_py_pb2.Channel.CHANNEL_OUTPUT_5, es9_py_pb2.Channel.CHANNEL_OUTPUT_6, es9_py_pb2.Channel.CHANNEL_OUTPUT_7, es9_py_pb2.Channel.CHANNEL_OUTPUT_8,
+))
+
 def es9_channel_is_input(channel: es9_py_pb2.Channel) -> bool:
-    return channel in {
-        es9_py_pb2.Channel.CHANNEL_INPUT_1, es9_py_pb2.Channel.CHANNEL_INPUT_2, es9_py_pb2.Channel.CHANNEL_INPUT_3, es9_py_pb2.Channel.CHANNEL_INPUT_4,
-        es9_py_pb2.Channel.CHANNEL_INPUT_5, es9_py_pb2.Channel.CHANNEL_INPUT_6, es9_py_pb2.Channel.CHANNEL_INPUT_7, es9_py_pb2.Channel.CHANNEL_INPUT_8,
-        es9_py_pb2.Channel.CHANNEL_INPUT_9, es9_py_pb2.Channel.CHANNEL_INPUT_10, es9_py_pb2.Channel.CHANNEL_INPUT_11, es9_py_pb2.Channel.CHANNEL_INPUT_12,
-        es9_py_pb2.Channel.CHANNEL_INPUT_13, es9_py_pb2.Channel.CHANNEL_INPUT_14,
-    }
+    return channel in ES9_INPUT_CHANNELS
 
 def es9_channel_is_output(channel: es9_py_pb2.Channel) -> bool:
-    return channel in {
-        es9_py_pb2.Channel.CHANNEL_OUTPUT_1, es9_py_pb2.Channel.CHANNEL_OUTPUT_2, es9_py_pb2.Channel.CHANNEL_OUTPUT_3, es9_py_pb2.Channel.CHANNEL_OUTPUT_4,
-        es9_py_pb2.Channel.CHANNEL_OUTPUT_5, es9_py_pb2.Channel.CHANNEL_OUTPUT_6, es9_py_pb2.Channel.CHANNEL_OUTPUT_7, es9_py_pb2.Channel.CHANNEL_OUTPUT_8,
-    }
+    return channel in ES9_OUTPUT_CHANNELS
 
 def es9_channel_to_input_route_id(channel: es9_py_pb2.Channel) -> int:
     assert channel in MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL, "Channel must be valid to be routed to an input"
@@ -245,14 +264,16 @@ def es9_channel_is_mixer_input_routable(channel: es9_py_pb2.Channel) -> bool:
 
 def es9_parse_message_report(payload: bytes) -> str:
     assert len(payload) >= 1, "Invalid payload length for message report"
-    return payload[0: ].decode('ascii')
+    # the text is NUL terminated, as the configurator's slice(6, -2) shows
+    return str(payload, 'ascii').rstrip('\0')
 
 def es9_parse_version_string(payload: bytes) -> str:
     assert len(payload) == 6, "Invalid payload length for version string"
-    return payload.decode('ascii')
+    return str(payload, 'ascii')
 
 def es9_parse_usage(payload: bytes) -> es9_py_pb2.Usage:
-    assert len(payload) == 8, "Invalid payload length for usage report"
+    if len(payload) != 8:
+        raise ValueError(f"Invalid payload length for usage report: {len(payload)}")
     u0 = payload[0] << 7 | payload[1]
     u1 = payload[2] << 7 | payload[3]
     u2 = payload[4] << 7 | payload[5]
@@ -265,635 +286,378 @@ def es9_parse_usage(payload: bytes) -> es9_py_pb2.Usage:
     )
 
 def es9_parse_sample_rate_hz(payload: bytes) -> int:
-    assert len(payload) == 3, "Invalid payload length for sample rate report"
-    sample_rate = (payload[0] << 14) | (payload[1] << 7) | payload[2]
-    return sample_rate * 4
+    if len(payload) != 3:
+        raise ValueError(f"Invalid payload length for sample rate report: {len(payload)}")
+    return codec.decode_word(payload) * 4
+
+def es9_int16_from_storage_value(value: int) -> int:
+    value &= 0xFFFF          # keep only the lower 16 bits
+    if value & 0x8000:       # if sign bit is set
+        value -= 0x10000     # subtract 2^16 to sign-extend
+    return value
+
+def es9_int16_to_storage_value(value: int) -> int:
+    return round(value) & 0xFFFF
+
+def _es9_options_use_spdif_from_storage_value(value: int) -> bool:
+    # the firmware stores "use extra mixer block", i.e. the inverse of use_spdif
+    return not value
+
+def _es9_options_use_spdif_to_storage_value(use_spdif: bool) -> int:
+    return 0 if use_spdif else 1
+
+def _es9_input_route_id_or_none(channel: es9_py_pb2.Channel) -> int | None:
+    return MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL.get(channel)
+
+def _es9_output_route_id_or_none(channel: es9_py_pb2.Channel) -> int | None:
+    return MAP_ES9_OUTPUT_ROUTE_ID_BY_CHANNEL.get(channel)
+
+def _es9_filter_type_to_storage_index_or_none(filter_type: es9_py_pb2.FilterType) -> int | None:
+    if filter_type == es9_py_pb2.FilterType.FILTER_TYPE_UNSPECIFIED:
+        return None
+    return es9_filter_type_to_storage_index(filter_type)
+
+# Configuration dump layout
+#
+# Every decoded protobuf field is described by one entry:
+#   (field path, word offset, shift, mask, transform)
+# and its value is recovered as transform((data[word] >> shift) & mask)
+# where data is the dump payload unpacked into 21-bit words.
+CONFIGURATION_DUMP_HEADER_LENGTH = 2 # bytes preceding the packed words
+
+CONFIGURATION_DUMP_OFFSET_VERSION = 0
+CONFIGURATION_DUMP_OFFSET_HPF = 1
+CONFIGURATION_DUMP_OFFSET_ROUTE_IN = 2 # 4 DSP blocks x 8 channels
+CONFIGURATION_DUMP_OFFSET_ROUTE_OUT = 2 + 32 # 4 DSP blocks x 8 channels
+CONFIGURATION_DUMP_OFFSET_MIX = 2 + 32 + 32 # 16 mixes x 8 channels
+CONFIGURATION_DUMP_OFFSET_OPTIONS = 450
+CONFIGURATION_DUMP_OFFSET_LINKS = 451 # 2 words, low 16 bits then high 16 bits
+CONFIGURATION_DUMP_OFFSET_MIDI_CHANNELS = 453
+CONFIGURATION_DUMP_OFFSET_DC_OFFSET = 454 # 8 outputs
+CONFIGURATION_DUMP_OFFSET_FILTERS = 462 # 16 mixes x 4 filters x 4 words
+CONFIGURATION_DUMP_OFFSET_SMOOTHING = 718
+CONFIGURATION_DUMP_WORD_COUNT = 768 # the layout describes words 0-718, the rest are kept as reported
+
+# Mixer link field names in storage bit order (None marks unused bits)
+CONFIGURATION_DUMP_LINK_FIELDS = (
+    'link_channel_input_1_2', 'link_channel_input_3_4', 'link_channel_input_5_6', 'link_channel_input_7_8',
+    'link_channel_input_9_10', 'link_channel_input_11_12', 'link_channel_input_13_14', None,
+    'link_channel_bus_1_2', 'link_channel_bus_3_4', 'link_channel_bus_5_6', 'link_channel_bus_7_8',
+    'link_channel_bus_9_10', 'link_channel_bus_11_12', 'link_channel_bus_13_14', 'link_channel_bus_15_16',
+    'link_channel_usb_1_2', 'link_channel_usb_3_4', 'link_channel_usb_5_6', 'link_channel_usb_7_8',
+    'link_channel_usb_9_10', 'link_channel_usb_11_12', 'link_channel_usb_13_14', 'link_channel_usb_15_16',
+    'link_channel_mix_1_2', 'link_channel_mix_3_4', 'link_channel_mix_5_6', 'link_channel_mix_7_8',
+    'link_channel_mix_9_10', 'link_channel_mix_11_12', 'link_channel_mix_13_14', 'link_channel_mix_15_16',
+)
+
+def _build_link_by_input_route_id() -> dict[int, tuple[int, int, int]]:
+    # route ID -> (link bit, left route ID, right route ID) for every
+    # routable channel that belongs to a stereo link pair
+    links = {}
+    for bit, field in enumerate(CONFIGURATION_DUMP_LINK_FIELDS):
+        if field is None:
+            continue
+        group, left, right = field.removeprefix('link_channel_').split('_')
+        try:
+            pair = [es9_py_pb2.Channel.Value(f'CHANNEL_{group.upper()}_{n}') for n in (left, right)]
+        except ValueError:
+            continue
+        if all(channel in MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL for channel in pair):
+            left_id, right_id = (MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL[channel] for channel in pair)
+            links[left_id] = links[right_id] = (bit, left_id, right_id)
+    return links
+
+LINK_BY_INPUT_ROUTE_ID = _build_link_by_input_route_id()
+
+def es9_predict_input_routing(current: bytes, requested: bytes, link_mask: int) -> bytes:
+    """
+    The input route IDs of a DSP block after the firmware applies a
+    SetInputsMessage with routing requested to a block routed as current.
+    Linked channels land on an L/R pair of inputs, see routing.py.
+    """
+    result = bytearray(current)
+    for ch in range(8):
+        route_id = requested[ch]
+        link = LINK_BY_INPUT_ROUTE_ID.get(route_id)
+        if link is not None and link_mask >> link[0] & 0x01:
+            left = ch & ~0x01
+            result[left] = link[1]
+            result[left + 1] = link[2]
+        else:
+            result[ch] = route_id
+    return bytes(result)
+
+def es9_dsp_block_routing_field_path(dsp_block: int, ch: int, direction: str) -> tuple[str, str]:
+    """
+    Return the protobuf field path for a DSP block routing channel.
+    direction is either 'input' or 'output'.
+    DSP blocks 0 and 1 are USB channels 1-8 and 9-16,
+    DSP blocks 2 and 3 are Mixer 1 and Mixer 2.
+    """
+    assert 0 <= dsp_block <= 3, "DSP block out of range"
+    assert 0 <= ch <= 7, "Channel out of range"
+    if dsp_block < 2:
+        return ('usb_routing_configuration', f'{direction}{dsp_block*8 + ch + 1}_channel')
+    return (f'mixer{dsp_block - 1}_routing_configuration', f'{direction}{ch + 1}_channel')
+
+def es9_mix_crosspoint_field_path(mix_id: int, ch: int) -> tuple[str, str, str]:
+    """
+    Return the protobuf field path for a crosspoint level.
+    Mix ID 0-7 correspond to mixer 1 outputs 1-8,
+    Mix ID 8-15 correspond to mixer 2 outputs 1-8.
+    """
+    assert 0 <= mix_id <= 15, "Mix ID out of range"
+    assert 0 <= ch <= 7, "Channel out of range"
+    return (f'mixer{mix_id // 8 + 1}_crosspoint_configuration', f'output{mix_id % 8 + 1}_configuration', f'input{ch + 1}_level')
+
+def _build_configuration_dump_layout() -> list[tuple]:
+    layout = []
+    word = codec.WORD_MASK
+
+    layout.append((('version',), CONFIGURATION_DUMP_OFFSET_VERSION, 0, word, int))
+
+    for i, pair in enumerate(('1_2', '3_4', '5_6', '7_8', '9_10', '11_12', '13_14')):
+        layout.append((('high_pass_filter_configuration', f'channel_pair_{pair}_enabled'), CONFIGURATION_DUMP_OFFSET_HPF, i, 0x01, bool))
+
+    for dsp in range(4):
+        for ch in range(8):
+            layout.append((es9_dsp_block_routing_field_path(dsp, ch, 'input'), CONFIGURATION_DUMP_OFFSET_ROUTE_IN + dsp*8 + ch, 0, word, es9_try_recover_channel_from_input_route_id))
+    for dsp in range(4):
+        for ch in range(8):
+            layout.append((es9_dsp_block_routing_field_path(dsp, ch, 'output'), CONFIGURATION_DUMP_OFFSET_ROUTE_OUT + dsp*8 + ch, 0, word, es9_try_recover_channel_from_output_route_id))
+
+    for mix_id in range(16):
+        for ch in range(8):
+            layout.append((es9_mix_crosspoint_field_path(mix_id, ch), CONFIGURATION_DUMP_OFFSET_MIX + mix_id*8 + ch, 0, word, int))
+
+    layout.append((('options_configuration', 'use_spdif'), CONFIGURATION_DUMP_OFFSET_OPTIONS, 0, 0x01, _es9_options_use_spdif_from_storage_value))
+    layout.append((('options_configuration', 'use_midi_through'), CONFIGURATION_DUMP_OFFSET_OPTIONS, 1, 0x01, bool))
+
+    for bit, name in enumerate(CONFIGURATION_DUMP_LINK_FIELDS):
+        if name is not None:
+            layout.append((('mixer_links_configuration', name), CONFIGURATION_DUMP_OFFSET_LINKS + bit // 16, bit % 16, 0x01, bool))
+
+    layout.append((('midi_channels_configuration', 'usb_midi_channel'), CONFIGURATION_DUMP_OFFSET_MIDI_CHANNELS, 8, 0xFF, int))
+    layout.append((('midi_channels_configuration', 'din_midi_channel'), CONFIGURATION_DUMP_OFFSET_MIDI_CHANNELS, 0, 0xFF, int))
+
+    for ch in range(8):
+        layout.append((('output_dc_offset_configuration', f'output{ch + 1}_offset'), CONFIGURATION_DUMP_OFFSET_DC_OFFSET + ch, 0, 0xFFFF, es9_int16_from_storage_value))
+
+    for mix_id in range(16):
+        for f in range(4):
+            path = ('mix_input_filter_configuration', f'mix{mix_id + 1}_filter{f + 1}')
+            offset = CONFIGURATION_DUMP_OFFSET_FILTERS + (mix_id*4 + f) * 4
+            layout.append((path + ('enabled',), offset + 0, 0, 0x01, bool))
+            layout.append((path + ('filter_type',), offset + 0, 1, word >> 1, es9_filter_type_from_storage_index))
+            layout.append((path + ('frequency_hz',), offset + 1, 0, word, float))
+            layout.append((path + ('q_factor',), offset + 2, 0, word, float))
+            layout.append((path + ('gain',), offset + 3, 0, 0xFFFF, es9_int16_from_storage_value))
+
+    for mix_id in range(16):
+        layout.append((('mix_smoothing_configuration', f'mix{mix_id + 1}_enabled'), CONFIGURATION_DUMP_OFFSET_SMOOTHING, mix_id, 0x01, bool))
+
+    return layout
+
+CONFIGURATION_DUMP_LAYOUT = _build_configuration_dump_layout()
+
+# words the layout describes, a prefix of the CONFIGURATION_DUMP_WORD_COUNT dump words
+CONFIGURATION_DUMP_LAYOUT_WORD_COUNT = max(word for path, word, shift, mask, transform in CONFIGURATION_DUMP_LAYOUT) + 1
+
+def es9_compile_layout_decoder(layout: list[tuple], message_type, name: str):
+    """
+    Compile a layout table into a decoder function taking the unpacked words.
+
+    The table is turned into a single nested dict expression, so decoding is
+    one pass of straight-line code followed by one protobuf constructor call
+    rather than hundreds of individual attribute writes.
+    """
+    tree = {}
+    for path, word, shift, mask, transform in layout:
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = (word, shift, mask, transform)
+
+    namespace = {'_message_type': message_type}
+    transforms = {}
+
+    def value_expr(word: int, shift: int, mask: int, transform) -> str:
+        expr = f'data[{word}]'
+        if shift:
+            expr = f'({expr} >> {shift})'
+        if mask != codec.WORD_MASK:
+            expr = f'({expr} & {mask:#x})'
+        if transform is not int:
+            transform_name = transforms.setdefault(transform, f'_transform{len(transforms)}')
+            namespace[transform_name] = transform
+            expr = f'{transform_name}({expr})'
+        return expr
+
+    def message_expr(node: dict) -> str:
+        return '{' + ', '.join(
+            f'{key!r}: ' + (message_expr(value) if isinstance(value, dict) else value_expr(*value))
+            for key, value in node.items()
+        ) + '}'
+
+    source = f'def {name}(data):\n    return _message_type(**{message_expr(tree)})\n'
+    exec(source, namespace)
+    return namespace[name]
+
+_es9_decode_configuration_layout = es9_compile_layout_decoder(CONFIGURATION_DUMP_LAYOUT, es9_py_pb2.Configuration, '_es9_decode_configuration_layout')
+
+def es9_decode_configuration_words(data) -> es9_py_pb2.Configuration:
+    """
+    Decode unpacked configuration dump words into a Configuration protobuf
+    message, driven by CONFIGURATION_DUMP_LAYOUT.
+    """
+    assert len(data) >= CONFIGURATION_DUMP_WORD_COUNT, "Invalid word count for configuration dump"
+
+    return _es9_decode_configuration_layout(data)
 
 def es9_parse_configuration_dump(payload: bytes) -> es9_py_pb2.Configuration:
     """
     Parse an ES-9 configuration dump SysEx payload into a Configuration protobuf message.
     """
-    # Pack words back together from MIDI 7-bit bytes
-    data = [
-        (seg[0] << 14) | (seg[1] << 7) | seg[2]
-        for seg in zip(payload[2::3], payload[3::3], payload[4::3])
-    ]
-
-    config = es9_py_pb2.Configuration()
-    config.version = data[0]
-
-    hpf = data[1]
-    config.high_pass_filter_configuration.channel_pair_1_2_enabled = bool(hpf & 0x01)
-    config.high_pass_filter_configuration.channel_pair_3_4_enabled = bool(hpf & 0x02)
-    config.high_pass_filter_configuration.channel_pair_5_6_enabled = bool(hpf & 0x04)
-    config.high_pass_filter_configuration.channel_pair_7_8_enabled = bool(hpf & 0x08)
-    config.high_pass_filter_configuration.channel_pair_9_10_enabled = bool(hpf & 0x10)
-    config.high_pass_filter_configuration.channel_pair_11_12_enabled = bool(hpf & 0x20)
-    config.high_pass_filter_configuration.channel_pair_13_14_enabled = bool(hpf & 0x40)
-
-    # Route in
-    def route_in_value(dsp: int, ch: int) -> int:
-        offset = 2 # version, hpf
-        assert 0 <= dsp <= 3, "DSP block in of range"
-        assert 0 <= ch <= 7, "Channel in of range"
-        return data[offset + dsp*8 + ch]
-    
-    config.usb_routing_configuration.input1_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 0))
-    config.usb_routing_configuration.input2_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 1))
-    config.usb_routing_configuration.input3_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 2))
-    config.usb_routing_configuration.input4_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 3))
-    config.usb_routing_configuration.input5_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 4))
-    config.usb_routing_configuration.input6_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 5))
-    config.usb_routing_configuration.input7_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 6))
-    config.usb_routing_configuration.input8_channel = es9_try_recover_channel_from_input_route_id(route_in_value(0, 7))
-    config.usb_routing_configuration.input9_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 0))
-    config.usb_routing_configuration.input10_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 1))
-    config.usb_routing_configuration.input11_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 2))
-    config.usb_routing_configuration.input12_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 3))
-    config.usb_routing_configuration.input13_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 4))
-    config.usb_routing_configuration.input14_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 5))
-    config.usb_routing_configuration.input15_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 6))
-    config.usb_routing_configuration.input16_channel = es9_try_recover_channel_from_input_route_id(route_in_value(1, 7))
-
-    config.mixer1_routing_configuration.input1_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 0))
-    config.mixer1_routing_configuration.input2_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 1))
-    config.mixer1_routing_configuration.input3_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 2))
-    config.mixer1_routing_configuration.input4_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 3))
-    config.mixer1_routing_configuration.input5_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 4))
-    config.mixer1_routing_configuration.input6_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 5))
-    config.mixer1_routing_configuration.input7_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 6))
-    config.mixer1_routing_configuration.input8_channel = es9_try_recover_channel_from_input_route_id(route_in_value(2, 7))
-
-    config.mixer2_routing_configuration.input1_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 0))
-    config.mixer2_routing_configuration.input2_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 1))
-    config.mixer2_routing_configuration.input3_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 2))
-    config.mixer2_routing_configuration.input4_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 3))
-    config.mixer2_routing_configuration.input5_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 4))
-    config.mixer2_routing_configuration.input6_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 5))
-    config.mixer2_routing_configuration.input7_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 6))
-    config.mixer2_routing_configuration.input8_channel = es9_try_recover_channel_from_input_route_id(route_in_value(3, 7))
-
-    # Route out
-    def route_out_value(dsp: int, ch: int) -> int:
-        offset = 2 + 32 # version, hpf, route in (32 entries)
-        assert 0 <= dsp <= 3, "DSP block out of range"
-        assert 0 <= ch <= 7, "Channel out of range"
-        return data[offset + dsp*8 + ch]
-
-    config.usb_routing_configuration.output1_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 0))
-    config.usb_routing_configuration.output2_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 1))
-    config.usb_routing_configuration.output3_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 2))
-    config.usb_routing_configuration.output4_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 3))
-    config.usb_routing_configuration.output5_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 4))
-    config.usb_routing_configuration.output6_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 5))
-    config.usb_routing_configuration.output7_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 6))
-    config.usb_routing_configuration.output8_channel = es9_try_recover_channel_from_output_route_id(route_out_value(0, 7))
-    config.usb_routing_configuration.output9_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 0))
-    config.usb_routing_configuration.output10_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 1))
-    config.usb_routing_configuration.output11_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 2))
-    config.usb_routing_configuration.output12_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 3))
-    config.usb_routing_configuration.output13_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 4))
-    config.usb_routing_configuration.output14_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 5))
-    config.usb_routing_configuration.output15_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 6))
-    config.usb_routing_configuration.output16_channel = es9_try_recover_channel_from_output_route_id(route_out_value(1, 7))
-
-    config.mixer1_routing_configuration.output1_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 0))
-    config.mixer1_routing_configuration.output2_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 1))
-    config.mixer1_routing_configuration.output3_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 2))
-    config.mixer1_routing_configuration.output4_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 3))
-    config.mixer1_routing_configuration.output5_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 4))
-    config.mixer1_routing_configuration.output6_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 5))
-    config.mixer1_routing_configuration.output7_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 6))
-    config.mixer1_routing_configuration.output8_channel = es9_try_recover_channel_from_output_route_id(route_out_value(2, 7))
-
-    config.mixer2_routing_configuration.output1_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 0))
-    config.mixer2_routing_configuration.output2_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 1))
-    config.mixer2_routing_configuration.output3_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 2))
-    config.mixer2_routing_configuration.output4_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 3))
-    config.mixer2_routing_configuration.output5_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 4))
-    config.mixer2_routing_configuration.output6_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 5))
-    config.mixer2_routing_configuration.output7_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 6))
-    config.mixer2_routing_configuration.output8_channel = es9_try_recover_channel_from_output_route_id(route_out_value(3, 7))
-
-    # Mix
-    def extract_mix_value_from_config_dump(mix_id: int, ch: int) -> int:
-        offset = 2 + 32 + 32 # version, hpf, route in (32), route out (32)s
-        assert 0 <= mix_id <= 15, "Mix ID out of range"
-        assert 0 <= ch <= 7, "Channel out of range"
-        return data[offset + mix_id*8 + ch]
-
-    config.mixer1_crosspoint_configuration.output1_configuration.input1_level = extract_mix_value_from_config_dump(0, 0)
-    config.mixer1_crosspoint_configuration.output1_configuration.input2_level = extract_mix_value_from_config_dump(0, 1)
-    config.mixer1_crosspoint_configuration.output1_configuration.input3_level = extract_mix_value_from_config_dump(0, 2)
-    config.mixer1_crosspoint_configuration.output1_configuration.input4_level = extract_mix_value_from_config_dump(0, 3)
-    config.mixer1_crosspoint_configuration.output1_configuration.input5_level = extract_mix_value_from_config_dump(0, 4)
-    config.mixer1_crosspoint_configuration.output1_configuration.input6_level = extract_mix_value_from_config_dump(0, 5)
-    config.mixer1_crosspoint_configuration.output1_configuration.input7_level = extract_mix_value_from_config_dump(0, 6)
-    config.mixer1_crosspoint_configuration.output1_configuration.input8_level = extract_mix_value_from_config_dump(0, 7)
-
-    config.mixer1_crosspoint_configuration.output2_configuration.input1_level = extract_mix_value_from_config_dump(1, 0)
-    config.mixer1_crosspoint_configuration.output2_configuration.input2_level = extract_mix_value_from_config_dump(1, 1)
-    config.mixer1_crosspoint_configuration.output2_configuration.input3_level = extract_mix_value_from_config_dump(1, 2)
-    config.mixer1_crosspoint_configuration.output2_configuration.input4_level = extract_mix_value_from_config_dump(1, 3)
-    config.mixer1_crosspoint_configuration.output2_configuration.input5_level = extract_mix_value_from_config_dump(1, 4)
-    config.mixer1_crosspoint_configuration.output2_configuration.input6_level = extract_mix_value_from_config_dump(1, 5)
-    config.mixer1_crosspoint_configuration.output2_configuration.input7_level = extract_mix_value_from_config_dump(1, 6)
-    config.mixer1_crosspoint_configuration.output2_configuration.input8_level = extract_mix_value_from_config_dump(1, 7)
-
-    config.mixer1_crosspoint_configuration.output3_configuration.input1_level = extract_mix_value_from_config_dump(2, 0)
-    config.mixer1_crosspoint_configuration.output3_configuration.input2_level = extract_mix_value_from_config_dump(2, 1)
-    config.mixer1_crosspoint_configuration.output3_configuration.input3_level = extract_mix_value_from_config_dump(2, 2)
-    config.mixer1_crosspoint_configuration.output3_configuration.input4_level = extract_mix_value_from_config_dump(2, 3)
-    config.mixer1_crosspoint_configuration.output3_configuration.input5_level = extract_mix_value_from_config_dump(2, 4)
-    config.mixer1_crosspoint_configuration.output3_configuration.input6_level = extract_mix_value_from_config_dump(2, 5)
-    config.mixer1_crosspoint_configuration.output3_configuration.input7_level = extract_mix_value_from_config_dump(2, 6)
-    config.mixer1_crosspoint_configuration.output3_configuration.input8_level = extract_mix_value_from_config_dump(2, 7)
-
-    config.mixer1_crosspoint_configuration.output4_configuration.input1_level = extract_mix_value_from_config_dump(3, 0)
-    config.mixer1_crosspoint_configuration.output4_configuration.input2_level = extract_mix_value_from_config_dump(3, 1)
-    config.mixer1_crosspoint_configuration.output4_configuration.input3_level = extract_mix_value_from_config_dump(3, 2)
-    config.mixer1_crosspoint_configuration.output4_configuration.input4_level = extract_mix_value_from_config_dump(3, 3)
-    config.mixer1_crosspoint_configuration.output4_configuration.input5_level = extract_mix_value_from_config_dump(3, 4)
-    config.mixer1_crosspoint_configuration.output4_configuration.input6_level = extract_mix_value_from_config_dump(3, 5)
-    config.mixer1_crosspoint_configuration.output4_configuration.input7_level = extract_mix_value_from_config_dump(3, 6)
-    config.mixer1_crosspoint_configuration.output4_configuration.input8_level = extract_mix_value_from_config_dump(3, 7)
-
-    config.mixer1_crosspoint_configuration.output5_configuration.input1_level = extract_mix_value_from_config_dump(4, 0)
-    config.mixer1_crosspoint_configuration.output5_configuration.input2_level = extract_mix_value_from_config_dump(4, 1)
-    config.mixer1_crosspoint_configuration.output5_configuration.input3_level = extract_mix_value_from_config_dump(4, 2)
-    config.mixer1_crosspoint_configuration.output5_configuration.input4_level = extract_mix_value_from_config_dump(4, 3)
-    config.mixer1_crosspoint_configuration.output5_configuration.input5_level = extract_mix_value_from_config_dump(4, 4)
-    config.mixer1_crosspoint_configuration.output5_configuration.input6_level = extract_mix_value_from_config_dump(4, 5)
-    config.mixer1_crosspoint_configuration.output5_configuration.input7_level = extract_mix_value_from_config_dump(4, 6)
-    config.mixer1_crosspoint_configuration.output5_configuration.input8_level = extract_mix_value_from_config_dump(4, 7)
-
-    config.mixer1_crosspoint_configuration.output6_configuration.input1_level = extract_mix_value_from_config_dump(5, 0)
-    config.mixer1_crosspoint_configuration.output6_configuration.input2_level = extract_mix_value_from_config_dump(5, 1)
-    config.mixer1_crosspoint_configuration.output6_configuration.input3_level = extract_mix_value_from_config_dump(5, 2)
-    config.mixer1_crosspoint_configuration.output6_configuration.input4_level = extract_mix_value_from_config_dump(5, 3)
-    config.mixer1_crosspoint_configuration.output6_configuration.input5_level = extract_mix_value_from_config_dump(5, 4)
-    config.mixer1_crosspoint_configuration.output6_configuration.input6_level = extract_mix_value_from_config_dump(5, 5)
-    config.mixer1_crosspoint_configuration.output6_configuration.input7_level = extract_mix_value_from_config_dump(5, 6)
-    config.mixer1_crosspoint_configuration.output6_configuration.input8_level = extract_mix_value_from_config_dump(5, 7)
-
-    config.mixer1_crosspoint_configuration.output7_configuration.input1_level = extract_mix_value_from_config_dump(6, 0)
-    config.mixer1_crosspoint_configuration.output7_configuration.input2_level = extract_mix_value_from_config_dump(6, 1)
-    config.mixer1_crosspoint_configuration.output7_configuration.input3_level = extract_mix_value_from_config_dump(6, 2)
-    config.mixer1_crosspoint_configuration.output7_configuration.input4_level = extract_mix_value_from_config_dump(6, 3)
-    config.mixer1_crosspoint_configuration.output7_configuration.input5_level = extract_mix_value_from_config_dump(6, 4)
-    config.mixer1_crosspoint_configuration.output7_configuration.input6_level = extract_mix_value_from_config_dump(6, 5)
-    config.mixer1_crosspoint_configuration.output7_configuration.input7_level = extract_mix_value_from_config_dump(6, 6)
-    config.mixer1_crosspoint_configuration.output7_configuration.input8_level = extract_mix_value_from_config_dump(6, 7)
-
-    config.mixer1_crosspoint_configuration.output8_configuration.input1_level = extract_mix_value_from_config_dump(7, 0)
-    config.mixer1_crosspoint_configuration.output8_configuration.input2_level = extract_mix_value_from_config_dump(7, 1)
-    config.mixer1_crosspoint_configuration.output8_configuration.input3_level = extract_mix_value_from_config_dump(7, 2)
-    config.mixer1_crosspoint_configuration.output8_configuration.input4_level = extract_mix_value_from_config_dump(7, 3)
-    config.mixer1_crosspoint_configuration.output8_configuration.input5_level = extract_mix_value_from_config_dump(7, 4)
-    config.mixer1_crosspoint_configuration.output8_configuration.input6_level = extract_mix_value_from_config_dump(7, 5)
-    config.mixer1_crosspoint_configuration.output8_configuration.input7_level = extract_mix_value_from_config_dump(7, 6)
-    config.mixer1_crosspoint_configuration.output8_configuration.input8_level = extract_mix_value_from_config_dump(7, 7)
-
-    config.mixer2_crosspoint_configuration.output1_configuration.input1_level = extract_mix_value_from_config_dump(8, 0)
-    config.mixer2_crosspoint_configuration.output1_configuration.input2_level = extract_mix_value_from_config_dump(8, 1)
-    config.mixer2_crosspoint_configuration.output1_configuration.input3_level = extract_mix_value_from_config_dump(8, 2)
-    config.mixer2_crosspoint_configuration.output1_configuration.input4_level = extract_mix_value_from_config_dump(8, 3)
-    config.mixer2_crosspoint_configuration.output1_configuration.input5_level = extract_mix_value_from_config_dump(8, 4)
-    config.mixer2_crosspoint_configuration.output1_configuration.input6_level = extract_mix_value_from_config_dump(8, 5)
-    config.mixer2_crosspoint_configuration.output1_configuration.input7_level = extract_mix_value_from_config_dump(8, 6)
-    config.mixer2_crosspoint_configuration.output1_configuration.input8_level = extract_mix_value_from_config_dump(8, 7)
-
-    config.mixer2_crosspoint_configuration.output2_configuration.input1_level = extract_mix_value_from_config_dump(9, 0)
-    config.mixer2_crosspoint_configuration.output2_configuration.input2_level = extract_mix_value_from_config_dump(9, 1)
-    config.mixer2_crosspoint_configuration.output2_configuration.input3_level = extract_mix_value_from_config_dump(9, 2)
-    config.mixer2_crosspoint_configuration.output2_configuration.input4_level = extract_mix_value_from_config_dump(9, 3)
-    config.mixer2_crosspoint_configuration.output2_configuration.input5_level = extract_mix_value_from_config_dump(9, 4)
-    config.mixer2_crosspoint_configuration.output2_configuration.input6_level = extract_mix_value_from_config_dump(9, 5)
-    config.mixer2_crosspoint_configuration.output2_configuration.input7_level = extract_mix_value_from_config_dump(9, 6)
-    config.mixer2_crosspoint_configuration.output2_configuration.input8_level = extract_mix_value_from_config_dump(9, 7)
-
-    config.mixer2_crosspoint_configuration.output3_configuration.input1_level = extract_mix_value_from_config_dump(10, 0)
-    config.mixer2_crosspoint_configuration.output3_configuration.input2_level = extract_mix_value_from_config_dump(10, 1)
-    config.mixer2_crosspoint_configuration.output3_configuration.input3_level = extract_mix_value_from_config_dump(10, 2)
-    config.mixer2_crosspoint_configuration.output3_configuration.input4_level = extract_mix_value_from_config_dump(10, 3)
-    config.mixer2_crosspoint_configuration.output3_configuration.input5_level = extract_mix_value_from_config_dump(10, 4)
-    config.mixer2_crosspoint_configuration.output3_configuration.input6_level = extract_mix_value_from_config_dump(10, 5)
-    config.mixer2_crosspoint_configuration.output3_configuration.input7_level = extract_mix_value_from_config_dump(10, 6)
-    config.mixer2_crosspoint_configuration.output3_configuration.input8_level = extract_mix_value_from_config_dump(10, 7)
-
-    config.mixer2_crosspoint_configuration.output4_configuration.input1_level = extract_mix_value_from_config_dump(11, 0)
-    config.mixer2_crosspoint_configuration.output4_configuration.input2_level = extract_mix_value_from_config_dump(11, 1)
-    config.mixer2_crosspoint_configuration.output4_configuration.input3_level = extract_mix_value_from_config_dump(11, 2)
-    config.mixer2_crosspoint_configuration.output4_configuration.input4_level = extract_mix_value_from_config_dump(11, 3)
-    config.mixer2_crosspoint_configuration.output4_configuration.input5_level = extract_mix_value_from_config_dump(11, 4)
-    config.mixer2_crosspoint_configuration.output4_configuration.input6_level = extract_mix_value_from_config_dump(11, 5)
-    config.mixer2_crosspoint_configuration.output4_configuration.input7_level = extract_mix_value_from_config_dump(11, 6)
-    config.mixer2_crosspoint_configuration.output4_configuration.input8_level = extract_mix_value_from_config_dump(11, 7)
-
-    config.mixer2_crosspoint_configuration.output5_configuration.input1_level = extract_mix_value_from_config_dump(12, 0)
-    config.mixer2_crosspoint_configuration.output5_configuration.input2_level = extract_mix_value_from_config_dump(12, 1)
-    config.mixer2_crosspoint_configuration.output5_configuration.input3_level = extract_mix_value_from_config_dump(12, 2)
-    config.mixer2_crosspoint_configuration.output5_configuration.input4_level = extract_mix_value_from_config_dump(12, 3)
-    config.mixer2_crosspoint_configuration.output5_configuration.input5_level = extract_mix_value_from_config_dump(12, 4)
-    config.mixer2_crosspoint_configuration.output5_configuration.input6_level = extract_mix_value_from_config_dump(12, 5)
-    config.mixer2_crosspoint_configuration.output5_configuration.input7_level = extract_mix_value_from_config_dump(12, 6)
-    config.mixer2_crosspoint_configuration.output5_configuration.input8_level = extract_mix_value_from_config_dump(12, 7)
-
-    config.mixer2_crosspoint_configuration.output6_configuration.input1_level = extract_mix_value_from_config_dump(13, 0)
-    config.mixer2_crosspoint_configuration.output6_configuration.input2_level = extract_mix_value_from_config_dump(13, 1)
-    config.mixer2_crosspoint_configuration.output6_configuration.input3_level = extract_mix_value_from_config_dump(13, 2)
-    config.mixer2_crosspoint_configuration.output6_configuration.input4_level = extract_mix_value_from_config_dump(13, 3)
-    config.mixer2_crosspoint_configuration.output6_configuration.input5_level = extract_mix_value_from_config_dump(13, 4)
-    config.mixer2_crosspoint_configuration.output6_configuration.input6_level = extract_mix_value_from_config_dump(13, 5)
-    config.mixer2_crosspoint_configuration.output6_configuration.input7_level = extract_mix_value_from_config_dump(13, 6)
-    config.mixer2_crosspoint_configuration.output6_configuration.input8_level = extract_mix_value_from_config_dump(13, 7)
-
-    config.mixer2_crosspoint_configuration.output7_configuration.input1_level = extract_mix_value_from_config_dump(14, 0)
-    config.mixer2_crosspoint_configuration.output7_configuration.input2_level = extract_mix_value_from_config_dump(14, 1)
-    config.mixer2_crosspoint_configuration.output7_configuration.input3_level = extract_mix_value_from_config_dump(14, 2)
-    config.mixer2_crosspoint_configuration.output7_configuration.input4_level = extract_mix_value_from_config_dump(14, 3)
-    config.mixer2_crosspoint_configuration.output7_configuration.input5_level = extract_mix_value_from_config_dump(14, 4)
-    config.mixer2_crosspoint_configuration.output7_configuration.input6_level = extract_mix_value_from_config_dump(14, 5)
-    config.mixer2_crosspoint_configuration.output7_configuration.input7_level = extract_mix_value_from_config_dump(14, 6)
-    config.mixer2_crosspoint_configuration.output7_configuration.input8_level = extract_mix_value_from_config_dump(14, 7)
-
-    config.mixer2_crosspoint_configuration.output8_configuration.input1_level = extract_mix_value_from_config_dump(15, 0)
-    config.mixer2_crosspoint_configuration.output8_configuration.input2_level = extract_mix_value_from_config_dump(15, 1)
-    config.mixer2_crosspoint_configuration.output8_configuration.input3_level = extract_mix_value_from_config_dump(15, 2)
-    config.mixer2_crosspoint_configuration.output8_configuration.input4_level = extract_mix_value_from_config_dump(15, 3)
-    config.mixer2_crosspoint_configuration.output8_configuration.input5_level = extract_mix_value_from_config_dump(15, 4)
-    config.mixer2_crosspoint_configuration.output8_configuration.input6_level = extract_mix_value_from_config_dump(15, 5)
-    config.mixer2_crosspoint_configuration.output8_configuration.input7_level = extract_mix_value_from_config_dump(15, 6)
-    config.mixer2_crosspoint_configuration.output8_configuration.input8_level = extract_mix_value_from_config_dump(15, 7)
-
-    # Options
-    opt = data[450]
-    config.options_configuration.use_spdif = not bool(opt & 0x01)
-    config.options_configuration.use_midi_through = bool(opt & 0x02)
-
-    # Links
-    links = (data[452] << 16) | data[451]
-    config.mixer_links_configuration.link_channel_input_1_2 = bool(links >> 0 & 0x01)
-    config.mixer_links_configuration.link_channel_input_3_4 = bool(links >> 1 & 0x01)
-    config.mixer_links_configuration.link_channel_input_5_6 = bool(links >> 2 & 0x01)
-    config.mixer_links_configuration.link_channel_input_7_8 = bool(links >> 3 & 0x01)
-    config.mixer_links_configuration.link_channel_input_9_10 = bool(links >> 4 & 0x01)
-    config.mixer_links_configuration.link_channel_input_11_12 = bool(links >> 5 & 0x01)
-    config.mixer_links_configuration.link_channel_input_13_14 = bool(links >> 6 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_1_2 = bool(links >> 8 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_3_4 = bool(links >> 9 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_5_6 = bool(links >> 10 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_7_8 = bool(links >> 11 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_9_10 = bool(links >> 12 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_11_12 = bool(links >> 13 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_13_14 = bool(links >> 14 & 0x01)
-    config.mixer_links_configuration.link_channel_bus_15_16 = bool(links >> 15 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_1_2 = bool(links >> 16 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_3_4 = bool(links >> 17 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_5_6 = bool(links >> 18 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_7_8 = bool(links >> 19 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_9_10 = bool(links >> 20 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_11_12 = bool(links >> 21 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_13_14 = bool(links >> 22 & 0x01)
-    config.mixer_links_configuration.link_channel_usb_15_16 = bool(links >> 23 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_1_2 = bool(links >> 24 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_3_4 = bool(links >> 25 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_5_6 = bool(links >> 26 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_7_8 = bool(links >> 27 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_9_10 = bool(links >> 28 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_11_12 = bool(links >> 29 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_13_14 = bool(links >> 30 & 0x01)
-    config.mixer_links_configuration.link_channel_mix_15_16 = bool(links >> 31 & 0x01)
-
-    # MIDI Channels
-    channels = data[453]
-    config.midi_channels_configuration.usb_midi_channel = (channels >> 8) & 0xFF
-    config.midi_channels_configuration.din_midi_channel = channels & 0xFF
-
-    # DC Offsets
-    def to_int16(v):
-        v &= 0xFFFF          # keep only the lower 16 bits
-        if v & 0x8000:       # if sign bit is set
-            v -= 0x10000     # subtract 2^16 to sign-extend
-        return v
-
-    config.output_dc_offset_configuration.output1_offset = to_int16(data[454])
-    config.output_dc_offset_configuration.output2_offset = to_int16(data[455])
-    config.output_dc_offset_configuration.output3_offset = to_int16(data[456])
-    config.output_dc_offset_configuration.output4_offset = to_int16(data[457])
-    config.output_dc_offset_configuration.output5_offset = to_int16(data[458])
-    config.output_dc_offset_configuration.output6_offset = to_int16(data[459])
-    config.output_dc_offset_configuration.output7_offset = to_int16(data[460])
-    config.output_dc_offset_configuration.output8_offset = to_int16(data[461])
-
-    # Filters
-    def get_filter_config(mix_idx: int, filter_idx: int, cursor: int) -> es9_py_pb2.Configuration.MixInputFilterConfiguration.FilterConfiguration:
-        def to_int16(v):
-            v &= 0xFFFF          # keep only the lower 16 bits
-            if v & 0x8000:       # if sign bit is set
-                v -= 0x10000     # subtract 2^16 to sign-extend
-            return v
-        
-        filter_config = es9_py_pb2.Configuration.MixInputFilterConfiguration.FilterConfiguration()
-        offset = cursor + (mix_idx * 4 + filter_idx) * 4
-        type_byte = data[offset + 0]
-
-        filter_config.enabled = es9_filter_enabled_from_storage_value(type_byte)
-        filter_config.filter_type = es9_filter_type_from_storage_value(type_byte)
-        filter_config.frequency_hz = data[offset + 1]
-        filter_config.q_factor = data[offset + 2]
-        filter_config.gain = to_int16(data[offset + 3])
-
-        return filter_config
-
-    filter_cursor_base = 462
-
-    config.mix_input_filter_configuration.mix1_filter1.CopyFrom(get_filter_config(0, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix1_filter2.CopyFrom(get_filter_config(0, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix1_filter3.CopyFrom(get_filter_config(0, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix1_filter4.CopyFrom(get_filter_config(0, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix2_filter1.CopyFrom(get_filter_config(1, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix2_filter2.CopyFrom(get_filter_config(1, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix2_filter3.CopyFrom(get_filter_config(1, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix2_filter4.CopyFrom(get_filter_config(1, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix3_filter1.CopyFrom(get_filter_config(2, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix3_filter2.CopyFrom(get_filter_config(2, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix3_filter3.CopyFrom(get_filter_config(2, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix3_filter4.CopyFrom(get_filter_config(2, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix4_filter1.CopyFrom(get_filter_config(3, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix4_filter2.CopyFrom(get_filter_config(3, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix4_filter3.CopyFrom(get_filter_config(3, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix4_filter4.CopyFrom(get_filter_config(3, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix5_filter1.CopyFrom(get_filter_config(4, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix5_filter2.CopyFrom(get_filter_config(4, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix5_filter3.CopyFrom(get_filter_config(4, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix5_filter4.CopyFrom(get_filter_config(4, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix6_filter1.CopyFrom(get_filter_config(5, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix6_filter2.CopyFrom(get_filter_config(5, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix6_filter3.CopyFrom(get_filter_config(5, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix6_filter4.CopyFrom(get_filter_config(5, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix7_filter1.CopyFrom(get_filter_config(6, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix7_filter2.CopyFrom(get_filter_config(6, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix7_filter3.CopyFrom(get_filter_config(6, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix7_filter4.CopyFrom(get_filter_config(6, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix8_filter1.CopyFrom(get_filter_config(7, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix8_filter2.CopyFrom(get_filter_config(7, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix8_filter3.CopyFrom(get_filter_config(7, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix8_filter4.CopyFrom(get_filter_config(7, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix9_filter1.CopyFrom(get_filter_config(8, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix9_filter2.CopyFrom(get_filter_config(8, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix9_filter3.CopyFrom(get_filter_config(8, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix9_filter4.CopyFrom(get_filter_config(8, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix10_filter1.CopyFrom(get_filter_config(9, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix10_filter2.CopyFrom(get_filter_config(9, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix10_filter3.CopyFrom(get_filter_config(9, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix10_filter4.CopyFrom(get_filter_config(9, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix11_filter1.CopyFrom(get_filter_config(10, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix11_filter2.CopyFrom(get_filter_config(10, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix11_filter3.CopyFrom(get_filter_config(10, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix11_filter4.CopyFrom(get_filter_config(10, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix12_filter1.CopyFrom(get_filter_config(11, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix12_filter2.CopyFrom(get_filter_config(11, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix12_filter3.CopyFrom(get_filter_config(11, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix12_filter4.CopyFrom(get_filter_config(11, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix13_filter1.CopyFrom(get_filter_config(12, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix13_filter2.CopyFrom(get_filter_config(12, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix13_filter3.CopyFrom(get_filter_config(12, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix13_filter4.CopyFrom(get_filter_config(12, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix14_filter1.CopyFrom(get_filter_config(13, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix14_filter2.CopyFrom(get_filter_config(13, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix14_filter3.CopyFrom(get_filter_config(13, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix14_filter4.CopyFrom(get_filter_config(13, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix15_filter1.CopyFrom(get_filter_config(14, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix15_filter2.CopyFrom(get_filter_config(14, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix15_filter3.CopyFrom(get_filter_config(14, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix15_filter4.CopyFrom(get_filter_config(14, 3, filter_cursor_base))
-
-    config.mix_input_filter_configuration.mix16_filter1.CopyFrom(get_filter_config(15, 0, filter_cursor_base))
-    config.mix_input_filter_configuration.mix16_filter2.CopyFrom(get_filter_config(15, 1, filter_cursor_base))
-    config.mix_input_filter_configuration.mix16_filter3.CopyFrom(get_filter_config(15, 2, filter_cursor_base))
-    config.mix_input_filter_configuration.mix16_filter4.CopyFrom(get_filter_config(15, 3, filter_cursor_base))
-
-    # Smoothing
-    smoothing = data[718]
-    config.mix_smoothing_configuration.mix1_enabled = bool(smoothing & 0x01)
-    config.mix_smoothing_configuration.mix2_enabled = bool(smoothing & 0x02)
-    config.mix_smoothing_configuration.mix3_enabled = bool(smoothing & 0x04)
-    config.mix_smoothing_configuration.mix4_enabled = bool(smoothing & 0x08)
-    config.mix_smoothing_configuration.mix5_enabled = bool(smoothing & 0x10)
-    config.mix_smoothing_configuration.mix6_enabled = bool(smoothing & 0x20)
-    config.mix_smoothing_configuration.mix7_enabled = bool(smoothing & 0x40)
-    config.mix_smoothing_configuration.mix8_enabled = bool(smoothing & 0x80)
-    config.mix_smoothing_configuration.mix9_enabled = bool(smoothing & 0x100)
-    config.mix_smoothing_configuration.mix10_enabled = bool(smoothing & 0x200)
-    config.mix_smoothing_configuration.mix11_enabled = bool(smoothing & 0x400)
-    config.mix_smoothing_configuration.mix12_enabled = bool(smoothing & 0x800)
-    config.mix_smoothing_configuration.mix13_enabled = bool(smoothing & 0x1000)
-    config.mix_smoothing_configuration.mix14_enabled = bool(smoothing & 0x2000)
-    config.mix_smoothing_configuration.mix15_enabled = bool(smoothing & 0x4000)
-    config.mix_smoothing_configuration.mix16_enabled = bool(smoothing & 0x8000)
-
-    return config
+    return es9_decode_configuration_words(codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:]))
+
+# Inverse of each layout transform, mapping a protobuf field value back to
+# its storage value. None means the value has no storage representation
+# (e.g. CHANNEL_UNSPECIFIED or FILTER_TYPE_UNSPECIFIED, as in a partial
+# Configuration) and the existing bits are kept.
+CONFIGURATION_DUMP_INVERSE_TRANSFORMS = {
+    int: int,
+    bool: int,
+    float: round,
+    es9_int16_from_storage_value: es9_int16_to_storage_value,
+    es9_filter_type_from_storage_index: _es9_filter_type_to_storage_index_or_none,
+    es9_try_recover_channel_from_input_route_id: _es9_input_route_id_or_none,
+    es9_try_recover_channel_from_output_route_id: _es9_output_route_id_or_none,
+    _es9_options_use_spdif_from_storage_value: _es9_options_use_spdif_to_storage_value,
+}
+
+def es9_encode_configuration_words(config: es9_py_pb2.Configuration, base=None) -> array:
+    """
+    Encode a Configuration protobuf message into configuration dump words,
+    the exact inverse of es9_decode_configuration_words.
+
+    Words not described by CONFIGURATION_DUMP_LAYOUT, and the fields of a
+    partial Configuration that are unset (sub-messages that are not set,
+    a zero version, UNSPECIFIED channels and filter types), are taken from base (e.g. the
+    words of the current device dump), or zero when base is None.
+    """
+    if base is None:
+        words = array('I', [0]) * CONFIGURATION_DUMP_WORD_COUNT
+    else:
+        assert len(base) >= CONFIGURATION_DUMP_WORD_COUNT, "Invalid word count for configuration dump"
+        words = array('I', base)
+
+    for path, word, shift, mask, transform in CONFIGURATION_DUMP_LAYOUT:
+        value = config
+        for field in path[:-1]:
+            if not value.HasField(field):
+                value = None
+                break
+            value = getattr(value, field)
+        if value is None:
+            continue # section not set in a partial Configuration
+        value = getattr(value, path[-1])
+        if len(path) == 1 and not value:
+            continue # top-level scalars (the dump version) are never 0 on a device
+        value = CONFIGURATION_DUMP_INVERSE_TRANSFORMS[transform](value)
+        if value is None:
+            continue
+        words[word] = (words[word] & ~(mask << shift)) | ((value & mask) << shift)
+
+    return words
+
+def es9_encode_configuration_dump(config: es9_py_pb2.Configuration, base=None, header: bytes = bytes(CONFIGURATION_DUMP_HEADER_LENGTH)) -> bytes:
+    """
+    Encode a Configuration protobuf message into a configuration dump
+    SysEx payload, as accepted by es9_parse_configuration_dump.
+    """
+    assert len(header) == CONFIGURATION_DUMP_HEADER_LENGTH, "Invalid configuration dump header length"
+    words = es9_encode_configuration_words(config, base)
+    payload = bytearray(CONFIGURATION_DUMP_HEADER_LENGTH + len(words) * codec.WORD_SIZE)
+    payload[:CONFIGURATION_DUMP_HEADER_LENGTH] = header
+    codec.encode_words_into(payload, words, CONFIGURATION_DUMP_HEADER_LENGTH)
+    return bytes(payload)
+
+# Mix dump layout
+#
+# The mix dump carries the 128 crosspoint levels as packed words, followed by
+# one raw byte each for vmix and vpan of the 16 mixes. Both parts are unpacked
+# into a single word array so that the same layout machinery applies.
+MIX_DUMP_CROSSPOINT_COUNT = 128
+MIX_DUMP_OFFSET_VIRTUAL = 128 # 16 mixes x (vmix, vpan)
+MIX_DUMP_WORD_COUNT = 128 + 32
+
+def _build_mix_dump_layout() -> list[tuple]:
+    layout = []
+    word = codec.WORD_MASK
+
+    for mix_id in range(16):
+        for ch in range(8):
+            layout.append((es9_mix_crosspoint_field_path(mix_id, ch), mix_id*8 + ch, 0, word, int))
+
+    for mix_id in range(16):
+        layout.append(((f'mix{mix_id + 1}_vconf', 'vmix'), MIX_DUMP_OFFSET_VIRTUAL + mix_id*2 + 0, 0, word, int))
+        layout.append(((f'mix{mix_id + 1}_vconf', 'vpan'), MIX_DUMP_OFFSET_VIRTUAL + mix_id*2 + 1, 0, word, int))
+
+    return layout
+
+MIX_DUMP_LAYOUT = _build_mix_dump_layout()
+
+_es9_decode_mix_layout = es9_compile_layout_decoder(MIX_DUMP_LAYOUT, es9_py_pb2.MixConfiguration, '_es9_decode_mix_layout')
+
+def es9_unpack_mix_dump_words(payload: bytes) -> array:
+    """
+    Unpack a mix dump SysEx payload into MIX_DUMP_WORD_COUNT words.
+    """
+    crosspoint_length = MIX_DUMP_CROSSPOINT_COUNT * codec.WORD_SIZE
+    assert len(payload) >= crosspoint_length + 32, "Invalid payload length for mix dump"
+    view = memoryview(payload)
+    words = codec.decode_words(view[:crosspoint_length])
+    words.extend(view[crosspoint_length:crosspoint_length + 32])
+    return words
+
+def es9_decode_mix_words(data) -> es9_py_pb2.MixConfiguration:
+    """
+    Decode unpacked mix dump words into a MixConfiguration protobuf
+    message, driven by MIX_DUMP_LAYOUT.
+    """
+    assert len(data) >= MIX_DUMP_WORD_COUNT, "Invalid word count for mix dump"
+    return _es9_decode_mix_layout(data)
 
 def es9_parse_mix_dump(data: bytes) -> es9_py_pb2.MixConfiguration:
-    raw_mix = [
-        (seg[0] << 14) | (seg[1] << 7) | seg[2]
-        for seg in zip(data[0::3], data[1::3], data[2::3])
-    ]
-
-    config = es9_py_pb2.MixConfiguration()
-
-    config.mixer1_crosspoint_configuration.output1_configuration.input1_level = raw_mix[0]
-    config.mixer1_crosspoint_configuration.output1_configuration.input2_level = raw_mix[1]
-    config.mixer1_crosspoint_configuration.output1_configuration.input3_level = raw_mix[2]
-    config.mixer1_crosspoint_configuration.output1_configuration.input4_level = raw_mix[3]
-    config.mixer1_crosspoint_configuration.output1_configuration.input5_level = raw_mix[4]
-    config.mixer1_crosspoint_configuration.output1_configuration.input6_level = raw_mix[5]
-    config.mixer1_crosspoint_configuration.output1_configuration.input7_level = raw_mix[6]
-    config.mixer1_crosspoint_configuration.output1_configuration.input8_level = raw_mix[7]
-
-    config.mixer1_crosspoint_configuration.output2_configuration.input1_level = raw_mix[8]
-    config.mixer1_crosspoint_configuration.output2_configuration.input2_level = raw_mix[9]
-    config.mixer1_crosspoint_configuration.output2_configuration.input3_level = raw_mix[10]
-    config.mixer1_crosspoint_configuration.output2_configuration.input4_level = raw_mix[11]
-    config.mixer1_crosspoint_configuration.output2_configuration.input5_level = raw_mix[12]
-    config.mixer1_crosspoint_configuration.output2_configuration.input6_level = raw_mix[13]
-    config.mixer1_crosspoint_configuration.output2_configuration.input7_level = raw_mix[14]
-    config.mixer1_crosspoint_configuration.output2_configuration.input8_level = raw_mix[15]
-
-    config.mixer1_crosspoint_configuration.output3_configuration.input1_level = raw_mix[16]
-    config.mixer1_crosspoint_configuration.output3_configuration.input2_level = raw_mix[17]
-    config.mixer1_crosspoint_configuration.output3_configuration.input3_level = raw_mix[18]
-    config.mixer1_crosspoint_configuration.output3_configuration.input4_level = raw_mix[19]
-    config.mixer1_crosspoint_configuration.output3_configuration.input5_level = raw_mix[20]
-    config.mixer1_crosspoint_configuration.output3_configuration.input6_level = raw_mix[21]
-    config.mixer1_crosspoint_configuration.output3_configuration.input7_level = raw_mix[22]
-    config.mixer1_crosspoint_configuration.output3_configuration.input8_level = raw_mix[23]
-
-    config.mixer1_crosspoint_configuration.output4_configuration.input1_level = raw_mix[24]
-    config.mixer1_crosspoint_configuration.output4_configuration.input2_level = raw_mix[25]
-    config.mixer1_crosspoint_configuration.output4_configuration.input3_level = raw_mix[26]
-    config.mixer1_crosspoint_configuration.output4_configuration.input4_level = raw_mix[27]
-    config.mixer1_crosspoint_configuration.output4_configuration.input5_level = raw_mix[28]
-    config.mixer1_crosspoint_configuration.output4_configuration.input6_level = raw_mix[29]
-    config.mixer1_crosspoint_configuration.output4_configuration.input7_level = raw_mix[30]
-    config.mixer1_crosspoint_configuration.output4_configuration.input8_level = raw_mix[31]
-
-    config.mixer1_crosspoint_configuration.output5_configuration.input1_level = raw_mix[32]
-    config.mixer1_crosspoint_configuration.output5_configuration.input2_level = raw_mix[33]
-    config.mixer1_crosspoint_configuration.output5_configuration.input3_level = raw_mix[34]
-    config.mixer1_crosspoint_configuration.output5_configuration.input4_level = raw_mix[35]
-    config.mixer1_crosspoint_configuration.output5_configuration.input5_level = raw_mix[36]
-    config.mixer1_crosspoint_configuration.output5_configuration.input6_level = raw_mix[37]
-    config.mixer1_crosspoint_configuration.output5_configuration.input7_level = raw_mix[38]
-    config.mixer1_crosspoint_configuration.output5_configuration.input8_level = raw_mix[39]
-
-    config.mixer1_crosspoint_configuration.output6_configuration.input1_level = raw_mix[40]
-    config.mixer1_crosspoint_configuration.output6_configuration.input2_level = raw_mix[41]
-    config.mixer1_crosspoint_configuration.output6_configuration.input3_level = raw_mix[42]
-    config.mixer1_crosspoint_configuration.output6_configuration.input4_level = raw_mix[43]
-    config.mixer1_crosspoint_configuration.output6_configuration.input5_level = raw_mix[44]
-    config.mixer1_crosspoint_configuration.output6_configuration.input6_level = raw_mix[45]
-    config.mixer1_crosspoint_configuration.output6_configuration.input7_level = raw_mix[46]
-    config.mixer1_crosspoint_configuration.output6_configuration.input8_level = raw_mix[47]
-
-    config.mixer1_crosspoint_configuration.output7_configuration.input1_level = raw_mix[48]
-    config.mixer1_crosspoint_configuration.output7_configuration.input2_level = raw_mix[49]
-    config.mixer1_crosspoint_configuration.output7_configuration.input3_level = raw_mix[50]
-    config.mixer1_crosspoint_configuration.output7_configuration.input4_level = raw_mix[51]
-    config.mixer1_crosspoint_configuration.output7_configuration.input5_level = raw_mix[52]
-    config.mixer1_crosspoint_configuration.output7_configuration.input6_level = raw_mix[53]
-    config.mixer1_crosspoint_configuration.output7_configuration.input7_level = raw_mix[54]
-    config.mixer1_crosspoint_configuration.output7_configuration.input8_level = raw_mix[55]
-
-    config.mixer1_crosspoint_configuration.output8_configuration.input1_level = raw_mix[56]
-    config.mixer1_crosspoint_configuration.output8_configuration.input2_level = raw_mix[57]
-    config.mixer1_crosspoint_configuration.output8_configuration.input3_level = raw_mix[58]
-    config.mixer1_crosspoint_configuration.output8_configuration.input4_level = raw_mix[59]
-    config.mixer1_crosspoint_configuration.output8_configuration.input5_level = raw_mix[60]
-    config.mixer1_crosspoint_configuration.output8_configuration.input6_level = raw_mix[61]
-    config.mixer1_crosspoint_configuration.output8_configuration.input7_level = raw_mix[62]
-    config.mixer1_crosspoint_configuration.output8_configuration.input8_level = raw_mix[63]
-
-    config.mixer2_crosspoint_configuration.output1_configuration.input1_level = raw_mix[64]
-    config.mixer2_crosspoint_configuration.output1_configuration.input2_level = raw_mix[65]
-    config.mixer2_crosspoint_configuration.output1_configuration.input3_level = raw_mix[66]
-    config.mixer2_crosspoint_configuration.output1_configuration.input4_level = raw_mix[67]
-    config.mixer2_crosspoint_configuration.output1_configuration.input5_level = raw_mix[68]
-    config.mixer2_crosspoint_configuration.output1_configuration.input6_level = raw_mix[69]
-    config.mixer2_crosspoint_configuration.output1_configuration.input7_level = raw_mix[70]
-    config.mixer2_crosspoint_configuration.output1_configuration.input8_level = raw_mix[71]
-
-    config.mixer2_crosspoint_configuration.output2_configuration.input1_level = raw_mix[72]
-    config.mixer2_crosspoint_configuration.output2_configuration.input2_level = raw_mix[73]
-    config.mixer2_crosspoint_configuration.output2_configuration.input3_level = raw_mix[74]
-    config.mixer2_crosspoint_configuration.output2_configuration.input4_level = raw_mix[75]
-    config.mixer2_crosspoint_configuration.output2_configuration.input5_level = raw_mix[76]
-    config.mixer2_crosspoint_configuration.output2_configuration.input6_level = raw_mix[77]
-    config.mixer2_crosspoint_configuration.output2_configuration.input7_level = raw_mix[78]
-    config.mixer2_crosspoint_configuration.output2_configuration.input8_level = raw_mix[79]
-
-    config.mixer2_crosspoint_configuration.output3_configuration.input1_level = raw_mix[80]
-    config.mixer2_crosspoint_configuration.output3_configuration.input2_level = raw_mix[81]
-    config.mixer2_crosspoint_configuration.output3_configuration.input3_level = raw_mix[82]
-    config.mixer2_crosspoint_configuration.output3_configuration.input4_level = raw_mix[83]
-    config.mixer2_crosspoint_configuration.output3_configuration.input5_level = raw_mix[84]
-    config.mixer2_crosspoint_configuration.output3_configuration.input6_level = raw_mix[85]
-    config.mixer2_crosspoint_configuration.output3_configuration.input7_level = raw_mix[86]
-    config.mixer2_crosspoint_configuration.output3_configuration.input8_level = raw_mix[87]
-
-    config.mixer2_crosspoint_configuration.output4_configuration.input1_level = raw_mix[88]
-    config.mixer2_crosspoint_configuration.output4_configuration.input2_level = raw_mix[89]
-    config.mixer2_crosspoint_configuration.output4_configuration.input3_level = raw_mix[90]
-    config.mixer2_crosspoint_configuration.output4_configuration.input4_level = raw_mix[91]
-    config.mixer2_crosspoint_configuration.output4_configuration.input5_level = raw_mix[92]
-    config.mixer2_crosspoint_configuration.output4_configuration.input6_level = raw_mix[93]
-    config.mixer2_crosspoint_configuration.output4_configuration.input7_level = raw_mix[94]
-    config.mixer2_crosspoint_configuration.output4_configuration.input8_level = raw_mix[95]
-
-    config.mixer2_crosspoint_configuration.output5_configuration.input1_level = raw_mix[96]
-    config.mixer2_crosspoint_configuration.output5_configuration.input2_level = raw_mix[97]
-    config.mixer2_crosspoint_configuration.output5_configuration.input3_level = raw_mix[98]
-    config.mixer2_crosspoint_configuration.output5_configuration.input4_level = raw_mix[99]
-    config.mixer2_crosspoint_configuration.output5_configuration.input5_level = raw_mix[100]
-    config.mixer2_crosspoint_configuration.output5_configuration.input6_level = raw_mix[101]
-    config.mixer2_crosspoint_configuration.output5_configuration.input7_level = raw_mix[102]
-    config.mixer2_crosspoint_configuration.output5_configuration.input8_level = raw_mix[103]
-
-    config.mixer2_crosspoint_configuration.output6_configuration.input1_level = raw_mix[104]
-    config.mixer2_crosspoint_configuration.output6_configuration.input2_level = raw_mix[105]
-    config.mixer2_crosspoint_configuration.output6_configuration.input3_level = raw_mix[106]
-    config.mixer2_crosspoint_configuration.output6_configuration.input4_level = raw_mix[107]
-    config.mixer2_crosspoint_configuration.output6_configuration.input5_level = raw_mix[108]
-    config.mixer2_crosspoint_configuration.output6_configuration.input6_level = raw_mix[109]
-    config.mixer2_crosspoint_configuration.output6_configuration.input7_level = raw_mix[110]
-    config.mixer2_crosspoint_configuration.output6_configuration.input8_level = raw_mix[111]
-
-    config.mixer2_crosspoint_configuration.output7_configuration.input1_level = raw_mix[112]
-    config.mixer2_crosspoint_configuration.output7_configuration.input2_level = raw_mix[113]
-    config.mixer2_crosspoint_configuration.output7_configuration.input3_level = raw_mix[114]
-    config.mixer2_crosspoint_configuration.output7_configuration.input4_level = raw_mix[115]
-    config.mixer2_crosspoint_configuration.output7_configuration.input5_level = raw_mix[116]
-    config.mixer2_crosspoint_configuration.output7_configuration.input6_level = raw_mix[117]
-    config.mixer2_crosspoint_configuration.output7_configuration.input7_level = raw_mix[118]
-    config.mixer2_crosspoint_configuration.output7_configuration.input8_level = raw_mix[119]
-
-    config.mixer2_crosspoint_configuration.output8_configuration.input1_level = raw_mix[120]
-    config.mixer2_crosspoint_configuration.output8_configuration.input2_level = raw_mix[121]
-    config.mixer2_crosspoint_configuration.output8_configuration.input3_level = raw_mix[122]
-    config.mixer2_crosspoint_configuration.output8_configuration.input4_level = raw_mix[123]
-    config.mixer2_crosspoint_configuration.output8_configuration.input5_level = raw_mix[124]
-    config.mixer2_crosspoint_configuration.output8_configuration.input6_level = raw_mix[125]
-    config.mixer2_crosspoint_configuration.output8_configuration.input7_level = raw_mix[126]
-    config.mixer2_crosspoint_configuration.output8_configuration.input8_level = raw_mix[127]
-
-    # virtual mix starts after raw
-    def get_mix_virtual_configuration(mix_id: int) -> es9_py_pb2.MixConfiguration.MixVirtualConfiguration:
-        offset = 128 * 3
-        mix_config = es9_py_pb2.MixConfiguration.MixVirtualConfiguration()
-
-        mix_config.vpan = data[offset + mix_id * 2 + 1]
-        mix_config.vmix = data[offset + mix_id * 2 + 0]
-
-        return mix_config
-
-    config.mix1_vconf.CopyFrom(get_mix_virtual_configuration(0))
-    config.mix2_vconf.CopyFrom(get_mix_virtual_configuration(1))
-    config.mix3_vconf.CopyFrom(get_mix_virtual_configuration(2))
-    config.mix4_vconf.CopyFrom(get_mix_virtual_configuration(3))
-    config.mix5_vconf.CopyFrom(get_mix_virtual_configuration(4))
-    config.mix6_vconf.CopyFrom(get_mix_virtual_configuration(5))
-    config.mix7_vconf.CopyFrom(get_mix_virtual_configuration(6))
-    config.mix8_vconf.CopyFrom(get_mix_virtual_configuration(7))
-    config.mix9_vconf.CopyFrom(get_mix_virtual_configuration(8))
-    config.mix10_vconf.CopyFrom(get_mix_virtual_configuration(9))
-    config.mix11_vconf.CopyFrom(get_mix_virtual_configuration(10))
-    config.mix12_vconf.CopyFrom(get_mix_virtual_configuration(11))
-    config.mix13_vconf.CopyFrom(get_mix_virtual_configuration(12))
-    config.mix14_vconf.CopyFrom(get_mix_virtual_configuration(13))
-    config.mix15_vconf.CopyFrom(get_mix_virtual_configuration(14))
-    config.mix16_vconf.CopyFrom(get_mix_virtual_configuration(15))
-
-    return config
+    return es9_decode_mix_words(es9_unpack_mix_dump_words(data))
+
+# SysEx header followed by the message type byte, for every message type
+_SYSEX_PREFIX_BY_TYPE = tuple(ES9_SYSEX_HEADER + bytes((msg_type,)) for msg_type in range(0x80))
+_BYTE = tuple(bytes((value,)) for value in range(0x80))
+
+_FILTER_TYPES = frozenset(es9_py_pb2.FilterType.values())
+
+_SET_DC_OFFSET = MessageType.SET_DC_OFFSET.value
+_SET_FILTER = MessageType.SET_FILTER.value
+_SET_MIX = MessageType.SET_MIX.value
 
 class Message:
+    __slots__ = ('_msg_type', '_data')
+
     def __init__(self, msg_type: int, payload: bytes):
         self._msg_type = msg_type
-        self._data = ES9_SYSEX_HEADER + bytes((msg_type,)) + bytes(payload)
+        self._data = _SYSEX_PREFIX_BY_TYPE[msg_type] + bytes(payload)
+
+    @classmethod
+    def from_data(cls, msg_type: int, data: bytes) -> 'Message':
+        """
+        Wrap already encoded message data (header, type and payload)
+        without any validation. For trusted internal callers only.
+        """
+        msg = object.__new__(cls)
+        msg._msg_type = msg_type
+        msg._data = data
+        return msg
 
     @property
     def msg_type(self) -> MessageType:
@@ -904,19 +668,27 @@ class Message:
         return self._data
 
 class ApplyConfigurationDumpMessage(Message):
+    __slots__ = ()
+
     def __init__(self, chunk: int, data: bytes):
         payload = bytes(bytes((chunk,)) + data)
         super().__init__(MessageType.APPLY_CONFIGURATION_DUMP.value, payload)
 
 class RequestVersionStringMessage(Message):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(MessageType.REQUEST_VERSION_STRING.value, bytes())
 
 class RequestConfigurationDumpMessage(Message):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(MessageType.REQUEST_CONFIGURATION_DUMP.value, bytes())
 
 class RequestSaveMessage(Message):
+    __slots__ = ()
+
     class Slot(Enum):
         STANDALONE = 0
         HOSTED = 1
@@ -925,6 +697,8 @@ class RequestSaveMessage(Message):
         super().__init__(MessageType.REQUEST_SAVE.value, bytes((slot.value,)))
 
 class RequestRestoreMessage(Message):
+    __slots__ = ()
+
     class Slot(Enum):
         STANDALONE = 0
         HOSTED = 1
@@ -933,22 +707,32 @@ class RequestRestoreMessage(Message):
         super().__init__(MessageType.REQUEST_RESTORE.value, bytes((slot.value,)))
 
 class RequestResetMessage(Message):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(MessageType.REQUEST_RESET.value, bytes())
 
 class RequestMixMessage(Message):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(MessageType.REQUEST_MIX.value, bytes())
 
 class RequestUsageMessage(Message):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(MessageType.REQUEST_USAGE.value, bytes())
 
 class RequestSampleRateMessage(Message):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(MessageType.REQUEST_SAMPLE_RATE.value, bytes())
 
 class SetHighPassFiltersMessage(Message):
+    __slots__ = ()
+
     def __init__(self, config: es9_py_pb2.Configuration.HighPassFilterConfiguration):
         hpf = 0
         if config.channel_pair_1_2_enabled:
@@ -969,6 +753,8 @@ class SetHighPassFiltersMessage(Message):
         super().__init__(MessageType.SET_HPF.value, bytes((hpf,)))
 
 class SetOptionsMessage(Message):
+    __slots__ = ()
+
     def __init__(self, config: es9_py_pb2.Configuration.OptionsConfiguration):
         options = 0
         if not config.use_spdif:
@@ -979,6 +765,8 @@ class SetOptionsMessage(Message):
         super().__init__(MessageType.SET_OPTIONS.value, bytes((options,)))
 
 class SetLinksMessage(Message):
+    __slots__ = ()
+
     MAP_LINK_ID = {
         es9_py_pb2.MixerLink.MIXER_LINK_INPUT_1_2: 0x00,
         es9_py_pb2.MixerLink.MIXER_LINK_INPUT_3_4: 0x01,
@@ -1022,6 +810,8 @@ class SetLinksMessage(Message):
         super().__init__(MessageType.SET_LINKS.value, bytes((link_id, state))) 
 
 class SetVirtualMixMessage(Message):
+    __slots__ = ()
+
     def __init__(self, mix_id: int, level: int):
         """
         Set the virtual mix level for a given mix ID.
@@ -1032,6 +822,8 @@ class SetVirtualMixMessage(Message):
         raise NotImplementedError("SetVirtualMixMessage not implemented yet")
 
 class SetMidiChannelsMessage(Message):
+    __slots__ = ()
+
     def __init__(self, usb_midi_channel: int, din_midi_channel: int):
         """
         Set the MIDI channels for USB and DIN MIDI inputs.
@@ -1042,26 +834,30 @@ class SetMidiChannelsMessage(Message):
         super().__init__(MessageType.SET_MIDI_CHANNELS.value, bytes((usb_midi_channel, din_midi_channel)))
 
 class SetDCOffsetMessage(Message):
+    __slots__ = ()
+
     def __init__(self, channel: es9_py_pb2.Channel, offset: int):
         """
         Set the DC offset for a given channel.
         Offset is a signed 16-bit integer in the range -3176 to +3176.
         """
-        assert isinstance(channel, es9_py_pb2.Channel), "channel must be an instance of Channel Enum"
         assert es9_channel_is_output(channel), "DC offset can only be set for output channels"
         assert -3176 <= offset <= 3176, "Offset must be in range -3176 to +3176"
         
-        # weird encoding of offset into 3 bytes
-        # (defined by ES9 firmware)
-        offset_bytes = bytes((
-            (offset >> 14) & 0x03,
-            (offset >> 7) & 0x7F,
-            offset & 0x7F,
-        ))
+        # offset is sent as a 16-bit two's complement word
+        super().__init__(_SET_DC_OFFSET, _BYTE[channel] + codec.encode_word16(offset))
 
-        super().__init__(MessageType.SET_DC_OFFSET.value, bytes((channel.value,)) + offset_bytes)
+    @classmethod
+    def unchecked(cls, channel: es9_py_pb2.Channel, offset: int) -> 'SetDCOffsetMessage':
+        """
+        Build the message without validating arguments.
+        For trusted internal callers on hot paths.
+        """
+        return cls.from_data(_SET_DC_OFFSET, _SYSEX_PREFIX_BY_TYPE[_SET_DC_OFFSET] + _BYTE[channel] + codec.encode_word16(offset))
 
 class SetFilterMessage(Message):
+    __slots__ = ()
+
     def __init__(self, mix_id: int, filter_instance: int, enable: bool, filter_type: es9_py_pb2.FilterType, frequency: int, q_factor: int, gain: int):
         """
         Configure a filter for a given mixer input.
@@ -1071,36 +867,34 @@ class SetFilterMessage(Message):
         """
         assert 0 <= mix_id <= 15, "Mix ID must be in range 0-15"
         assert 0 <= filter_instance <= 3, "Only 4 filter instances (0-3) per mix are supported"
-        assert filter_type in es9_py_pb2.FilterType.values(), "Invalid filter type"
+        assert filter_type in _FILTER_TYPES, "Invalid filter type"
 
         # ES-9 firmware expects frequency, Q factor, and gain
-        # to be encoded as 3 bytes each using this strange format
-        # (defined by ES9 firmware)
-        freq_bytes = bytes((
-            (frequency >> 14) & 0x03,
-            (frequency >> 7) & 0x7F,
-            frequency & 0x7F,
-        ))
-        q_bytes = bytes((
-            (q_factor >> 14) & 0x03,
-            (q_factor >> 7) & 0x7F,
-            q_factor & 0x7F,
-        ))
-        gain_bytes = bytes((
-            (gain >> 14) & 0x03,
-            (gain >> 7) & 0x7F,
-            gain & 0x7F,
-        ))
-
+        # to be encoded as 16-bit words
         payload = bytes((
             mix_id,
             filter_instance,
             filter_type << 1 | (0x01 if enable else 0x00),
-        )) + freq_bytes + q_bytes + gain_bytes
+        )) + codec.encode_word16(frequency) + codec.encode_word16(q_factor) + codec.encode_word16(gain)
 
-        super().__init__(MessageType.SET_FILTER.value, payload)
+        super().__init__(_SET_FILTER, payload)
+
+    @classmethod
+    def unchecked(cls, mix_id: int, filter_instance: int, enable: bool, filter_type: es9_py_pb2.FilterType, frequency: int, q_factor: int, gain: int) -> 'SetFilterMessage':
+        """
+        Build the message without validating arguments.
+        For trusted internal callers on hot paths.
+        """
+        data = _SYSEX_PREFIX_BY_TYPE[_SET_FILTER] + bytes((
+            mix_id,
+            filter_instance,
+            filter_type << 1 | (0x01 if enable else 0x00),
+        )) + codec.encode_word16(frequency) + codec.encode_word16(q_factor) + codec.encode_word16(gain)
+        return cls.from_data(_SET_FILTER, data)
 
 class SetSmoothingMessage(Message):
+    __slots__ = ()
+
     def __init__(self, mix_id: int, enabled: bool):
         """
         Enable or disable smoothing for a given mix ID.
@@ -1112,6 +906,8 @@ class SetSmoothingMessage(Message):
         super().__init__(MessageType.SET_SMOOTHING.value, bytes((mix_id, state)))
 
 class SetInputsMessage(Message):
+    __slots__ = ()
+
     def __init__(self, dsp_block: int, routing: bytes):
         """
         Set the input routing for a given DSP block (0-3).
@@ -1131,6 +927,8 @@ class SetInputsMessage(Message):
         super().__init__(MessageType.SET_INPUTS.value + dsp_block, routing)
 
 class SetOutputsMessage(Message):
+    __slots__ = ()
+
     def __init__(self, dsp_block: int, routing: bytes):
         """
         Set the output routing for a given DSP block (0-3).
@@ -1149,25 +947,189 @@ class SetOutputsMessage(Message):
         assert len(routing) == 8, "Routing must be 8 bytes long"
         super().__init__(MessageType.SET_OUTPUTS.value + dsp_block, routing)
 
+MIX_LEVEL_MAX = 32768 # +12 dB, 0 dB being 0x2000
+
 class SetMixMessage(Message):
+    __slots__ = ()
+
     def __init__(self, mix_id: int, input_id: int, level: int):
         """
         Set the mix level for a given mix ID and input ID.
         Mix ID 0-7 correspond to mixer 1 outputs 1-8,
         Mix ID 8-15 correspond to mixer 2 outputs 1-8.
         Input ID corresponds to the input channel number (0-7).
-        Level is in the range [0, 32768].
+        Level is in the range [0, MIX_LEVEL_MAX].
         """
         assert 0 <= mix_id <= 15, "Mix ID must be in range 0-15"
         assert 0 <= input_id <= 7, "Input ID must be in range 0-7"
-        assert 0 <= level <= 32768, "Level must be in range 0-32768"
+        assert 0 <= level <= MIX_LEVEL_MAX, f"Level must be in range 0-{MIX_LEVEL_MAX}"
 
-        level_bytes = bytes((
-            (level >> 14),
-            (level >> 7) & 0x7F,
-            level & 0x7F,
-        ))
+        super().__init__(_SET_MIX + mix_id, _BYTE[input_id] + codec.encode_word16(level))
 
-        payload = bytes((input_id,)) + level_bytes
+    @classmethod
+    def unchecked(cls, mix_id: int, input_id: int, level: int) -> 'SetMixMessage':
+        """
+        Build the message without validating arguments.
+        For trusted internal callers on hot paths (e.g. automation bursts).
+        """
+        msg_type = _SET_MIX + mix_id
+        return cls.from_data(msg_type, _SYSEX_PREFIX_BY_TYPE[msg_type] + _BYTE[input_id] + codec.encode_word16(level))
+
+# The configurator uploads a dump as 24 chunks of 32 words, each payload
+# being the chunk index, the second dump header byte and the packed words.
+APPLY_CONFIGURATION_DUMP_CHUNK_COUNT = 24
+APPLY_CONFIGURATION_DUMP_CHUNK_WORDS = CONFIGURATION_DUMP_WORD_COUNT // APPLY_CONFIGURATION_DUMP_CHUNK_COUNT
 
-        super().__init__(MessageType.SET_MIX.value + mix_id, payload)
+def es9_configuration_dump_messages(config: es9_py_pb2.Configuration, base=None, header: bytes = bytes(CONFIGURATION_DUMP_HEADER_LENGTH)):
+    """
+    Yield the APPLY_CONFIGURATION_DUMP_CHUNK_COUNT ApplyConfigurationDumpMessages
+    that load a full Configuration onto the ES-9, framed as the Expert
+    Sleepers configurator uploads a dump file. header is the header of the
+    dump base was taken from. See es9_encode_configuration_words for the
+    meaning of base.
+    """
+    assert len(header) == CONFIGURATION_DUMP_HEADER_LENGTH, "Invalid configuration dump header length"
+    data = codec.encode_words(es9_encode_configuration_words(config, base))
+    step = APPLY_CONFIGURATION_DUMP_CHUNK_WORDS * codec.WORD_SIZE
+    for chunk in range(APPLY_CONFIGURATION_DUMP_CHUNK_COUNT):
+        yield ApplyConfigurationDumpMessage(chunk, header[1:2] + data[chunk * step:(chunk + 1) * step])
+
+# Firmware model
+#
+# The effect of each host message on the configuration dump words, as the
+# firmware applies it. Shared by the simulator and the client's state
+# cache. Malformed messages raise ValueError or IndexError, also under
+# python -O, before any word is written.
+
+def _apply_configuration_dump_chunk(words: array, msg_type: int, payload):
+    # chunk index, second dump header byte, then the packed words of the chunk
+    chunk = payload[0]
+    if chunk >= APPLY_CONFIGURATION_DUMP_CHUNK_COUNT:
+        raise ValueError(f"Configuration dump chunk out of range: {chunk}")
+    chunk_words = codec.decode_words(payload[2:2 + APPLY_CONFIGURATION_DUMP_CHUNK_WORDS * codec.WORD_SIZE])
+    if len(chunk_words) != APPLY_CONFIGURATION_DUMP_CHUNK_WORDS:
+        raise ValueError(f"Invalid word count for configuration dump chunk: {len(chunk_words)}")
+    start = chunk * APPLY_CONFIGURATION_DUMP_CHUNK_WORDS
+    words[start:start + APPLY_CONFIGURATION_DUMP_CHUNK_WORDS] = chunk_words
+
+def _apply_hpf(words: array, msg_type: int, payload):
+    words[CONFIGURATION_DUMP_OFFSET_HPF] = payload[0] & 0x7F
+
+def _apply_options(words: array, msg_type: int, payload):
+    # bit 0 is "use extra mixer block" in both the message and the dump
+    words[CONFIGURATION_DUMP_OFFSET_OPTIONS] = payload[0] & 0x03
+
+def _apply_links(words: array, msg_type: int, payload):
+    link_id, state = payload[0], payload[1]
+    if link_id >= 32:
+        raise ValueError(f"Invalid link ID: {link_id}")
+    word = CONFIGURATION_DUMP_OFFSET_LINKS + link_id // 16
+    bit = 1 << (link_id % 16)
+    if state:
+        words[word] |= bit
+    else:
+        words[word] &= ~bit
+
+def _apply_midi_channels(words: array, msg_type: int, payload):
+    usb_midi_channel, din_midi_channel = payload[0], payload[1]
+    if usb_midi_channel > 16 or din_midi_channel > 16:
+        raise ValueError("MIDI channel out of range")
+    words[CONFIGURATION_DUMP_OFFSET_MIDI_CHANNELS] = usb_midi_channel << 8 | din_midi_channel
+
+def _apply_dc_offset(words: array, msg_type: int, payload):
+    output = payload[0] - es9_py_pb2.Channel.CHANNEL_OUTPUT_1
+    if not 0 <= output <= 7:
+        raise ValueError("DC offset can only be set for output channels")
+    words[CONFIGURATION_DUMP_OFFSET_DC_OFFSET + output] = codec.decode_word(payload, 1) & 0xFFFF
+
+def _apply_filter(words: array, msg_type: int, payload):
+    mix_id, filter_instance, flags = payload[0], payload[1], payload[2]
+    filter_type = flags >> 1
+    if mix_id > 15 or filter_instance > 3:
+        raise ValueError("Filter out of range")
+    if not es9_py_pb2.FilterType.LOW_PASS_1ST_ORDER <= filter_type <= es9_py_pb2.FilterType.INVERT_PHASE:
+        raise ValueError(f"Invalid filter type: {filter_type}")
+    frequency, q_factor, gain = codec.decode_word(payload, 3), codec.decode_word(payload, 6), codec.decode_word(payload, 9)
+    offset = CONFIGURATION_DUMP_OFFSET_FILTERS + (mix_id*4 + filter_instance) * 4
+    words[offset + 0] = es9_filter_type_to_storage_index(filter_type) << 1 | (flags & 0x01)
+    words[offset + 1] = frequency
+    words[offset + 2] = q_factor
+    words[offset + 3] = gain & 0xFFFF
+
+def _apply_smoothing(words: array, msg_type: int, payload):
+    mix_id, state = payload[0], payload[1]
+    if mix_id > 15:
+        raise ValueError("Mix ID out of range")
+    if state:
+        words[CONFIGURATION_DUMP_OFFSET_SMOOTHING] |= 1 << mix_id
+    else:
+        words[CONFIGURATION_DUMP_OFFSET_SMOOTHING] &= ~(1 << mix_id)
+
+def _apply_inputs(words: array, msg_type: int, payload):
+    dsp_block = msg_type - MessageType.SET_INPUTS.value
+    if len(payload) < 8:
+        raise ValueError("Routing must be 8 bytes long")
+    for route_id in payload[:8]:
+        if route_id not in MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID:
+            raise ValueError(f"Invalid input route ID: {route_id:02X}")
+    base = CONFIGURATION_DUMP_OFFSET_ROUTE_IN + dsp_block*8
+    link_mask = words[CONFIGURATION_DUMP_OFFSET_LINKS] | words[CONFIGURATION_DUMP_OFFSET_LINKS + 1] << 16
+    routing = es9_predict_input_routing(bytes(words[base:base + 8].tolist()), payload, link_mask)
+    words[base:base + 8] = array('I', list(routing))
+
+def _apply_outputs(words: array, msg_type: int, payload):
+    dsp_block = msg_type - MessageType.SET_OUTPUTS.value
+    if len(payload) < 8:
+        raise ValueError("Routing must be 8 bytes long")
+    base = CONFIGURATION_DUMP_OFFSET_ROUTE_OUT + dsp_block*8
+    words[base:base + 8] = array('I', list(payload[:8]))
+
+def _apply_mix(words: array, msg_type: int, payload):
+    mix_id = msg_type - MessageType.SET_MIX.value
+    input_id = payload[0]
+    if input_id > 7:
+        raise ValueError("Input ID out of range")
+    words[CONFIGURATION_DUMP_OFFSET_MIX + mix_id*8 + input_id] = codec.decode_word(payload, 1) & 0xFFFF
+
+def _apply_nothing(words: array, msg_type: int, payload):
+    pass
+
+def _build_configuration_word_appliers() -> dict:
+    appliers = {
+        MessageType.APPLY_CONFIGURATION_DUMP.value: _apply_configuration_dump_chunk,
+        MessageType.SET_HPF.value: _apply_hpf,
+        MessageType.SET_OPTIONS.value: _apply_options,
+        MessageType.SET_LINKS.value: _apply_links,
+        MessageType.SET_MIDI_CHANNELS.value: _apply_midi_channels,
+        MessageType.SET_DC_OFFSET.value: _apply_dc_offset,
+        MessageType.SET_FILTER.value: _apply_filter,
+        MessageType.SET_SMOOTHING.value: _apply_smoothing,
+        # the virtual mix is not part of the configuration dump
+        MessageType.SET_VIRTUAL_MIX.value: _apply_nothing,
+    }
+    for msg_type in (MessageType.REQUEST_VERSION_STRING, MessageType.REQUEST_CONFIGURATION_DUMP, MessageType.REQUEST_SAVE,
+                     MessageType.REQUEST_MIX, MessageType.REQUEST_USAGE, MessageType.REQUEST_SAMPLE_RATE):
+        appliers[msg_type.value] = _apply_nothing
+    for i in range(4):
+        appliers[MessageType.SET_INPUTS.value + i] = _apply_inputs
+        appliers[MessageType.SET_OUTPUTS.value + i] = _apply_outputs
+    for i in range(16):
+        appliers[MessageType.SET_MIX.value + i] = _apply_mix
+    return appliers
+
+_CONFIGURATION_WORD_APPLIERS = _build_configuration_word_appliers()
+
+def es9_apply_message_to_configuration_words(words: array, msg_type: int, payload) -> bool:
+    """
+    Apply a message sent to the ES-9 (payload after the message type
+    byte) to configuration dump words in place, as the firmware does.
+
+    Returns False, leaving the words untouched, for messages whose effect
+    the model does not know (reset, restore, unknown types). Raises
+    ValueError or IndexError for malformed messages.
+    """
+    applier = _CONFIGURATION_WORD_APPLIERS.get(msg_type)
+    if applier is None:
+        return False
+    applier(words, msg_type, payload)
+    return True
@@ -0,0 +1,213 @@
+"""
+Message and latency metrics for the ES-9 hot paths.
+
+Metrics counts SysEx messages and wire bytes per MessageType in both
+directions and keeps fixed-bucket histograms of parse time and request
+round-trip time. Components take an optional Metrics instance and skip
+all bookkeeping when it is None, so instrumentation costs a single
+`is not None` check when disabled.
+
+Snapshots are saved as JSON (save/load) for the `cli stats` command, and
+can be written in the Prometheus textfile collector format.
+"""
+
+import json
+import os
+
+from array import array
+from bisect import bisect_left
+
+from interface import (
+    MessageType,
+)
+
+# histogram bucket upper bounds in seconds, from 50 µs to 10 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_SYSEX_FRAMING_LENGTH = 2 # F0 and F7
+
+def _build_type_names(received: bool) -> list[str]:
+    # REPORT_MESSAGE shares its value with SET_OPTIONS, so names depend on direction
+    names = [f'0x{value:02X}' for value in range(256)]
+    for name, member in MessageType.__members__.items():
+        if name.startswith('REPORT_') == received:
+            names[member.value] = name
+    if not received:
+        for base, count in ((MessageType.SET_INPUTS, 4), (MessageType.SET_OUTPUTS, 4), (MessageType.SET_MIX, 16)):
+            for i in range(count):
+                names[base.value + i] = base.name
+    return names
+
+SENT_TYPE_NAMES = _build_type_names(received=False)
+RECEIVED_TYPE_NAMES = _build_type_names(received=True)
+
+class Histogram:
+    """
+    Cumulative-friendly histogram over fixed bucket bounds.
+    counts[i] holds observations <= bounds[i] and > bounds[i-1];
+    the final count holds everything above the last bound.
+    """
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = array('Q', [0]) * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Upper bound of the bucket holding quantile q, None if empty.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {'bounds': list(self.bounds), 'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Histogram':
+        histogram = cls(tuple(data['bounds']))
+        histogram.counts = array('Q', data['counts'])
+        histogram.sum = data['sum']
+        histogram.count = data['count']
+        return histogram
+
+class Metrics:
+    """
+    Counters indexed by SysEx type byte, plus histograms keyed by
+    MessageType name.
+    """
+    def __init__(self):
+        self.sent_messages = array('Q', [0]) * 256
+        self.sent_bytes = array('Q', [0]) * 256
+        self.received_messages = array('Q', [0]) * 256
+        self.received_bytes = array('Q', [0]) * 256
+        self.parse_seconds = {} # received type name -> Histogram
+        self.round_trip_seconds = {} # reply type name -> Histogram
+
+    def record_sent(self, msg_type: int, data_length: int):
+        """
+        Count one message sent, data_length being len(Message.data).
+        """
+        self.sent_messages[msg_type] += 1
+        self.sent_bytes[msg_type] += data_length + _SYSEX_FRAMING_LENGTH
+
+    def record_received(self, msg_type: int, data_length: int):
+        """
+        Count one message received, data_length being the SysEx length without F0/F7.
+        """
+        self.received_messages[msg_type] += 1
+        self.received_bytes[msg_type] += data_length + _SYSEX_FRAMING_LENGTH
+
+    def record_parse(self, msg_type: int, seconds: float):
+        self._histogram(self.parse_seconds, RECEIVED_TYPE_NAMES[msg_type]).observe(seconds)
+
+    def record_round_trip(self, reply_type: MessageType, seconds: float):
+        self._histogram(self.round_trip_seconds, RECEIVED_TYPE_NAMES[reply_type.value]).observe(seconds)
+
+    @staticmethod
+    def _histogram(histograms: dict, name: str) -> Histogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        return histogram
+
+    @staticmethod
+    def _by_name(counts: array, names: list[str]) -> dict[str, int]:
+        totals = {}
+        for value, count in enumerate(counts):
+            if count:
+                totals[names[value]] = totals.get(names[value], 0) + count
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            'sent_messages': self._by_name(self.sent_messages, SENT_TYPE_NAMES),
+            'sent_bytes': self._by_name(self.sent_bytes, SENT_TYPE_NAMES),
+            'received_messages': self._by_name(self.received_messages, RECEIVED_TYPE_NAMES),
+            'received_bytes': self._by_name(self.received_bytes, RECEIVED_TYPE_NAMES),
+            'parse_seconds': {name: h.to_dict() for name, h in self.parse_seconds.items()},
+            'round_trip_seconds': {name: h.to_dict() for name, h in self.round_trip_seconds.items()},
+        }
+
+    def save(self, path: str):
+        """
+        Write a JSON snapshot, atomically replacing path.
+        """
+        _write_atomically(path, json.dumps(self.to_dict(), indent=2) + '\n')
+
+    def write_prometheus_textfile(self, path: str):
+        """
+        Write the metrics in the Prometheus textfile collector format,
+        atomically replacing path.
+        """
+        _write_atomically(path, es9_prometheus_text(self.to_dict()))
+
+def es9_load_metrics(path: str) -> dict:
+    """
+    Load a snapshot written by Metrics.save.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    for key in ('parse_seconds', 'round_trip_seconds'):
+        data[key] = {name: Histogram.from_dict(h) for name, h in data[key].items()}
+    return data
+
+def _write_atomically(path: str, text: str):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def es9_prometheus_text(snapshot: dict) -> str:
+    """
+    Render a Metrics.to_dict() snapshot in the Prometheus text exposition format.
+    """
+    lines = []
+    counters = (
+        ('es9_sysex_sent_messages_total', 'SysEx messages sent to the ES-9', 'sent_messages'),
+        ('es9_sysex_sent_bytes_total', 'SysEx bytes sent to the ES-9, including F0/F7', 'sent_bytes'),
+        ('es9_sysex_received_messages_total', 'SysEx messages received from the ES-9', 'received_messages'),
+        ('es9_sysex_received_bytes_total', 'SysEx bytes received from the ES-9, including F0/F7', 'received_bytes'),
+    )
+    for metric, help, key in counters:
+        lines.append(f'# HELP {metric} {help}')
+        lines.append(f'# TYPE {metric} counter')
+        for name, value in sorted(snapshot[key].items()):
+            lines.append(f'{metric}{{type="{name}"}} {value}')
+
+    histograms = (
+        ('es9_parse_seconds', 'Time spent handling a received report', 'parse_seconds'),
+        ('es9_round_trip_seconds', 'Time from sending a request to receiving its reply', 'round_trip_seconds'),
+    )
+    for metric, help, key in histograms:
+        lines.append(f'# HELP {metric} {help}')
+        lines.append(f'# TYPE {metric} histogram')
+        for name, h in sorted(snapshot[key].items()):
+            h = h.to_dict() if isinstance(h, Histogram) else h
+            cumulative = 0
+            for bound, count in zip(h['bounds'], h['counts']):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{type="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{type="{name}",le="+Inf"}} {h["count"]}')
+            lines.append(f'{metric}_sum{{type="{name}"}} {h["sum"]:.9f}')
+            lines.append(f'{metric}_count{{type="{name}"}} {h["count"]}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,195 @@
+"""
+DSP usage monitoring.
+
+UsageMonitor polls RequestUsageMessage (and, less often,
+RequestSampleRateMessage) through an ES9Client and stores the load of the
+four DSP blocks in a fixed-size SampleRing. Window statistics and
+threshold alerts are computed from the ring without allocating per sample.
+
+The poller is a background user of the port: whenever a request other
+than its own is in flight, or other traffic was seen since its last poll,
+it doubles its interval (up to max_interval) instead of polling, and
+returns to the base interval once the port is quiet again.
+"""
+
+import asyncio
+import time
+
+from array import array
+
+import logging
+logger = logging.getLogger(__name__)
+
+from client import ES9Client
+
+DSP_BLOCK_COUNT = 4
+
+class SampleRing:
+    """
+    Fixed-capacity ring of timestamped samples with several channels each,
+    backed by flat arrays of doubles.
+    """
+    def __init__(self, capacity: int, channels: int):
+        assert capacity > 0, "Capacity must be positive"
+        self.capacity = capacity
+        self.channels = channels
+        self._times = array('d', [0.0]) * capacity
+        self._values = array('d', [0.0]) * (capacity * channels)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, values):
+        assert len(values) == self.channels, "Wrong number of channel values"
+        i = self._next
+        self._times[i] = timestamp
+        self._values[i * self.channels:(i + 1) * self.channels] = array('d', values)
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def _indices(self, since: float | None):
+        # newest first, stopping at the first sample older than since
+        for n in range(self._count):
+            i = (self._next - 1 - n) % self.capacity
+            if since is not None and self._times[i] < since:
+                return
+            yield i
+
+    def latest(self) -> tuple[float, tuple[float, ...]] | None:
+        if not self._count:
+            return None
+        i = (self._next - 1) % self.capacity
+        return self._times[i], tuple(self._values[i * self.channels:(i + 1) * self.channels])
+
+    def stats(self, channel: int, since: float | None = None) -> tuple[float, float, float] | None:
+        """
+        (min, max, mean) of channel over the samples taken at or after
+        since (all samples when None), or None if there are none.
+        """
+        values = self._values
+        channels = self.channels
+        total = 0.0
+        count = 0
+        low = float('inf')
+        high = float('-inf')
+        for i in self._indices(since):
+            value = values[i * channels + channel]
+            total += value
+            count += 1
+            low = min(low, value)
+            high = max(high, value)
+        if not count:
+            return None
+        return low, high, total / count
+
+class UsageMonitor:
+    """
+    Polls DSP usage into a SampleRing.
+
+    on_sample(timestamp, usage) is called after every sample, with usage a
+    tuple of the four block loads (0.0-1.0). on_alert(block, mean, raised)
+    is called when the mean load of a block over alert_window seconds
+    rises above threshold (raised=True) or falls back below it.
+    """
+    def __init__(
+        self,
+        client: ES9Client,
+        interval: float = 0.5,
+        max_interval: float = 8.0,
+        capacity: int = 3600,
+        threshold: float | None = None,
+        alert_window: float = 5.0,
+        sample_rate_every: int = 10,
+        on_sample=None,
+        on_alert=None,
+    ):
+        assert interval > 0 and max_interval >= interval, "Invalid poll interval"
+        self._client = client
+        self.interval = interval
+        self.max_interval = max_interval
+        self.threshold = threshold
+        self.alert_window = alert_window
+        self.sample_rate_every = sample_rate_every
+        self.on_sample = on_sample
+        self.on_alert = on_alert
+
+        self.samples = SampleRing(capacity, DSP_BLOCK_COUNT)
+        self.sample_rate_hz = None
+        self.current_interval = interval
+        self.backoffs = 0
+        self.timeouts = 0
+        self.parse_errors = 0
+        self._alerting = [False] * DSP_BLOCK_COUNT
+        self._polls = 0
+        self._quiet_since = 0.0 # time.monotonic() when our own last request finished
+
+    def window_stats(self, block: int, seconds: float) -> tuple[float, float, float] | None:
+        """
+        (min, max, mean) load of a DSP block over the last seconds.
+        """
+        return self.samples.stats(block, time.monotonic() - seconds)
+
+    def _port_busy(self) -> bool:
+        client = self._client
+        return client.pending_requests > 0 or client.last_traffic > self._quiet_since
+
+    async def poll(self):
+        """
+        Take one usage sample, and a sample rate reading every
+        sample_rate_every polls.
+        """
+        usage = await self._client.request_usage()
+        if self.sample_rate_every and self._polls % self.sample_rate_every == 0:
+            sample_rate_hz = await self._client.request_sample_rate()
+            if sample_rate_hz != self.sample_rate_hz:
+                logger.info(f"ES-9 sample rate: {sample_rate_hz} Hz")
+            self.sample_rate_hz = sample_rate_hz
+        self._polls += 1
+        self._quiet_since = time.monotonic()
+
+        now = time.monotonic()
+        values = (usage.usage_dsp0, usage.usage_dsp1, usage.usage_dsp2, usage.usage_dsp3)
+        self.samples.append(now, values)
+        if self.on_sample is not None:
+            self.on_sample(now, values)
+        if self.threshold is not None:
+            self._check_alerts(now)
+
+    def _check_alerts(self, now: float):
+        for block in range(DSP_BLOCK_COUNT):
+            _low, _high, mean = self.samples.stats(block, now - self.alert_window)
+            raised = mean > self.threshold
+            if raised != self._alerting[block]:
+                self._alerting[block] = raised
+                if self.on_alert is not None:
+                    self.on_alert(block, mean, raised)
+
+    async def run(self):
+        """
+        Poll until cancelled.
+        """
+        self._quiet_since = time.monotonic()
+        while True:
+            await asyncio.sleep(self.current_interval)
+
+            if self._port_busy():
+                self.backoffs += 1
+                self.current_interval = min(self.current_interval * 2, self.max_interval)
+                self._quiet_since = time.monotonic()
+                continue
+
+            try:
+                await self.poll()
+            except TimeoutError as e:
+                logger.warning(f"Usage poll failed: {e}")
+                self.timeouts += 1
+                self.current_interval = min(self.current_interval * 2, self.max_interval)
+                continue
+            except ValueError as e:
+                # a malformed report; the device answered, so keep polling at the same rate
+                logger.warning(f"Usage poll failed: {e}")
+                self.parse_errors += 1
+                continue
+            self.current_interval = self.interval
@@ -0,0 +1,151 @@
+"""
+Minimal change planning between two ES-9 configurations.
+
+plan_changes() compares a current and a target Configuration and returns
+only the Set* messages needed to move the device from one to the other,
+at the granularity the firmware allows: one SetInputsMessage/SetOutputsMessage
+per DSP block whose routing differs, one SetMixMessage per changed crosspoint,
+one SetFilterMessage per changed filter, and so on.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    CONFIGURATION_DUMP_LINK_FIELDS,
+    Message,
+
+    SetDCOffsetMessage,
+    SetFilterMessage,
+    SetHighPassFiltersMessage,
+    SetInputsMessage,
+    SetLinksMessage,
+    SetMidiChannelsMessage,
+    SetMixMessage,
+    SetOptionsMessage,
+    SetOutputsMessage,
+    SetSmoothingMessage,
+
+    es9_channel_to_input_route_id,
+    es9_channel_to_output_route_id,
+    es9_dsp_block_routing_field_path,
+    es9_mix_crosspoint_field_path,
+
+    es9_py_pb2,
+)
+from routing import es9_correct_routing
+
+def _field(config, path: tuple[str, ...]):
+    value = config
+    for field in path:
+        value = getattr(value, field)
+    return value
+
+def _plan_routing(current: es9_py_pb2.Configuration, target: es9_py_pb2.Configuration, direction: str) -> list[Message]:
+    if direction == 'input':
+        message_type, to_route_id = SetInputsMessage, es9_channel_to_input_route_id
+    else:
+        message_type, to_route_id = SetOutputsMessage, es9_channel_to_output_route_id
+
+    messages = []
+    for dsp_block in range(4):
+        routing = []
+        changed = False
+        for ch in range(8):
+            path = es9_dsp_block_routing_field_path(dsp_block, ch, direction)
+            current_channel = _field(current, path)
+            target_channel = _field(target, path)
+            # an unspecified target channel leaves the current routing in place
+            if target_channel == es9_py_pb2.Channel.CHANNEL_UNSPECIFIED:
+                target_channel = current_channel
+            changed |= target_channel != current_channel
+            routing.append(target_channel)
+        if not changed:
+            continue
+        if es9_py_pb2.Channel.CHANNEL_UNSPECIFIED in routing:
+            # the current routing of that channel is not a known channel, and the message sets all 8
+            logger.warning(f"Skipping {direction} routing of DSP block {dsp_block}: a channel is unspecified in both configurations")
+            continue
+        messages.append(message_type(dsp_block, bytes(to_route_id(channel) for channel in routing)))
+    return messages
+
+def plan_changes(current: es9_py_pb2.Configuration, target: es9_py_pb2.Configuration, strict_links: bool = False) -> list[Message]:
+    """
+    Return the ordered list of messages that turns current into target.
+
+    Links are planned before routing since the firmware applies stereo
+    link L/R affinity when inputs are routed. Input routing the firmware
+    would rewrite because of that affinity (see routing.py) is corrected
+    to what the device will actually do, with a warning, or rejected with
+    ValueError when strict_links is set.
+    """
+    messages = []
+
+    if target.options_configuration != current.options_configuration:
+        messages.append(SetOptionsMessage(target.options_configuration))
+
+    if target.high_pass_filter_configuration != current.high_pass_filter_configuration:
+        messages.append(SetHighPassFiltersMessage(target.high_pass_filter_configuration))
+
+    if target.midi_channels_configuration != current.midi_channels_configuration:
+        messages.append(SetMidiChannelsMessage(
+            usb_midi_channel=target.midi_channels_configuration.usb_midi_channel,
+            din_midi_channel=target.midi_channels_configuration.din_midi_channel,
+        ))
+
+    for link, bit in SetLinksMessage.MAP_LINK_ID.items():
+        field = CONFIGURATION_DUMP_LINK_FIELDS[bit]
+        enabled = getattr(target.mixer_links_configuration, field)
+        if enabled != getattr(current.mixer_links_configuration, field):
+            messages.append(SetLinksMessage(link, enabled))
+
+    inputs = _plan_routing(current, target, 'input')
+    if inputs:
+        messages, conflicts = es9_correct_routing(current, messages + inputs)
+        if conflicts and strict_links:
+            raise ValueError("Input routing conflicts with stereo link affinity:\n" + "\n".join(str(conflict) for conflict in conflicts))
+        for conflict in conflicts:
+            logger.warning(f"Corrected {conflict}")
+    messages += _plan_routing(current, target, 'output')
+
+    for mix_id in range(16):
+        for ch in range(8):
+            path = es9_mix_crosspoint_field_path(mix_id, ch)
+            level = _field(target, path)
+            if level != _field(current, path):
+                messages.append(SetMixMessage(mix_id, ch, level))
+
+    for mix_id in range(16):
+        for filter_instance in range(4):
+            field = f'mix{mix_id + 1}_filter{filter_instance + 1}'
+            target_filter = getattr(target.mix_input_filter_configuration, field)
+            current_filter = getattr(current.mix_input_filter_configuration, field)
+            if target_filter != current_filter:
+                # an unspecified target filter type keeps the current type
+                filter_type = target_filter.filter_type or current_filter.filter_type
+                if filter_type == es9_py_pb2.FilterType.FILTER_TYPE_UNSPECIFIED:
+                    logger.warning(f"Skipping mix {mix_id} filter {filter_instance}: filter type is unspecified in both configurations")
+                    continue
+                messages.append(SetFilterMessage(
+                    mix_id=mix_id,
+                    filter_instance=filter_instance,
+                    enable=target_filter.enabled,
+                    filter_type=filter_type,
+                    frequency=round(target_filter.frequency_hz),
+                    q_factor=round(target_filter.q_factor),
+                    gain=round(target_filter.gain),
+                ))
+
+    for mix_id in range(16):
+        field = f'mix{mix_id + 1}_enabled'
+        enabled = getattr(target.mix_smoothing_configuration, field)
+        if enabled != getattr(current.mix_smoothing_configuration, field):
+            messages.append(SetSmoothingMessage(mix_id, enabled))
+
+    for output in range(8):
+        field = f'output{output + 1}_offset'
+        offset = getattr(target.output_dc_offset_configuration, field)
+        if offset != getattr(current.output_dc_offset_configuration, field):
+            messages.append(SetDCOffsetMessage(es9_py_pb2.Channel.CHANNEL_OUTPUT_1 + output, offset))
+
+    return messages
@@ -0,0 +1,103 @@
+"""
+Callback-driven MIDI receive path.
+
+CallbackReceiver opens an input port with python-rtmidi and hands the raw
+bytes of each message from the rtmidi callback thread straight to the
+asyncio loop with call_soon_threadsafe, where they are fed to a
+SysExDemux. No thread is pinned on a blocking read, and messages do not
+pass through mido's queue on their way to the handlers.
+"""
+
+import asyncio
+import rtmidi
+
+from collections import deque
+
+import logging
+logger = logging.getLogger(__name__)
+
+from demux import SysExDemux
+
+DEFAULT_MAX_PENDING = 256 # messages buffered between the callback and the loop
+
+def rtmidi_input_port_index(midi_in: rtmidi.MidiIn, port_name: str) -> int:
+    ports = midi_in.get_ports()
+    assert port_name in ports, f"MIDI input port not found: {port_name}"
+    return ports.index(port_name)
+
+class CallbackReceiver:
+    """
+    Feeds raw MIDI input from an rtmidi callback into a SysExDemux.
+
+    The callback thread only appends to a bounded buffer and, when the loop
+    is not already scheduled to drain it, schedules one drain; a burst of
+    messages therefore costs a single loop wake-up. When the buffer is full
+    new messages are dropped and counted rather than blocking the callback.
+    """
+    def __init__(self, demux: SysExDemux, port_name: str, max_pending: int = DEFAULT_MAX_PENDING):
+        self._demux = demux
+        self._port_name = port_name
+        self._max_pending = max_pending
+        self._pending = deque()
+        self._scheduled = False
+        self._loop = None
+        self._midi_in = None
+
+        self.received = 0 # messages delivered to the demux
+        self.dropped = 0 # messages dropped because the buffer was full or the loop closed
+        self.max_depth = 0 # largest number of messages waiting at once
+
+    async def __aenter__(self) -> 'CallbackReceiver':
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        """
+        Open the port and start receiving. Must be called from the loop
+        the demux handlers should run on.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._midi_in = rtmidi.MidiIn()
+        self._midi_in.ignore_types(sysex=False, timing=True, active_sense=True)
+        self._midi_in.open_port(rtmidi_input_port_index(self._midi_in, self._port_name))
+        self._midi_in.set_callback(self._on_midi)
+
+    def close(self):
+        if self._midi_in is not None:
+            self._midi_in.cancel_callback()
+            self._midi_in.close_port()
+            self._midi_in = None
+        self._drain()
+        if self.dropped:
+            logger.warning(f"{self.dropped} MIDI messages dropped on {self._port_name}")
+
+    def _on_midi(self, event, data=None):
+        # runs on the rtmidi thread
+        message, _deltatime = event
+        pending = self._pending
+        if len(pending) >= self._max_pending:
+            self.dropped += 1
+            return
+
+        pending.append(bytes(message))
+        self.max_depth = max(self.max_depth, len(pending))
+        if not self._scheduled:
+            self._scheduled = True
+            try:
+                self._loop.call_soon_threadsafe(self._drain)
+            except RuntimeError: # loop closed
+                self.dropped += len(pending)
+                pending.clear()
+
+    def _drain(self):
+        # runs on the loop; cleared before draining so a message appended
+        # after the last popleft always schedules another drain
+        self._scheduled = False
+        pending = self._pending
+        feed = self._demux.feed
+        while pending:
+            feed(pending.popleft())
+            self.received += 1
@@ -0,0 +1,136 @@
+"""
+Local model of the ES-9 stereo link affinity rules.
+
+When the two channels of a stereo link are linked (mixer_links_configuration),
+the firmware keeps them together on an L/R pair of DSP block inputs:
+routing either member of the pair to input ch sets inputs ch & ~1 and
+ch | 1 to the left and right member, whatever was routed there before
+(see docs/cli.md). es9_predict_input_routing() in interface.py
+reproduces this, so the effect of a SetInputsMessage is known before
+it is sent.
+
+RoutingModel follows the link and input routing state through a
+sequence of messages and reports every input that would not end up as
+requested. plan_changes() uses it to reject or correct plans before
+they are sent, instead of finding out from another configuration dump.
+"""
+
+from interface import (
+    CONFIGURATION_DUMP_LINK_FIELDS,
+    ES9_SYSEX_HEADER,
+    MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID,
+    MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL,
+    Message,
+    MessageType,
+
+    SetInputsMessage,
+
+    es9_dsp_block_routing_field_path,
+    es9_predict_input_routing,
+
+    es9_py_pb2,
+)
+
+_PAYLOAD_START = len(ES9_SYSEX_HEADER) + 1
+
+def es9_link_mask(config: es9_py_pb2.Configuration) -> int:
+    """
+    Enabled links of a Configuration as a bit mask indexed by link ID.
+    """
+    mask = 0
+    for bit, field in enumerate(CONFIGURATION_DUMP_LINK_FIELDS):
+        if field is not None and getattr(config.mixer_links_configuration, field):
+            mask |= 1 << bit
+    return mask
+
+class RoutingConflict:
+    """
+    A DSP block input that would not end up routed as requested.
+    """
+    __slots__ = ('dsp_block', 'ch', 'requested', 'result')
+
+    def __init__(self, dsp_block: int, ch: int, requested: int, result: int):
+        self.dsp_block = dsp_block
+        self.ch = ch
+        self.requested = requested # route ID
+        self.result = result # route ID
+
+    def __str__(self) -> str:
+        path = '.'.join(es9_dsp_block_routing_field_path(self.dsp_block, self.ch, 'input'))
+        requested = es9_py_pb2.Channel.Name(MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID[self.requested])
+        result = es9_py_pb2.Channel.Name(MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID.get(self.result, es9_py_pb2.Channel.CHANNEL_UNSPECIFIED))
+        return f"{path}: requested {requested}, firmware would route {result} (stereo link affinity)"
+
+class RoutingModel:
+    """
+    Link mask and input routing of the four DSP blocks, updated by the
+    messages that change them.
+    """
+    def __init__(self, link_mask: int, inputs: list[bytes]):
+        assert len(inputs) == 4, "Input routing of four DSP blocks required"
+        self.link_mask = link_mask
+        self.inputs = list(inputs)
+
+    @classmethod
+    def from_configuration(cls, config: es9_py_pb2.Configuration) -> 'RoutingModel':
+        inputs = []
+        for dsp_block in range(4):
+            routing = bytearray(8)
+            for ch in range(8):
+                section, field = es9_dsp_block_routing_field_path(dsp_block, ch, 'input')
+                routing[ch] = MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL.get(getattr(getattr(config, section), field), 0)
+            inputs.append(bytes(routing))
+        return cls(es9_link_mask(config), inputs)
+
+    def apply(self, msg: Message) -> list[RoutingConflict]:
+        """
+        Apply one message, returning the inputs it would route differently
+        than requested. Messages other than SetLinks and SetInputs are ignored.
+        """
+        msg_type = msg.msg_type
+        payload = msg.data[_PAYLOAD_START:]
+        if msg_type == MessageType.SET_LINKS.value:
+            link_id, enabled = payload[0], payload[1]
+            if enabled:
+                self.link_mask |= 1 << link_id
+            else:
+                self.link_mask &= ~(1 << link_id)
+            return []
+
+        dsp_block = msg_type - MessageType.SET_INPUTS.value
+        if not 0 <= dsp_block <= 3:
+            return []
+        requested = payload[:8]
+        result = es9_predict_input_routing(self.inputs[dsp_block], requested, self.link_mask)
+        self.inputs[dsp_block] = result
+        return [RoutingConflict(dsp_block, ch, requested[ch], result[ch]) for ch in range(8) if requested[ch] != result[ch]]
+
+def es9_check_routing(current: es9_py_pb2.Configuration, messages: list[Message]) -> list[RoutingConflict]:
+    """
+    Every input the messages would route differently than requested,
+    when sent in order to a device in state current.
+    """
+    model = RoutingModel.from_configuration(current)
+    conflicts = []
+    for msg in messages:
+        conflicts += model.apply(msg)
+    return conflicts
+
+def es9_correct_routing(current: es9_py_pb2.Configuration, messages: list[Message]) -> tuple[list[Message], list[RoutingConflict]]:
+    """
+    Replace every SetInputsMessage whose routing the firmware would
+    rewrite by one requesting the routing it would produce, so that the
+    plan states exactly what the device will do. Returns the corrected
+    messages and the conflicts that were corrected.
+    """
+    model = RoutingModel.from_configuration(current)
+    corrected = []
+    conflicts = []
+    for msg in messages:
+        found = model.apply(msg)
+        if found:
+            dsp_block = msg.msg_type - MessageType.SET_INPUTS.value
+            msg = SetInputsMessage(dsp_block, model.inputs[dsp_block])
+            conflicts += found
+        corrected.append(msg)
+    return corrected, conflicts
@@ -0,0 +1,209 @@
+"""
+Named scenes and precompiled transitions between them.
+
+A scene is a named target Configuration, stored as protobuf text in
+<name>.textproto. For every ordered pair of scenes, the SceneStore
+precompiles the transition, the Set* messages plan_changes() finds
+between them, into a Burst: the complete SysEx messages back to back,
+as in a .syx file, stored under bursts/. Bursts are named after digests
+of the two scene files, so editing a scene invalidates every transition
+from or to it; stale bursts are removed whenever the store is compiled.
+
+Recalling a scene is then: hash two small files, read one burst, send
+it. No protobuf parsing or change planning happens before the messages
+go out. One configuration dump afterwards confirms the device reached
+the scene, and records it as the current scene for the next recall.
+"""
+
+import hashlib
+import os
+
+from google.protobuf import text_format
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    ES9_SYSEX_HEADER,
+    Message,
+
+    es9_py_pb2,
+)
+from planner import plan_changes
+
+SCENE_SUFFIX = '.textproto'
+BURST_SUFFIX = '.syx'
+
+_BURSTS_DIR = 'bursts'
+_CURRENT_FILE = 'current'
+_DIGEST_LENGTH = 16 # hex digits of the scene file digest used in burst names
+_TYPE_OFFSET = 1 + len(ES9_SYSEX_HEADER) # F0, then the header
+
+def es9_encode_burst(messages: list[Message]) -> bytes:
+    """
+    Concatenate messages into complete SysEx messages, F0 and F7 included.
+    """
+    return b''.join(b'\xF0' + msg.data + b'\xF7' for msg in messages)
+
+class Burst:
+    """
+    Ready-to-send messages, kept both as the SysEx byte stream and as
+    Messages wrapping slices of it.
+    """
+    __slots__ = ('data', 'messages')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        # SysEx data bytes are 7-bit, so F7 only ever ends a message
+        self.messages = tuple(Message.from_data(sysex[_TYPE_OFFSET], sysex[1:]) for sysex in data.split(b'\xF7')[:-1])
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+class SceneStore:
+    """
+    Directory of scene files, their precompiled transitions, and the
+    name of the scene the device was last confirmed to be in.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, _BURSTS_DIR), exist_ok=True)
+        self._bursts = {} # burst file name -> Burst, for long-lived stores
+
+    def _path(self, name: str) -> str:
+        assert name and os.sep not in name and not name.startswith('.'), f"Invalid scene name {name!r}"
+        return os.path.join(self.root, name + SCENE_SUFFIX)
+
+    def names(self) -> list[str]:
+        return sorted(name.removesuffix(SCENE_SUFFIX) for name in os.listdir(self.root) if name.endswith(SCENE_SUFFIX))
+
+    def digest(self, name: str) -> str:
+        """
+        Digest of the scene file, identifying this version of the scene.
+        """
+        try:
+            with open(self._path(name), 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()[:_DIGEST_LENGTH]
+        except FileNotFoundError:
+            raise KeyError(f"No scene named {name!r}") from None
+
+    def get(self, name: str) -> es9_py_pb2.Configuration:
+        try:
+            with open(self._path(name)) as f:
+                return text_format.Parse(f.read(), es9_py_pb2.Configuration())
+        except FileNotFoundError:
+            raise KeyError(f"No scene named {name!r}") from None
+
+    def put(self, name: str, config: es9_py_pb2.Configuration):
+        """
+        Store a scene, replacing any previous version, and precompile the
+        transitions from and to it.
+        """
+        path = self._path(name)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(text_format.MessageToString(config))
+        os.replace(tmp, path)
+        if self.current() == name:
+            self.set_current(None) # the device holds the previous version
+        self.compile()
+
+    def delete(self, name: str):
+        os.remove(self._path(name))
+        if self.current() == name:
+            self.set_current(None)
+        self.compile()
+
+    def current(self) -> str | None:
+        """
+        The scene the device was last confirmed to be in, if known.
+        """
+        try:
+            with open(os.path.join(self.root, _CURRENT_FILE)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name if name in self.names() else None
+
+    def set_current(self, name: str | None):
+        with open(os.path.join(self.root, _CURRENT_FILE), 'w') as f:
+            f.write(f'{name}\n' if name is not None else '')
+
+    def _burst_name(self, source: str, target: str) -> str:
+        return f'{self.digest(source)}-{self.digest(target)}{BURST_SUFFIX}'
+
+    def compile(self) -> int:
+        """
+        Precompile the transition between every ordered pair of scenes and
+        remove bursts no current pair uses. Returns the number of bursts compiled.
+        """
+        names = self.names()
+        configs = {}
+        wanted = set()
+        compiled = 0
+        for source in names:
+            for target in names:
+                if source == target:
+                    continue
+                burst_name = self._burst_name(source, target)
+                wanted.add(burst_name)
+                path = os.path.join(self.root, _BURSTS_DIR, burst_name)
+                if os.path.exists(path):
+                    continue
+                for name in (source, target):
+                    if name not in configs:
+                        configs[name] = self.get(name)
+                data = es9_encode_burst(plan_changes(configs[source], configs[target]))
+                with open(f'{path}.tmp', 'wb') as f:
+                    f.write(data)
+                os.replace(f'{path}.tmp', path)
+                compiled += 1
+
+        for burst_name in os.listdir(os.path.join(self.root, _BURSTS_DIR)):
+            if burst_name not in wanted:
+                os.remove(os.path.join(self.root, _BURSTS_DIR, burst_name))
+                self._bursts.pop(burst_name, None)
+        return compiled
+
+    def transition(self, source: str, target: str) -> Burst:
+        """
+        The precompiled burst taking the device from scene source to scene
+        target, compiling it first if the store is out of date.
+        """
+        burst_name = self._burst_name(source, target)
+        burst = self._bursts.get(burst_name)
+        if burst is not None:
+            return burst
+
+        path = os.path.join(self.root, _BURSTS_DIR, burst_name)
+        if not os.path.exists(path):
+            logger.info(f"Transition {source} -> {target} is not compiled, compiling")
+            self.compile()
+        with open(path, 'rb') as f:
+            burst = self._bursts[burst_name] = Burst(f.read())
+        return burst
+
+async def es9_recall_scene(client, store: SceneStore, name: str, timeout: float | None = None) -> tuple[int, list[Message]]:
+    """
+    Move the device to a scene through an ES9Client. Sends the
+    precompiled burst from the current scene, or, when the current scene
+    is unknown, plans the changes from a configuration dump first.
+    Then confirms the result with one configuration dump.
+
+    Returns the number of messages sent and the messages that would
+    still be needed to reach the scene (empty when confirmed).
+    """
+    source = store.current()
+    if source == name:
+        messages = ()
+    elif source is not None:
+        messages = store.transition(source, name).messages
+    else:
+        logger.info(f"Current scene unknown, planning the recall of {name} from the device state")
+        messages = plan_changes(await client.request_configuration(timeout), store.get(name))
+    for msg in messages:
+        client.send(msg)
+
+    remaining = plan_changes(await client.request_configuration(timeout), store.get(name))
+    store.set_current(name if not remaining else None)
+    return len(messages), remaining
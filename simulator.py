@@ -0,0 +1,253 @@
+"""
+In-process ES-9 simulator.
+
+ES9Simulator implements the firmware side of every MessageType: it keeps
+the device state as configuration dump words, applies Set* and
+ApplyConfigurationDump messages to them with the firmware model in
+interface.py (es9_apply_message_to_configuration_words), and answers
+requests with reports encoded exactly as the hardware sends them.
+
+The simulator can run on any pair of mido-style ports, e.g. virtual ports
+opened with mido.open_input(name, virtual=True), or on an in-memory
+LoopbackPort pair that can model the bandwidth and latency of a MIDI link:
+
+    to_device, from_device = loopback_ports(bytes_per_second=MIDI_DIN_BYTES_PER_SECOND)
+    asyncio.create_task(ES9Simulator().run(to_device, from_device))
+    async with ES9Client(to_device, from_device) as client:
+        ...
+"""
+
+import asyncio
+import mido
+import time
+
+from array import array
+from collections import deque
+
+import codec
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_OFFSET_MIX,
+    CONFIGURATION_DUMP_OFFSET_ROUTE_IN,
+    CONFIGURATION_DUMP_OFFSET_ROUTE_OUT,
+    CONFIGURATION_DUMP_WORD_COUNT,
+    ES9_SYSEX_HEADER,
+    MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL,
+    MAP_ES9_OUTPUT_ROUTE_ID_BY_CHANNEL,
+    MIX_DUMP_CROSSPOINT_COUNT,
+    MessageType,
+
+    es9_apply_message_to_configuration_words,
+    es9_decode_configuration_words,
+
+    es9_py_pb2,
+)
+
+_PAYLOAD_START = len(ES9_SYSEX_HEADER) + 1
+
+DEFAULT_VERSION_STRING = 'v1.2.0'
+DEFAULT_SAMPLE_RATE_HZ = 48000
+DEFAULT_USAGE = (0.25, 0.25, 0.25, 0.25)
+
+def es9_default_configuration_words() -> array:
+    """
+    Words of the simulator's power-on state: DSP block inputs routed from
+    the physical inputs, outputs routed to the buses, everything else zero.
+    """
+    words = array('I', [0]) * CONFIGURATION_DUMP_WORD_COUNT
+    for i in range(32):
+        words[CONFIGURATION_DUMP_OFFSET_ROUTE_IN + i] = MAP_ES9_INPUT_ROUTE_ID_BY_CHANNEL[es9_py_pb2.Channel.CHANNEL_INPUT_1 + i % 14]
+        words[CONFIGURATION_DUMP_OFFSET_ROUTE_OUT + i] = MAP_ES9_OUTPUT_ROUTE_ID_BY_CHANNEL[es9_py_pb2.Channel.CHANNEL_BUS_1 + i % 16]
+    return words
+
+class ES9Simulator:
+    """
+    Firmware model of one ES-9.
+
+    handle() takes one received SysEx message (mido data, without F0/F7)
+    and returns the list of replies, in the same form.
+    """
+    def __init__(self, words=None, version_string: str = DEFAULT_VERSION_STRING, sample_rate_hz: int = DEFAULT_SAMPLE_RATE_HZ, usage: tuple[float, ...] = DEFAULT_USAGE):
+        assert len(version_string) == 6, "Version string must be 6 characters"
+        self._initial_words = array('I', es9_default_configuration_words() if words is None else words)
+        assert len(self._initial_words) == CONFIGURATION_DUMP_WORD_COUNT, "Invalid word count for configuration dump"
+        self.words = array('I', self._initial_words)
+        self.dump_header = bytearray(CONFIGURATION_DUMP_HEADER_LENGTH)
+        self.virtual_mix = bytearray(32) # vmix, vpan for each of the 16 mixes
+        self.version_string = version_string
+        self.sample_rate_hz = sample_rate_hz
+        self.usage = usage
+        self._slots = {}
+
+        self.received = 0
+        self.ignored = 0
+
+        self._handlers = {
+            MessageType.APPLY_CONFIGURATION_DUMP.value: self._apply_configuration_dump,
+            MessageType.REQUEST_VERSION_STRING.value: self._request_version_string,
+            MessageType.REQUEST_CONFIGURATION_DUMP.value: self._request_configuration_dump,
+            MessageType.REQUEST_SAVE.value: self._request_save,
+            MessageType.REQUEST_RESTORE.value: self._request_restore,
+            MessageType.REQUEST_RESET.value: self._request_reset,
+            MessageType.REQUEST_MIX.value: self._request_mix,
+            MessageType.REQUEST_USAGE.value: self._request_usage,
+            MessageType.REQUEST_SAMPLE_RATE.value: self._request_sample_rate,
+            MessageType.SET_HPF.value: self._set,
+            MessageType.SET_OPTIONS.value: self._set,
+            MessageType.SET_LINKS.value: self._set,
+            MessageType.SET_VIRTUAL_MIX.value: self._set_virtual_mix,
+            MessageType.SET_MIDI_CHANNELS.value: self._set,
+            MessageType.SET_DC_OFFSET.value: self._set,
+            MessageType.SET_FILTER.value: self._set,
+            MessageType.SET_SMOOTHING.value: self._set,
+        }
+        for i in range(4):
+            self._handlers[MessageType.SET_INPUTS.value + i] = self._set
+            self._handlers[MessageType.SET_OUTPUTS.value + i] = self._set
+        for i in range(16):
+            self._handlers[MessageType.SET_MIX.value + i] = self._set
+
+    def configuration(self) -> es9_py_pb2.Configuration:
+        return es9_decode_configuration_words(self.words)
+
+    def handle(self, data: bytes) -> list[bytes]:
+        if not data.startswith(ES9_SYSEX_HEADER) or len(data) < _PAYLOAD_START:
+            return []
+
+        msg_type = data[_PAYLOAD_START - 1]
+        handler = self._handlers.get(msg_type)
+        if handler is None:
+            logger.warning(f"Simulator ignoring unknown message type: {msg_type:02X}")
+            self.ignored += 1
+            return []
+
+        self.received += 1
+        try:
+            return handler(msg_type, data[_PAYLOAD_START:]) or []
+        except (AssertionError, IndexError, ValueError) as e:
+            logger.warning(f"Simulator ignoring malformed message of type {msg_type:02X}: {e}")
+            self.ignored += 1
+            return []
+
+    async def run(self, input, output, poll_interval: float = 0.001):
+        """
+        Serve requests from a mido-style input port, sending replies to a
+        mido-style output port, until cancelled.
+        """
+        while True:
+            for msg in input.iter_pending():
+                if msg.type == 'sysex':
+                    for reply in self.handle(bytes(msg.data)):
+                        output.send(mido.Message('sysex', data=reply))
+            await asyncio.sleep(poll_interval)
+
+    # reports
+
+    def _report(self, message_type: MessageType, payload: bytes) -> bytes:
+        # mido data of the report: header, type and payload, without F0/F7
+        return ES9_SYSEX_HEADER + bytes((message_type.value,)) + payload
+
+    def _report_message(self, text: str) -> list[bytes]:
+        return [self._report(MessageType.REPORT_MESSAGE, text.encode('ascii') + b'\0')]
+
+    def configuration_dump_payload(self) -> bytes:
+        payload = bytearray(CONFIGURATION_DUMP_HEADER_LENGTH + CONFIGURATION_DUMP_WORD_COUNT * codec.WORD_SIZE)
+        payload[:CONFIGURATION_DUMP_HEADER_LENGTH] = self.dump_header
+        codec.encode_words_into(payload, self.words, CONFIGURATION_DUMP_HEADER_LENGTH)
+        return bytes(payload)
+
+    def mix_dump_payload(self) -> bytes:
+        crosspoints = self.words[CONFIGURATION_DUMP_OFFSET_MIX:CONFIGURATION_DUMP_OFFSET_MIX + MIX_DUMP_CROSSPOINT_COUNT]
+        return codec.encode_words(crosspoints) + bytes(self.virtual_mix)
+
+    def _request_version_string(self, msg_type: int, payload: bytes):
+        return self._report_message(self.version_string)
+
+    def _request_configuration_dump(self, msg_type: int, payload: bytes):
+        return [self._report(MessageType.REPORT_CONFIGURATION_DUMP, self.configuration_dump_payload())]
+
+    def _request_mix(self, msg_type: int, payload: bytes):
+        return [self._report(MessageType.REPORT_MIX, self.mix_dump_payload())]
+
+    def _request_usage(self, msg_type: int, payload: bytes):
+        report = bytearray()
+        for usage in self.usage:
+            value = min(round(usage * 4096.0), 0x3FFF)
+            report += bytes((value >> 7, value & 0x7F))
+        return [self._report(MessageType.REPORT_USAGE, bytes(report))]
+
+    def _request_sample_rate(self, msg_type: int, payload: bytes):
+        return [self._report(MessageType.REPORT_SAMPLE_RATE, codec.encode_word(self.sample_rate_hz // 4))]
+
+    def _request_save(self, msg_type: int, payload: bytes):
+        self._slots[payload[0]] = array('I', self.words)
+        return self._report_message('Saved')
+
+    def _request_restore(self, msg_type: int, payload: bytes):
+        self.words = array('I', self._slots.get(payload[0], self._initial_words))
+        return self._report_message('Restored')
+
+    def _request_reset(self, msg_type: int, payload: bytes):
+        self.words = array('I', self._initial_words)
+        self.dump_header = bytearray(CONFIGURATION_DUMP_HEADER_LENGTH)
+        self.virtual_mix = bytearray(32)
+        return self._report_message('Reset')
+
+    # state changes
+
+    def _apply_configuration_dump(self, msg_type: int, payload: bytes):
+        es9_apply_message_to_configuration_words(self.words, msg_type, payload)
+        self.dump_header[1] = payload[1]
+
+    def _set(self, msg_type: int, payload: bytes):
+        es9_apply_message_to_configuration_words(self.words, msg_type, payload)
+
+    def _set_virtual_mix(self, msg_type: int, payload: bytes):
+        # the message format is not known yet (see SetVirtualMixMessage)
+        logger.debug("Simulator ignoring SET_VIRTUAL_MIX")
+
+class LoopbackPort:
+    """
+    One direction of an in-memory MIDI link with mido-style send() and
+    iter_pending(). Messages become pending in order, after their wire time
+    at bytes_per_second (None for unlimited) plus a fixed latency.
+    """
+    def __init__(self, bytes_per_second: float | None = None, latency: float = 0.0):
+        self._bytes_per_second = bytes_per_second
+        self._latency = latency
+        self._queue = deque() # (deliver_at, message)
+        self._wire_free_at = 0.0
+
+        self.sent_messages = 0
+        self.sent_bytes = 0
+
+    def send(self, msg: mido.Message):
+        now = time.monotonic()
+        wire_length = len(msg.bin())
+        done = now
+        if self._bytes_per_second:
+            done = max(now, self._wire_free_at) + wire_length / self._bytes_per_second
+            self._wire_free_at = done
+        self._queue.append((done + self._latency, msg))
+        self.sent_messages += 1
+        self.sent_bytes += wire_length
+
+    def iter_pending(self):
+        now = time.monotonic()
+        queue = self._queue
+        while queue and queue[0][0] <= now:
+            yield queue.popleft()[1]
+
+    def poll(self) -> mido.Message | None:
+        return next(self.iter_pending(), None)
+
+def loopback_ports(bytes_per_second: float | None = None, latency: float = 0.0) -> tuple[LoopbackPort, LoopbackPort]:
+    """
+    Return (to_device, from_device): the host sends on to_device and
+    receives on from_device, the simulator does the opposite.
+    """
+    return LoopbackPort(bytes_per_second, latency), LoopbackPort(bytes_per_second, latency)
@@ -0,0 +1,266 @@
+"""
+Content-addressed on-disk store of ES-9 device state.
+
+A snapshot holds the unpacked words of a configuration dump and of a mix
+dump in a small binary file:
+
+    offset  size  field
+    0       4     magic b'ES9S'
+    4       1     format version
+    5       1     reserved (0)
+    6       2     configuration dump header bytes, as received
+    8       2     configuration word count (little-endian)
+    10      2     mix word count (little-endian)
+    12      4*n   configuration words, then mix words (little-endian uint32)
+
+Files are named after the SHA-256 of their content, so saving the same
+state twice stores it once. Snapshots are memory-mapped and their words
+exposed as memoryviews, so loading one is an open and an mmap; two
+snapshots are equal exactly when their digests are, and a field-level
+diff only decodes the words that differ.
+
+Snapshots saved before the full dump was stored hold only the words the
+layout describes. They load padded with zero words; configuration_word_count
+tells how many words were stored, so a full restore can take the rest
+from the device.
+
+index.tsv records every save (time, digest, label) in order, including
+repeated saves of the same content.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+
+from array import array
+
+import codec
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_WORD_COUNT,
+    MIX_DUMP_WORD_COUNT,
+    MessageType,
+
+    RequestConfigurationDumpMessage,
+    RequestMixMessage,
+
+    es9_decode_configuration_words,
+    es9_decode_mix_words,
+    es9_unpack_mix_dump_words,
+
+    es9_py_pb2,
+)
+from tracker import (
+    Change,
+    ConfigurationDumpTracker,
+)
+
+SNAPSHOT_MAGIC = b'ES9S'
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = '.es9snap'
+
+_HEADER = struct.Struct('<4sBx2sHH')
+_INDEX_FILE = 'index.tsv'
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+_CONFIGURATION_DIFF = ConfigurationDumpTracker() # only its word -> fields index is used
+
+def es9_encode_snapshot(configuration_words, mix_words, dump_header: bytes = bytes(CONFIGURATION_DUMP_HEADER_LENGTH)) -> bytes:
+    assert len(configuration_words) == CONFIGURATION_DUMP_WORD_COUNT, "Invalid word count for configuration dump"
+    assert len(mix_words) == MIX_DUMP_WORD_COUNT, "Invalid word count for mix dump"
+    assert len(dump_header) == CONFIGURATION_DUMP_HEADER_LENGTH, "Invalid configuration dump header length"
+    words = array('I', configuration_words)
+    words.extend(mix_words)
+    if not _LITTLE_ENDIAN:
+        words.byteswap()
+    return _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, bytes(dump_header), CONFIGURATION_DUMP_WORD_COUNT, MIX_DUMP_WORD_COUNT) + words.tobytes()
+
+class Snapshot:
+    """
+    A stored snapshot, memory-mapped on first access.
+    Use as a context manager, or call close(), to release the mapping.
+
+    configuration_words and mix_words are memoryviews of the mapping and
+    become invalid on close(). Copy what must outlive the snapshot, e.g.
+    with array('I', ...). If slices of them are still alive at close(),
+    the mapping is unmapped only once the last slice is released.
+    """
+    def __init__(self, path: str, digest: str):
+        self.path = path
+        self.digest = digest
+        self._file = None
+        self._mmap = None
+        self._views = None # (header, configuration words, mix words, stored configuration word count)
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Snapshot) and self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def _load(self):
+        if self._views is not None:
+            return self._views
+
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, dump_header, configuration_count, mix_count = _HEADER.unpack_from(self._mmap)
+        assert magic == SNAPSHOT_MAGIC, f"Not an ES-9 snapshot: {self.path}"
+        assert version == SNAPSHOT_FORMAT_VERSION, f"Unsupported snapshot format version {version}: {self.path}"
+
+        body = memoryview(self._mmap)[_HEADER.size:]
+        if _LITTLE_ENDIAN:
+            words = body.cast('I')
+        else:
+            words = array('I', body)
+            words.byteswap()
+        configuration_words = words[:configuration_count]
+        if configuration_count < CONFIGURATION_DUMP_WORD_COUNT:
+            configuration_words = array('I', configuration_words)
+            configuration_words.extend([0] * (CONFIGURATION_DUMP_WORD_COUNT - configuration_count))
+        self._views = (dump_header, configuration_words, words[configuration_count:configuration_count + mix_count], configuration_count)
+        return self._views
+
+    def close(self):
+        if self._views is not None:
+            for view in self._views[1:3]:
+                if isinstance(view, memoryview):
+                    view.release()
+            self._views = None
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass # views derived from the words are still alive; unmapped when they are released
+            self._mmap = None
+            self._file.close()
+
+    @property
+    def dump_header(self) -> bytes:
+        return self._load()[0]
+
+    @property
+    def configuration_words(self):
+        return self._load()[1]
+
+    @property
+    def mix_words(self):
+        return self._load()[2]
+
+    @property
+    def configuration_word_count(self) -> int:
+        """
+        Number of configuration words stored; less than
+        CONFIGURATION_DUMP_WORD_COUNT for snapshots of an older format.
+        """
+        return self._load()[3]
+
+    def configuration(self) -> es9_py_pb2.Configuration:
+        return es9_decode_configuration_words(self.configuration_words)
+
+    def mix_configuration(self) -> es9_py_pb2.MixConfiguration:
+        return es9_decode_mix_words(self.mix_words)
+
+    def diff(self, other: 'Snapshot') -> list[Change]:
+        """
+        Configuration fields that differ from self to other.
+        """
+        if self == other:
+            return []
+        return _CONFIGURATION_DIFF.diff(self.configuration_words, other.configuration_words)
+
+class SnapshotEntry:
+    __slots__ = ('timestamp', 'digest', 'label')
+
+    def __init__(self, timestamp: float, digest: str, label: str):
+        self.timestamp = timestamp
+        self.digest = digest
+        self.label = label
+
+class SnapshotStore:
+    """
+    Directory of snapshot files named by content digest, plus the index
+    of saves.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest + SNAPSHOT_SUFFIX)
+
+    def put(self, configuration_words, mix_words, dump_header: bytes = bytes(CONFIGURATION_DUMP_HEADER_LENGTH), label: str = '') -> str:
+        """
+        Store a snapshot and record it in the index. Returns its digest.
+        """
+        data = es9_encode_snapshot(configuration_words, mix_words, dump_header)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            tmp = f'{path}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+        label = label.replace('\t', ' ').replace('\n', ' ')
+        with open(os.path.join(self.root, _INDEX_FILE), 'a') as f:
+            f.write(f'{time.time():.3f}\t{digest}\t{label}\n')
+        return digest
+
+    def digests(self) -> list[str]:
+        """
+        Digests of every stored snapshot, in no particular order.
+        """
+        return [name.removesuffix(SNAPSHOT_SUFFIX) for name in os.listdir(self.root) if name.endswith(SNAPSHOT_SUFFIX)]
+
+    def entries(self) -> list[SnapshotEntry]:
+        """
+        Every save recorded in the index, oldest first.
+        """
+        try:
+            with open(os.path.join(self.root, _INDEX_FILE)) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            timestamp, digest, label = line.split('\t', 2)
+            entries.append(SnapshotEntry(float(timestamp), digest, label))
+        return entries
+
+    def resolve(self, prefix: str) -> str:
+        """
+        Expand a unique digest prefix to the full digest.
+        """
+        matches = [digest for digest in self.digests() if digest.startswith(prefix)]
+        if len(matches) != 1:
+            raise KeyError(f"{'No' if not matches else 'Ambiguous'} snapshot matching {prefix!r}")
+        return matches[0]
+
+    def get(self, digest: str) -> Snapshot:
+        """
+        Open a snapshot by digest or unique digest prefix.
+        """
+        if not os.path.exists(self._path(digest)):
+            digest = self.resolve(digest)
+        return Snapshot(self._path(digest), digest)
+
+async def es9_capture_snapshot_words(client, timeout: float | None = None) -> tuple[array, array, bytes]:
+    """
+    Request both dumps through an ES9Client and return
+    (configuration words, mix words, configuration dump header).
+    """
+    payload = await client.request(RequestConfigurationDumpMessage(), MessageType.REPORT_CONFIGURATION_DUMP, timeout)
+    configuration_words = codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:])
+    assert len(configuration_words) >= CONFIGURATION_DUMP_WORD_COUNT, "Invalid word count for configuration dump"
+    mix_payload = await client.request(RequestMixMessage(), MessageType.REPORT_MIX, timeout)
+    mix_words = es9_unpack_mix_dump_words(mix_payload)
+    return configuration_words[:CONFIGURATION_DUMP_WORD_COUNT], mix_words, bytes(payload[:CONFIGURATION_DUMP_HEADER_LENGTH])
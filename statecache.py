@@ -0,0 +1,153 @@
+"""
+Local cache of ES-9 device state.
+
+StateCache holds the configuration dump words last reported by the
+device and keeps them current by applying our own outgoing Set* messages
+to them, using the firmware model of interface.py, and by taking in
+every configuration or mix report that arrives. A configuration dump
+shorter than CONFIGURATION_DUMP_WORD_COUNT words that still covers the
+layout keeps the remaining words from the previous state; a shorter one
+invalidates the cache. A message the model
+cannot apply (a reset, a restore, an unknown or malformed message)
+invalidates the cache, since the device state is then unknown. Each change bumps a generation
+counter. A cache is fresh while it is valid and its last report from the
+device is younger than ttl; only then are reads served locally.
+"""
+
+import time
+
+from array import array
+
+import codec
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_LAYOUT_WORD_COUNT,
+    CONFIGURATION_DUMP_OFFSET_MIX,
+    CONFIGURATION_DUMP_WORD_COUNT,
+    ES9_SYSEX_HEADER,
+    MIX_DUMP_CROSSPOINT_COUNT,
+    Message,
+    MessageType,
+
+    es9_apply_message_to_configuration_words,
+    es9_decode_configuration_words,
+    es9_unpack_mix_dump_words,
+
+    es9_py_pb2,
+)
+from view import ConfigurationView
+
+DEFAULT_TTL = 30.0 # seconds
+
+_PAYLOAD_START = len(ES9_SYSEX_HEADER) + 1
+
+class StateCache:
+    """
+    Configuration dump words mirrored from the device, see the module
+    docstring. generation changes whenever the cached state does.
+    """
+    def __init__(self, ttl: float | None = DEFAULT_TTL):
+        self.ttl = ttl # None: never expires
+        self.generation = 0
+        self.updated_at = None # time.monotonic() of the last configuration report
+        self.hits = 0
+        self.misses = 0
+        self._words = None # cached configuration dump words, None while invalid
+        self._decoded = None # (generation, Configuration)
+        self._view = None # (generation, ConfigurationView)
+
+    @property
+    def valid(self) -> bool:
+        return self._words is not None
+
+    def fresh(self, max_age: float | None = None) -> bool:
+        """
+        Whether reads may be served locally: the cache is valid and the
+        last report is no older than max_age (default: the cache ttl).
+        """
+        if self._words is None:
+            return False
+        max_age = self.ttl if max_age is None else max_age
+        return max_age is None or time.monotonic() - self.updated_at <= max_age
+
+    @property
+    def words(self) -> array | None:
+        return self._words
+
+    def invalidate(self):
+        if self._words is not None:
+            self._words = None
+            self._decoded = None
+            self._view = None
+            self.generation += 1
+
+    def configuration(self) -> es9_py_pb2.Configuration:
+        """
+        Decoded configuration of the cached words, decoded once per generation.
+        Returns a copy, so callers may modify it.
+        """
+        assert self._words is not None, "State cache is not valid"
+        if self._decoded is None or self._decoded[0] != self.generation:
+            self._decoded = (self.generation, es9_decode_configuration_words(self._words))
+        config = es9_py_pb2.Configuration()
+        config.CopyFrom(self._decoded[1])
+        return config
+
+    def view(self) -> ConfigurationView:
+        """
+        Read-only view of the cached words, created once per generation.
+        The view holds a copy of the words, so later messages do not change it.
+        """
+        assert self._words is not None, "State cache is not valid"
+        if self._view is None or self._view[0] != self.generation:
+            self._view = (self.generation, ConfigurationView(array('I', self._words)))
+        return self._view[1]
+
+    def apply_sent(self, msg: Message):
+        """
+        Apply a message we sent to the device. Invalidates the cache when
+        the message is not fully modelled.
+        """
+        if self._words is None:
+            return
+        before = self._words.tobytes()
+        try:
+            modelled = es9_apply_message_to_configuration_words(self._words, msg.msg_type, msg.data[_PAYLOAD_START:])
+        except (IndexError, ValueError) as e:
+            logger.warning(f"State cache invalidated by a message of type {msg.msg_type:02X} it cannot apply: {e}")
+            modelled = False
+        if not modelled:
+            self.invalidate()
+        elif self._words.tobytes() != before:
+            self.generation += 1
+
+    def apply_report(self, message_type: int, payload: bytes):
+        """
+        Take in a report received from the device (payload as in ES9Client.dispatch).
+        """
+        if message_type == MessageType.REPORT_CONFIGURATION_DUMP.value:
+            words = codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:])
+            if len(words) < CONFIGURATION_DUMP_LAYOUT_WORD_COUNT:
+                logger.warning(f"State cache invalidated by a configuration dump of {len(words)} words, {CONFIGURATION_DUMP_LAYOUT_WORD_COUNT} are needed")
+                self.invalidate()
+                return
+            if len(words) < CONFIGURATION_DUMP_WORD_COUNT:
+                # the layout is complete; keep the words past the end from the previous state
+                logger.warning(f"Configuration dump of only {len(words)} words, keeping words {len(words)}-{CONFIGURATION_DUMP_WORD_COUNT - 1} from the previous state")
+                previous = self._words if self._words is not None else array('I', [0]) * CONFIGURATION_DUMP_WORD_COUNT
+                words.extend(previous[len(words):CONFIGURATION_DUMP_WORD_COUNT])
+            if self._words != words:
+                self._words = words
+                self.generation += 1
+            self.updated_at = time.monotonic()
+
+        elif message_type == MessageType.REPORT_MIX.value and self._words is not None:
+            crosspoints = es9_unpack_mix_dump_words(payload)[:MIX_DUMP_CROSSPOINT_COUNT]
+            start = CONFIGURATION_DUMP_OFFSET_MIX
+            if self._words[start:start + MIX_DUMP_CROSSPOINT_COUNT] != crosspoints:
+                self._words[start:start + MIX_DUMP_CROSSPOINT_COUNT] = crosspoints
+                self.generation += 1
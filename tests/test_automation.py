@@ -0,0 +1,41 @@
+"""
+AutomationEngine hands firmware smoothing back the way it found it.
+"""
+
+import asyncio
+import unittest
+
+from automation import AutomationEngine, Ramp
+from interface import SetSmoothingMessage
+
+def _smoothing(sent) -> list[bytes]:
+    return [msg.data for msg in sent if isinstance(msg, SetSmoothingMessage)]
+
+class AutomationSmoothingTest(unittest.TestCase):
+    def _engine(self, sent) -> AutomationEngine:
+        engine = AutomationEngine(sent.append, bytes_per_second=None, smoothing=True, previous_smoothing={0: True})
+        engine.add(Ramp(0, 0, 0, 1000, duration=0.2))
+        engine.add(Ramp(3, 0, 0, 1000, duration=0.2))
+        return engine
+
+    def test_restores_after_playback(self):
+        sent = []
+        asyncio.run(self._engine(sent).run())
+        self.assertEqual(_smoothing(sent), [msg.data for msg in (
+            SetSmoothingMessage(0, True), SetSmoothingMessage(3, True),
+            SetSmoothingMessage(0, True), SetSmoothingMessage(3, False),
+        )])
+
+    def test_restores_after_cancellation(self):
+        sent = []
+        async def run():
+            task = asyncio.create_task(self._engine(sent).run())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        asyncio.run(run())
+        self.assertEqual(_smoothing(sent)[-2:], [SetSmoothingMessage(0, True).data, SetSmoothingMessage(3, False).data])
+
+if __name__ == '__main__':
+    unittest.main()
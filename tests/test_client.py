@@ -0,0 +1,27 @@
+"""
+ES9Client request timeouts name the report that did not arrive.
+"""
+
+import asyncio
+import unittest
+
+from client import ES9Client
+
+class _Output:
+    def send(self, msg):
+        pass
+
+class _SilentInput:
+    def iter_pending(self):
+        return iter(())
+
+class ES9ClientTimeoutTest(unittest.TestCase):
+    def test_version_timeout_names_report_message(self):
+        async def run():
+            async with ES9Client(_Output(), _SilentInput(), timeout=0.01) as client:
+                await client.request_version()
+        with self.assertRaisesRegex(TimeoutError, r'^No REPORT_MESSAGE received in response to RequestVersionStringMessage$'):
+            asyncio.run(run())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+Configuration files with values the ES-9 cannot represent are rejected
+with ValueError naming the field.
+"""
+
+import os
+import tempfile
+import unittest
+
+from configfile import es9_compile_configuration_file
+from simulator import ES9Simulator
+
+class CompileConfigurationFileTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.current = ES9Simulator().configuration()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _compile(self, name: str, text: str):
+        path = os.path.join(self._dir.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return es9_compile_configuration_file(path, self.current)
+
+    def test_valid_file(self):
+        messages = self._compile('ok.toml', '[mixer1_crosspoint_configuration.output3_configuration]\ninput1_level = 8192\n')
+        self.assertEqual(len(messages), 1)
+
+    def test_level_out_of_range(self):
+        with self.assertRaisesRegex(ValueError, r'mixer1_crosspoint_configuration\.output3_configuration\.input1_level: 40000'):
+            self._compile('level.toml', '[mixer1_crosspoint_configuration.output3_configuration]\ninput1_level = 40000\n')
+
+    def test_channel_not_routable(self):
+        with self.assertRaisesRegex(ValueError, r'mixer1_routing_configuration\.input1_channel: CHANNEL_OUTPUT_1'):
+            self._compile('routing.json', '{"mixer1_routing_configuration": {"input1_channel": "OUTPUT_1"}}')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+"""
+DeviceManager.open closes every port it opened when a later pair fails.
+"""
+
+import unittest
+
+from unittest import mock
+
+from devices import DeviceManager
+
+class _Port:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class DeviceManagerOpenTest(unittest.TestCase):
+    def test_closes_opened_ports_on_failure(self):
+        opened = []
+        def open_port(name):
+            if name == 'missing':
+                raise OSError(f"No port {name}")
+            opened.append(_Port(name))
+            return opened[-1]
+
+        with mock.patch('devices.mido.open_output', open_port), mock.patch('devices.mido.open_input', open_port):
+            with self.assertRaises(OSError):
+                DeviceManager.open([('a', 'a out', 'a in'), ('b', 'b out', 'missing')])
+        self.assertEqual([port.name for port in opened], ['a out', 'a in', 'b out'])
+        self.assertTrue(all(port.closed for port in opened))
+
+if __name__ == '__main__':
+    unittest.main()
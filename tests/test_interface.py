@@ -0,0 +1,169 @@
+"""
+Round trips between configuration dumps, Configuration messages and the
+ApplyConfigurationDump upload, on dumps in the file format the Expert
+Sleepers configurator saves (F0, header, type, dump header, 768 words, F7).
+"""
+
+import random
+import unittest
+
+from array import array
+
+import codec
+
+from interface import (
+    APPLY_CONFIGURATION_DUMP_CHUNK_COUNT,
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_LAYOUT,
+    CONFIGURATION_DUMP_OFFSET_FILTERS,
+    CONFIGURATION_DUMP_WORD_COUNT,
+    ES9_SYSEX_HEADER,
+    MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID,
+    MAP_ES9_CHANNEL_BY_OUTPUT_ROUTE_ID,
+    MessageType,
+
+    es9_configuration_dump_messages,
+    es9_decode_configuration_words,
+    es9_encode_configuration_dump,
+    es9_encode_configuration_words,
+    es9_parse_configuration_dump,
+    es9_try_recover_channel_from_input_route_id,
+    es9_try_recover_channel_from_output_route_id,
+
+    es9_py_pb2,
+)
+from client import ES9Client
+from demux import SysExDemux
+from simulator import ES9Simulator
+
+DUMP_FILE_HEADER_LENGTH = 1 + len(ES9_SYSEX_HEADER) + 1 + CONFIGURATION_DUMP_HEADER_LENGTH
+
+def random_dump_words(seed: int) -> array:
+    """
+    Dump words with a valid random value in every layout field, and
+    random words past the layout.
+    """
+    rng = random.Random(seed)
+    input_route_ids = sorted(MAP_ES9_CHANNEL_BY_INPUT_ROUTE_ID)
+    output_route_ids = sorted(MAP_ES9_CHANNEL_BY_OUTPUT_ROUTE_ID)
+    words = array('I', (rng.randrange(codec.WORD_MASK + 1) for _ in range(CONFIGURATION_DUMP_WORD_COUNT)))
+    for path, word, shift, mask, transform in CONFIGURATION_DUMP_LAYOUT:
+        if transform is es9_try_recover_channel_from_input_route_id:
+            value = rng.choice(input_route_ids)
+        elif transform is es9_try_recover_channel_from_output_route_id:
+            value = rng.choice(output_route_ids)
+        elif path[-1] == 'filter_type':
+            value = rng.randrange(8)
+        else:
+            value = rng.randrange(mask + 1)
+        words[word] = (words[word] & ~(mask << shift)) | (value << shift)
+    return words
+
+def dump_file(words, header: bytes) -> bytes:
+    return b'\xF0' + ES9_SYSEX_HEADER + bytes((MessageType.REPORT_CONFIGURATION_DUMP.value,)) + header + codec.encode_words(words) + b'\xF7'
+
+def configurator_upload(dump: bytes) -> list[bytes]:
+    """
+    The messages the configurator's uploadConfig() sends for a dump file.
+    """
+    words_per_chunk = CONFIGURATION_DUMP_WORD_COUNT // 24
+    chunks = []
+    for i in range(24):
+        pos = DUMP_FILE_HEADER_LENGTH + codec.WORD_SIZE * words_per_chunk * i
+        chunk = bytearray(dump[:DUMP_FILE_HEADER_LENGTH] + dump[pos:pos + codec.WORD_SIZE * words_per_chunk] + b'\xF7')
+        chunk[5] = MessageType.APPLY_CONFIGURATION_DUMP.value
+        chunk[6] = i
+        chunks.append(bytes(chunk))
+    return chunks
+
+class ConfigurationDumpRoundTripTest(unittest.TestCase):
+    header = bytes((0x00, 0x03))
+
+    def test_dump_file_length(self):
+        dump = dump_file(random_dump_words(0), self.header)
+        self.assertEqual(len(dump), 8 + 3*768 + 1)
+
+    def test_words_round_trip(self):
+        for seed in range(8):
+            words = random_dump_words(seed)
+            config = es9_decode_configuration_words(words)
+            self.assertEqual(es9_encode_configuration_words(config, words), words)
+            self.assertEqual(es9_decode_configuration_words(es9_encode_configuration_words(config)), config)
+
+    def test_payload_round_trip(self):
+        for seed in range(8):
+            words = random_dump_words(seed)
+            payload = dump_file(words, self.header)[DUMP_FILE_HEADER_LENGTH - CONFIGURATION_DUMP_HEADER_LENGTH:-1]
+            config = es9_parse_configuration_dump(payload)
+            self.assertEqual(es9_encode_configuration_dump(config, words, self.header), payload)
+
+    def test_partial_configuration_keeps_base(self):
+        words = random_dump_words(1)
+        self.assertEqual(es9_encode_configuration_words(es9_py_pb2.Configuration(), words), words)
+
+        config = es9_py_pb2.Configuration()
+        config.mix_input_filter_configuration.mix2_filter3.frequency_hz = 1234
+        encoded = es9_encode_configuration_words(config, words)
+        offset = CONFIGURATION_DUMP_OFFSET_FILTERS + (1*4 + 2) * 4
+        self.assertEqual(encoded[offset + 1], 1234)
+        self.assertEqual(encoded[offset] >> 1 & 0x07, words[offset] >> 1 & 0x07)
+
+    def test_empty_configuration(self):
+        words = es9_encode_configuration_words(es9_py_pb2.Configuration())
+        self.assertEqual(len(words), CONFIGURATION_DUMP_WORD_COUNT)
+
+class ConfigurationDumpReceiveTest(unittest.TestCase):
+    """
+    A dump framed exactly as the configurator receives and saves it (its
+    onMIDIMessage accepts it, parseConfigDump reads (length - 8 - 1) / 3
+    words from offset 8), through the receive paths.
+    """
+    header = bytes((0x00, 0x03))
+
+    def setUp(self):
+        self.words = random_dump_words(4)
+        self.dump = dump_file(self.words, self.header)
+        self.assertEqual(len(self.dump), 2313)
+
+    def test_demux_feed(self):
+        payloads = []
+        demux = SysExDemux()
+        demux.register(MessageType.REPORT_CONFIGURATION_DUMP, lambda payload: payloads.append(bytes(payload)))
+        for i in range(0, len(self.dump), 100):
+            demux.feed(self.dump[i:i + 100])
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(es9_parse_configuration_dump(payloads[0]), es9_decode_configuration_words(self.words))
+
+    def test_demux_dispatch(self):
+        payloads = []
+        demux = SysExDemux()
+        demux.register(MessageType.REPORT_CONFIGURATION_DUMP, lambda payload: payloads.append(bytes(payload)))
+        demux.dispatch(self.dump[1:-1]) # mido sysex data
+        self.assertEqual(es9_parse_configuration_dump(payloads[0]), es9_decode_configuration_words(self.words))
+
+    def test_client_dispatch(self):
+        client = ES9Client(None, None)
+        client.dispatch(self.dump[1:-1])
+        self.assertEqual(client.state.words, self.words)
+
+class ConfigurationDumpUploadTest(unittest.TestCase):
+    header = bytes((0x00, 0x03))
+
+    def test_matches_configurator_upload(self):
+        words = random_dump_words(2)
+        config = es9_decode_configuration_words(words)
+        messages = list(es9_configuration_dump_messages(config, words, self.header))
+        self.assertEqual(len(messages), APPLY_CONFIGURATION_DUMP_CHUNK_COUNT)
+        self.assertEqual([b'\xF0' + msg.data + b'\xF7' for msg in messages], configurator_upload(dump_file(words, self.header)))
+
+    def test_simulator_loads_upload(self):
+        words = random_dump_words(3)
+        simulator = ES9Simulator()
+        for msg in es9_configuration_dump_messages(es9_decode_configuration_words(words), words, self.header):
+            simulator.handle(msg.data)
+        self.assertEqual(simulator.ignored, 0)
+        self.assertEqual(simulator.words, words)
+        self.assertEqual(simulator.dump_header[1], self.header[1])
+
+if __name__ == '__main__':
+    unittest.main()
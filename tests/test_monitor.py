@@ -0,0 +1,48 @@
+"""
+UsageMonitor keeps polling through malformed usage reports.
+"""
+
+import asyncio
+import unittest
+
+from client import ES9Client
+from monitor import UsageMonitor
+from simulator import (
+    ES9Simulator,
+
+    loopback_ports,
+)
+
+class _TruncatingSimulator(ES9Simulator):
+    """
+    Sends its first usage report one byte short.
+    """
+    truncated = False
+
+    def _request_usage(self, msg_type: int, payload: bytes):
+        replies = super()._request_usage(msg_type, payload)
+        if not self.truncated:
+            self.truncated = True
+            return [replies[0][:-1]]
+        return replies
+
+class UsageMonitorTest(unittest.TestCase):
+    def test_malformed_report_does_not_stop_polling(self):
+        async def run():
+            output, input = loopback_ports(None, 0.001)
+            task = asyncio.create_task(_TruncatingSimulator().run(output, input))
+            try:
+                async with ES9Client(output, input, timeout=1.0) as client:
+                    monitor = UsageMonitor(client, interval=0.01, sample_rate_every=0)
+                    polling = asyncio.create_task(monitor.run())
+                    await asyncio.sleep(0.3)
+                    polling.cancel()
+                    return monitor
+            finally:
+                task.cancel()
+        monitor = asyncio.run(run())
+        self.assertEqual(monitor.parse_errors, 1)
+        self.assertGreater(len(monitor.samples), 0)
+
+if __name__ == '__main__':
+    unittest.main()
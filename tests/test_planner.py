@@ -0,0 +1,40 @@
+"""
+plan_changes on partial targets, which leave unspecified fields alone.
+"""
+
+import unittest
+
+from interface import (
+    SetFilterMessage,
+
+    es9_py_pb2,
+)
+from planner import plan_changes
+
+_Channel = es9_py_pb2.Channel
+_FilterType = es9_py_pb2.FilterType
+
+class PlanChangesTest(unittest.TestCase):
+    def test_routing_block_with_unspecified_channels_is_skipped(self):
+        current = es9_py_pb2.Configuration()
+        current.mixer1_routing_configuration.input1_channel = _Channel.CHANNEL_INPUT_1
+        current.mixer1_routing_configuration.input2_channel = _Channel.CHANNEL_INPUT_2
+        target = es9_py_pb2.Configuration()
+        target.mixer1_routing_configuration.input1_channel = _Channel.CHANNEL_INPUT_3
+        self.assertEqual([msg.data for msg in plan_changes(current, target)], [])
+
+    def test_filter_type_falls_back_to_current(self):
+        current = es9_py_pb2.Configuration()
+        current.mix_input_filter_configuration.mix1_filter1.filter_type = _FilterType.PEAK
+        target = es9_py_pb2.Configuration()
+        target.mix_input_filter_configuration.mix1_filter1.frequency_hz = 1000
+        messages = plan_changes(current, target)
+        self.assertEqual([msg.data for msg in messages], [SetFilterMessage(0, 0, False, _FilterType.PEAK, 1000, 0, 0).data])
+
+    def test_filter_type_unspecified_in_both_is_skipped(self):
+        target = es9_py_pb2.Configuration()
+        target.mix_input_filter_configuration.mix1_filter1.frequency_hz = 1000
+        self.assertEqual(plan_changes(es9_py_pb2.Configuration(), target), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+ES9Simulator reports are framed as the hardware sends them, which the
+Expert Sleepers configurator reads with data.slice(6, -1) on the
+complete SysEx message (F0 ... F7).
+"""
+
+import unittest
+
+from interface import (
+    ES9_SYSEX_HEADER,
+    MessageType,
+
+    RequestConfigurationDumpMessage,
+    RequestSampleRateMessage,
+    RequestUsageMessage,
+    RequestVersionStringMessage,
+)
+from simulator import ES9Simulator
+
+def _sysex(simulator: ES9Simulator, msg) -> bytes:
+    # the complete SysEx message of the single reply, as the configurator receives it
+    (reply,) = simulator.handle(msg.data)
+    return b'\xF0' + reply + b'\xF7'
+
+class ReportFramingTest(unittest.TestCase):
+    def setUp(self):
+        self.simulator = ES9Simulator()
+
+    def test_configuration_dump(self):
+        data = _sysex(self.simulator, RequestConfigurationDumpMessage())
+        self.assertEqual(len(data), 8 + 3*768 + 1)
+        self.assertEqual(data[1:5], ES9_SYSEX_HEADER)
+        self.assertEqual(data[5], MessageType.REPORT_CONFIGURATION_DUMP.value)
+
+    def test_usage(self):
+        data = _sysex(self.simulator, RequestUsageMessage())
+        self.assertEqual(data[5], MessageType.REPORT_USAGE.value)
+        self.assertEqual(len(data[6:-1]), 8)
+
+    def test_sample_rate(self):
+        data = _sysex(self.simulator, RequestSampleRateMessage())
+        payload = data[6:-1]
+        self.assertEqual(((payload[0] << 14) | (payload[1] << 7) | payload[2]) * 4, self.simulator.sample_rate_hz)
+
+    def test_version_string(self):
+        data = _sysex(self.simulator, RequestVersionStringMessage())
+        self.assertEqual(data[6:-2].decode('ascii'), self.simulator.version_string)
+
+if __name__ == '__main__':
+    unittest.main()
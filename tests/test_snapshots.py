@@ -0,0 +1,65 @@
+"""
+Snapshots store the full configuration dump, and still load snapshots of
+the older format that stored only the words the layout describes.
+"""
+
+import os
+import struct
+import tempfile
+import unittest
+
+from array import array
+
+from interface import (
+    CONFIGURATION_DUMP_WORD_COUNT,
+    MIX_DUMP_WORD_COUNT,
+)
+from simulator import ES9Simulator
+from snapshots import (
+    SNAPSHOT_FORMAT_VERSION,
+    SNAPSHOT_MAGIC,
+    SNAPSHOT_SUFFIX,
+    SnapshotStore,
+)
+
+_LAYOUT_WORD_COUNT = 719 # configuration words stored by the older format
+
+class SnapshotStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(self._dir.name)
+        self.simulator = ES9Simulator()
+        self.simulator.words[-1] = 0x1234
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_stores_every_dump_word(self):
+        digest = self.store.put(self.simulator.words, array('I', [0]) * MIX_DUMP_WORD_COUNT)
+        with self.store.get(digest) as snap:
+            self.assertEqual(snap.configuration_word_count, CONFIGURATION_DUMP_WORD_COUNT)
+            self.assertEqual(array('I', snap.configuration_words), self.simulator.words)
+
+    def test_close_with_slices_alive(self):
+        digest = self.store.put(self.simulator.words, array('I', [0]) * MIX_DUMP_WORD_COUNT)
+        snap = self.store.get(digest)
+        words = snap.configuration_words[10:20]
+        snap.close()
+        self.assertEqual(list(words), list(self.simulator.words[10:20]))
+
+    def test_loads_older_snapshots(self):
+        words = array('I', self.simulator.words[:_LAYOUT_WORD_COUNT])
+        words.extend([0] * MIX_DUMP_WORD_COUNT)
+        data = struct.pack('<4sBx2sHH', SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, bytes(2), _LAYOUT_WORD_COUNT, MIX_DUMP_WORD_COUNT) + words.tobytes()
+        with open(os.path.join(self._dir.name, 'old' + SNAPSHOT_SUFFIX), 'wb') as f:
+            f.write(data)
+
+        digest = self.store.put(self.simulator.words, array('I', [0]) * MIX_DUMP_WORD_COUNT)
+        with self.store.get('old') as old, self.store.get(digest) as new:
+            self.assertEqual(old.configuration_word_count, _LAYOUT_WORD_COUNT)
+            self.assertEqual(len(old.configuration_words), CONFIGURATION_DUMP_WORD_COUNT)
+            self.assertEqual(old.configuration(), new.configuration())
+            self.assertEqual(old.diff(new), [])
+
+if __name__ == '__main__':
+    unittest.main()
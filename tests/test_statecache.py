@@ -0,0 +1,85 @@
+"""
+StateCache follows sent messages with the firmware model of interface.py,
+and stops serving state it cannot model.
+"""
+
+import unittest
+
+import codec
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_LAYOUT_WORD_COUNT,
+    MessageType,
+    Message,
+
+    RequestConfigurationDumpMessage,
+    RequestResetMessage,
+    SetMixMessage,
+)
+from simulator import ES9Simulator
+from statecache import StateCache
+
+def _cache(simulator: ES9Simulator) -> StateCache:
+    cache = StateCache(ttl=None)
+    cache.apply_report(MessageType.REPORT_CONFIGURATION_DUMP.value, simulator.configuration_dump_payload())
+    return cache
+
+class StateCacheTest(unittest.TestCase):
+    def test_follows_sent_messages(self):
+        simulator = ES9Simulator()
+        cache = _cache(simulator)
+        for msg in (SetMixMessage(3, 2, 0x2000), RequestConfigurationDumpMessage()):
+            cache.apply_sent(msg)
+            simulator.handle(msg.data)
+        self.assertTrue(cache.fresh())
+        self.assertEqual(cache.words, simulator.words)
+
+    def test_keeps_every_dump_word(self):
+        simulator = ES9Simulator()
+        simulator.words[-1] = 0x1234
+        self.assertEqual(_cache(simulator).words, simulator.words)
+
+    def test_view_follows_generation(self):
+        cache = _cache(ES9Simulator())
+        view = cache.view()
+        self.assertIs(cache.view(), view)
+        cache.apply_sent(SetMixMessage(3, 2, 0x2000))
+        self.assertEqual(view.crosspoint_level(3, 2), 0)
+        self.assertEqual(cache.view().crosspoint_level(3, 2), 0x2000)
+
+    def test_short_dump_keeps_previous_words(self):
+        simulator = ES9Simulator()
+        simulator.words[-1] = 0x1234
+        cache = _cache(simulator)
+        simulator.handle(SetMixMessage(3, 2, 0x2000).data)
+        short = simulator.configuration_dump_payload()[:CONFIGURATION_DUMP_HEADER_LENGTH + CONFIGURATION_DUMP_LAYOUT_WORD_COUNT * codec.WORD_SIZE]
+        with self.assertLogs('statecache', 'WARNING'):
+            cache.apply_report(MessageType.REPORT_CONFIGURATION_DUMP.value, short)
+        self.assertEqual(cache.words, simulator.words)
+
+    def test_dump_without_layout_invalidates(self):
+        simulator = ES9Simulator()
+        cache = _cache(simulator)
+        short = simulator.configuration_dump_payload()[:CONFIGURATION_DUMP_HEADER_LENGTH + 100 * codec.WORD_SIZE]
+        with self.assertLogs('statecache', 'WARNING'):
+            cache.apply_report(MessageType.REPORT_CONFIGURATION_DUMP.value, short)
+        self.assertFalse(cache.valid)
+
+    def test_reset_invalidates(self):
+        cache = _cache(ES9Simulator())
+        cache.apply_sent(RequestResetMessage())
+        self.assertFalse(cache.valid)
+
+    def test_malformed_message_invalidates(self):
+        cache = _cache(ES9Simulator())
+        cache.apply_sent(SetMixMessage.unchecked(0, 9, 0x2000)) # no input 9
+        self.assertFalse(cache.valid)
+
+    def test_unknown_message_invalidates(self):
+        cache = _cache(ES9Simulator())
+        cache.apply_sent(Message(0x7E, bytes()))
+        self.assertFalse(cache.valid)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+"""
+DumpTracker reports the fields that changed between consecutive dumps.
+"""
+
+import unittest
+
+from interface import SetMixMessage
+from simulator import ES9Simulator
+from tracker import ConfigurationDumpTracker, DumpTracker
+
+class DumpTrackerTest(unittest.TestCase):
+    def test_reports_changed_fields(self):
+        simulator = ES9Simulator()
+        tracker = ConfigurationDumpTracker()
+        self.assertIsNone(tracker.update(simulator.configuration_dump_payload()))
+        self.assertEqual(tracker.update(simulator.configuration_dump_payload()), [])
+
+        simulator.handle(SetMixMessage(3, 2, 0x2000).data)
+        changes = tracker.update(simulator.configuration_dump_payload())
+        self.assertEqual([(change.path, change.new) for change in changes], [(
+            ('mixer1_crosspoint_configuration', 'output4_configuration', 'input3_level'), 0x2000,
+        )])
+        self.assertEqual(tracker.words, simulator.words)
+
+    def test_changed_words(self):
+        previous = list(range(100))
+        words = list(previous)
+        for i in (0, 31, 32, 99):
+            words[i] += 1
+        self.assertEqual(DumpTracker.changed_words(previous, words), [0, 31, 32, 99])
+        self.assertEqual(DumpTracker.changed_words(previous, previous), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+WriteVerifier reports each mismatched field once, and resends it once.
+"""
+
+import asyncio
+import unittest
+
+from client import ES9Client
+from interface import (
+    ES9_SYSEX_HEADER,
+
+    SetMixMessage,
+    SetSmoothingMessage,
+)
+from simulator import (
+    ES9Simulator,
+
+    loopback_ports,
+)
+from verify import WriteVerifier
+
+class _LossySimulator(ES9Simulator):
+    """
+    Drops the first message of each type in drop (MessageType values).
+    """
+    def __init__(self, drop: set[int]):
+        super().__init__()
+        self.drop = drop
+
+    def handle(self, data: bytes):
+        msg_type = data[len(ES9_SYSEX_HEADER)]
+        if msg_type in self.drop:
+            self.drop.discard(msg_type)
+            return []
+        return super().handle(data)
+
+class WriteVerifierTest(unittest.TestCase):
+    def _verify(self, include_mix: bool):
+        async def run():
+            output, input = loopback_ports(None, 0.001)
+            crosspoint, smoothing = SetMixMessage(3, 0, 1000), SetSmoothingMessage(2, True)
+            simulator = _LossySimulator({crosspoint.msg_type, smoothing.msg_type})
+            task = asyncio.create_task(simulator.run(output, input))
+            try:
+                async with ES9Client(output, input, timeout=2.0) as client:
+                    verifier = WriteVerifier(client, include_mix)
+                    await verifier.start()
+                    verifier.send(crosspoint)
+                    verifier.send(smoothing)
+                    report = await verifier.verify(resend=True)
+                    return report, await verifier.verify()
+            finally:
+                task.cancel()
+        return asyncio.run(run())
+
+    def _check(self, include_mix: bool, crosspoint_source: str):
+        report, again = self._verify(include_mix)
+        self.assertEqual(sorted((mismatch.source, mismatch.path[-1]) for mismatch in report.mismatches), sorted([
+            ('configuration', 'mix3_enabled'),
+            (crosspoint_source, 'input1_level'),
+        ]))
+        self.assertEqual(sorted(msg.data for msg in report.resent), sorted((SetMixMessage(3, 0, 1000).data, SetSmoothingMessage(2, True).data)))
+        self.assertTrue(again.ok)
+
+    def test_crosspoints_checked_in_mix_dump(self):
+        self._check(True, 'mix')
+
+    def test_crosspoints_checked_in_configuration_dump(self):
+        self._check(False, 'configuration')
+
+if __name__ == '__main__':
+    unittest.main()
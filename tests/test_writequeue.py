@@ -0,0 +1,46 @@
+"""
+Ordering of CoalescingWriteQueue: superseded values are dropped without
+reordering the messages that remain.
+"""
+
+import asyncio
+import unittest
+
+from interface import (
+    RequestConfigurationDumpMessage,
+    SetInputsMessage,
+    SetLinksMessage,
+    SetMixMessage,
+
+    es9_py_pb2,
+)
+from writequeue import CoalescingWriteQueue
+
+_LINK = es9_py_pb2.MixerLink.MIXER_LINK_INPUT_1_2
+
+def _sent(messages) -> list:
+    async def run():
+        sent = []
+        async with CoalescingWriteQueue(sent.append, bytes_per_second=None) as queue:
+            for msg in messages:
+                queue.put(msg)
+        return sent
+    return asyncio.run(run())
+
+class CoalescingWriteQueueTest(unittest.TestCase):
+    def test_newest_value_keeps_put_order(self):
+        first, other, newest = SetMixMessage(0, 0, 1), SetMixMessage(1, 0, 2), SetMixMessage(0, 0, 3)
+        self.assertEqual(_sent([first, other, newest]), [other, newest])
+
+    def test_link_not_superseded_across_inputs(self):
+        link_on = SetLinksMessage(_LINK, True)
+        inputs = SetInputsMessage(0, bytes(8))
+        link_off = SetLinksMessage(_LINK, False)
+        self.assertEqual(_sent([link_on, inputs, link_off]), [link_on, inputs, link_off])
+
+    def test_requests_are_barriers(self):
+        first, request, newest = SetMixMessage(0, 0, 1), RequestConfigurationDumpMessage(), SetMixMessage(0, 0, 3)
+        self.assertEqual(_sent([first, request, newest]), [first, request, newest])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+from array import array
+
+import codec
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_LAYOUT,
+    MIX_DUMP_LAYOUT,
+
+    es9_decode_configuration_words,
+    es9_decode_mix_words,
+    es9_unpack_mix_dump_words,
+
+    es9_py_pb2,
+)
+from view import ConfigurationView
+
+class Change:
+    """
+    A single field that differs between two consecutive dumps.
+    path is the protobuf field path, e.g.
+    ('mixer2_crosspoint_configuration', 'output3_configuration', 'input5_level').
+    """
+    __slots__ = ('path', 'old', 'new')
+
+    def __init__(self, path: tuple[str, ...], old, new):
+        self.path = path
+        self.old = old
+        self.new = new
+
+    @property
+    def section(self) -> str:
+        return self.path[0]
+
+    def _format_value(self, value) -> str:
+        field = self.path[-1]
+        if isinstance(value, bool):
+            return 'on' if value else 'off'
+        if field.endswith('_channel') and 'routing' in self.path[0]:
+            return es9_py_pb2.Channel.Name(value)
+        if field == 'filter_type':
+            return es9_py_pb2.FilterType.Name(value)
+        return str(value)
+
+    def __str__(self) -> str:
+        if self.section == 'mixer_links_configuration':
+            return f"link {self.path[-1].removeprefix('link_channel_')} {self._format_value(self.new)}"
+
+        if self.section.endswith('_crosspoint_configuration'):
+            mixer = self.section.removesuffix('_crosspoint_configuration')
+            output = self.path[1].removesuffix('_configuration')
+            channel = self.path[2].removesuffix('_level')
+            return f"{mixer} {output} {channel} level {self.old}→{self.new}"
+
+        name = ' '.join(part.removesuffix('_configuration') for part in self.path)
+        if isinstance(self.new, bool):
+            return f"{name} {self._format_value(self.new)}"
+        return f"{name} {self._format_value(self.old)}→{self._format_value(self.new)}"
+
+    def __repr__(self) -> str:
+        return f"Change({self.path!r}, {self.old!r}, {self.new!r})"
+
+_DIFF_BLOCK_WORDS = 32 # words compared at once before looking at single words
+
+class DumpTracker:
+    """
+    Remembers the words of the previous dump and reports only what changed.
+
+    unpack turns a dump payload into its words. An identical payload is
+    detected with a single buffer comparison and is not unpacked at all.
+    A changed payload is unpacked in full, then compared with the previous
+    words a block of _DIFF_BLOCK_WORDS at a time, and only the words of
+    blocks that differ are visited one by one. Changed words are decoded
+    via a word -> fields index built from the dump layout, so the Python
+    work of an update is one comparison per block plus the changes.
+    """
+    def __init__(self, layout: list[tuple], unpack):
+        self.unpack = unpack
+        self._fields_by_word = {}
+        for path, word, shift, mask, transform in layout:
+            self._fields_by_word.setdefault(word, []).append((path, shift, mask, transform))
+        self._payload = None
+        self._words = None
+
+    @property
+    def words(self) -> array | None:
+        """
+        Words of the most recent dump, or None before the first update.
+        """
+        return self._words
+
+    def update(self, payload) -> list[Change] | None:
+        """
+        Feed the payload of a new dump.
+        Returns None for the first dump (nothing to compare against),
+        otherwise the list of changed fields, empty if nothing changed.
+        """
+        if self._payload is not None and self._payload == payload:
+            return []
+
+        words = self.unpack(payload)
+        previous = self._words
+        self._payload = bytes(payload)
+        self._words = words
+        if previous is None:
+            return None
+        return self.diff(previous, words)
+
+    def diff(self, previous, words) -> list[Change]:
+        """
+        List the fields that differ between two sets of dump words.
+        """
+        changes = []
+        for i in self.changed_words(previous, words):
+            for path, shift, mask, transform in self._fields_by_word.get(i, ()):
+                old = transform((previous[i] >> shift) & mask)
+                new = transform((words[i] >> shift) & mask)
+                if old != new:
+                    changes.append(Change(path, old, new))
+        return changes
+
+    @staticmethod
+    def changed_words(previous, words) -> list[int]:
+        changed = []
+        count = min(len(previous), len(words))
+        for start in range(0, count, _DIFF_BLOCK_WORDS):
+            end = min(start + _DIFF_BLOCK_WORDS, count)
+            if previous[start:end] != words[start:end]:
+                changed += [i for i in range(start, end) if previous[i] != words[i]]
+        return changed
+
+def _unpack_configuration_dump(payload) -> array:
+    return codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:])
+
+class ConfigurationDumpTracker(DumpTracker):
+    def __init__(self):
+        super().__init__(CONFIGURATION_DUMP_LAYOUT, _unpack_configuration_dump)
+
+    def configuration(self) -> es9_py_pb2.Configuration:
+        return es9_decode_configuration_words(self._words)
+
+    def view(self) -> ConfigurationView:
+        """
+        Read-only view of the most recent dump; update() replaces the words
+        instead of modifying them, so the view stays valid.
+        """
+        return ConfigurationView(self._words)
+
+class MixDumpTracker(DumpTracker):
+    def __init__(self):
+        super().__init__(MIX_DUMP_LAYOUT, es9_unpack_mix_dump_words)
+
+    def configuration(self) -> es9_py_pb2.MixConfiguration:
+        return es9_decode_mix_words(self._words)
@@ -0,0 +1,177 @@
+"""
+Batched read-after-write verification.
+
+WriteVerifier sends messages through an ES9Client while applying each
+of them to a firmware model (ES9Simulator) of the device state, so that
+after any number of writes it knows the configuration dump words the
+device should report. verify() then requests a single configuration
+dump, and optionally a single mix dump, and compares them with the
+expected words field by field, decoding only the words that differ.
+Each crosspoint level is compared once: in the mix dump when it is
+requested, otherwise in the configuration dump.
+
+Mismatched fields can be resent: the messages are planned from the
+reported to the expected configuration, so only the failed fields go
+out again.
+"""
+
+import codec
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_OFFSET_MIX,
+    CONFIGURATION_DUMP_WORD_COUNT,
+    MIX_DUMP_CROSSPOINT_COUNT,
+    Message,
+    MessageType,
+
+    RequestConfigurationDumpMessage,
+    RequestMixMessage,
+    SetMixMessage,
+
+    es9_decode_configuration_words,
+    es9_unpack_mix_dump_words,
+)
+from planner import plan_changes
+from simulator import ES9Simulator
+from tracker import (
+    ConfigurationDumpTracker,
+    MixDumpTracker,
+)
+
+# only their word -> fields indexes are used
+_CONFIGURATION_DIFF = ConfigurationDumpTracker()
+_MIX_DIFF = MixDumpTracker()
+
+class Mismatch:
+    """
+    A field the device reports differently than the writes should have set it.
+    source is 'configuration' or 'mix', the dump the field was read from.
+    """
+    __slots__ = ('source', 'path', 'expected', 'actual')
+
+    def __init__(self, source: str, path: tuple[str, ...], expected, actual):
+        self.source = source
+        self.path = path
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self) -> str:
+        return f"{self.source}: {'.'.join(self.path)} expected {self.expected}, device reports {self.actual}"
+
+    def to_dict(self) -> dict:
+        return {'source': self.source, 'path': list(self.path), 'expected': self.expected, 'actual': self.actual}
+
+class VerificationReport:
+    __slots__ = ('writes', 'mismatches', 'resent')
+
+    def __init__(self, writes: int, mismatches: list[Mismatch], resent: list[Message]):
+        self.writes = writes # messages sent since the previous verification
+        self.mismatches = mismatches
+        self.resent = resent # messages sent again to correct the mismatches
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    def __str__(self) -> str:
+        if self.ok:
+            return f"{self.writes} writes verified"
+        lines = [f"{len(self.mismatches)} mismatched fields after {self.writes} writes"]
+        lines += [f"  {mismatch}" for mismatch in self.mismatches]
+        if self.resent:
+            lines.append(f"resent {len(self.resent)} messages")
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            'writes': self.writes,
+            'mismatches': [mismatch.to_dict() for mismatch in self.mismatches],
+            'resent': len(self.resent),
+        }
+
+class WriteVerifier:
+    """
+    Sends messages through client and verifies them in one batch, see the
+    module docstring. include_mix also checks the crosspoint levels of a
+    mix dump against the expected state.
+    """
+    def __init__(self, client, include_mix: bool = True):
+        self._client = client
+        self.include_mix = include_mix
+        self._model = None # ES9Simulator holding the expected words
+        self._writes = 0
+
+    @property
+    def expected_words(self):
+        return None if self._model is None else self._model.words
+
+    async def start(self, timeout: float | None = None):
+        """
+        Take the expected state from the client's state cache when it is
+        fresh, otherwise from a configuration dump.
+        """
+        words = self._client.state.words if self._client.state.fresh() else None
+        if words is None:
+            words = await self._request_configuration_words(timeout)
+        self._model = ES9Simulator(words)
+        self._writes = 0
+
+    async def _request_configuration_words(self, timeout: float | None):
+        payload = await self._client.request(RequestConfigurationDumpMessage(), MessageType.REPORT_CONFIGURATION_DUMP, timeout)
+        words = codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:])
+        assert len(words) >= CONFIGURATION_DUMP_WORD_COUNT, "Invalid word count for configuration dump"
+        return words[:CONFIGURATION_DUMP_WORD_COUNT]
+
+    def send(self, msg: Message):
+        assert self._model is not None, "WriteVerifier.start() must be awaited first"
+        self._client.send(msg)
+        self._model.handle(msg.data)
+        self._writes += 1
+
+    async def verify(self, resend: bool = False, timeout: float | None = None) -> VerificationReport:
+        """
+        Compare the device state with the expected state. With resend,
+        send the messages that correct the mismatched fields; they are
+        checked by the next verify().
+        """
+        assert self._model is not None, "WriteVerifier.start() must be awaited first"
+        expected = self._model.words
+        actual = await self._request_configuration_words(timeout)
+        crosspoints = slice(CONFIGURATION_DUMP_OFFSET_MIX, CONFIGURATION_DUMP_OFFSET_MIX + MIX_DUMP_CROSSPOINT_COUNT)
+
+        mix_mismatches = []
+        mix_crosspoints = [] # indexes of crosspoints the mix dump reports wrong
+        if self.include_mix:
+            payload = await self._client.request(RequestMixMessage(), MessageType.REPORT_MIX, timeout)
+            actual_mix = es9_unpack_mix_dump_words(payload)
+            # the firmware model has no virtual mix state, so only crosspoints are compared
+            expected_mix = actual_mix[:]
+            expected_mix[:MIX_DUMP_CROSSPOINT_COUNT] = expected[crosspoints]
+            mix_mismatches = [
+                Mismatch('mix', change.path, change.new, change.old)
+                for change in _MIX_DIFF.diff(actual_mix, expected_mix)
+            ]
+            mix_crosspoints = _MIX_DIFF.changed_words(actual_mix, expected_mix)
+            # crosspoints are checked in the mix dump only, not again in the configuration dump
+            actual[crosspoints] = expected[crosspoints]
+
+        mismatches = [
+            Mismatch('configuration', change.path, change.new, change.old)
+            for change in _CONFIGURATION_DIFF.diff(actual, expected)
+        ] + mix_mismatches
+
+        resent = []
+        if resend and mismatches:
+            resent = plan_changes(es9_decode_configuration_words(actual), es9_decode_configuration_words(expected))
+            resent += [SetMixMessage(i // 8, i % 8, expected_mix[i]) for i in mix_crosspoints]
+            for msg in resent:
+                self._client.send(msg)
+            logger.info(f"Resent {len(resent)} messages for {len(mismatches)} mismatched fields")
+
+        report = VerificationReport(self._writes, mismatches, resent)
+        self._writes = len(resent)
+        return report
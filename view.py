@@ -0,0 +1,159 @@
+"""
+Lazy, read-only access to a configuration dump.
+
+ConfigurationView wraps the unpacked words of a dump. Its accessors
+(crosspoint_level, input_channel, smoothing_enabled, ...) read single
+words directly. Each section of the Configuration message is a lazy
+attribute named after the Configuration field, decoded on first access
+with a compiled layout decoder and cached, so reading a few fields costs
+a few word lookups rather than a full decode.
+"""
+
+from array import array
+
+import codec
+
+from interface import (
+    CONFIGURATION_DUMP_HEADER_LENGTH,
+    CONFIGURATION_DUMP_LAYOUT,
+    CONFIGURATION_DUMP_OFFSET_DC_OFFSET,
+    CONFIGURATION_DUMP_OFFSET_LINKS,
+    CONFIGURATION_DUMP_OFFSET_MIX,
+    CONFIGURATION_DUMP_OFFSET_ROUTE_IN,
+    CONFIGURATION_DUMP_OFFSET_ROUTE_OUT,
+    CONFIGURATION_DUMP_OFFSET_SMOOTHING,
+    CONFIGURATION_DUMP_OFFSET_VERSION,
+    CONFIGURATION_DUMP_WORD_COUNT,
+
+    SetLinksMessage,
+
+    es9_compile_layout_decoder,
+    es9_decode_configuration_words,
+    es9_int16_from_storage_value,
+    es9_try_recover_channel_from_input_route_id,
+    es9_try_recover_channel_from_output_route_id,
+
+    es9_py_pb2,
+)
+
+def _build_section_decoders() -> dict:
+    sections = {}
+    for path, word, shift, mask, transform in CONFIGURATION_DUMP_LAYOUT:
+        if len(path) > 1:
+            sections.setdefault(path[0], []).append((path[1:], word, shift, mask, transform))
+
+    decoders = {}
+    for name, layout in sections.items():
+        message_type = type(getattr(es9_py_pb2.Configuration(), name))
+        decoders[name] = es9_compile_layout_decoder(layout, message_type, f'_decode_{name}')
+    return decoders
+
+_SECTION_DECODERS = _build_section_decoders()
+
+class _LazySection:
+    """
+    Descriptor that decodes one top-level Configuration field on first access.
+    """
+    def __set_name__(self, owner, name: str):
+        self._name = name
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        try:
+            return view._sections[self._name]
+        except KeyError:
+            section = _SECTION_DECODERS[self._name](view._words)
+            view._sections[self._name] = section
+            return section
+
+class ConfigurationView:
+    """
+    Read-only view of an ES-9 configuration dump.
+
+    Keeps only the unpacked dump words and decodes each section of the
+    Configuration message the first time it is accessed. Sections are
+    exposed under the same names as the Configuration fields, so a view
+    can stand in for a parsed Configuration wherever fields are only read.
+    Decoded sections are cached and shared; do not modify them.
+    """
+    __slots__ = ('_words', '_sections')
+
+    high_pass_filter_configuration = _LazySection()
+    options_configuration = _LazySection()
+    mixer_links_configuration = _LazySection()
+    midi_channels_configuration = _LazySection()
+    mix_input_filter_configuration = _LazySection()
+    mix_smoothing_configuration = _LazySection()
+    usb_routing_configuration = _LazySection()
+    mixer1_routing_configuration = _LazySection()
+    mixer2_routing_configuration = _LazySection()
+    mixer1_crosspoint_configuration = _LazySection()
+    mixer2_crosspoint_configuration = _LazySection()
+    output_dc_offset_configuration = _LazySection()
+
+    def __init__(self, words: array):
+        assert len(words) >= CONFIGURATION_DUMP_WORD_COUNT, "Invalid word count for configuration dump"
+        self._words = words
+        self._sections = {}
+
+    @classmethod
+    def from_payload(cls, payload: bytes) -> 'ConfigurationView':
+        """
+        Create a view from a REPORT_CONFIGURATION_DUMP SysEx payload.
+        """
+        return cls(codec.decode_words(memoryview(payload)[CONFIGURATION_DUMP_HEADER_LENGTH:]))
+
+    @property
+    def words(self) -> array:
+        return self._words
+
+    @property
+    def version(self) -> int:
+        return self._words[CONFIGURATION_DUMP_OFFSET_VERSION]
+
+    def input_route_id(self, dsp_block: int, ch: int) -> int:
+        assert 0 <= dsp_block <= 3, "DSP block out of range"
+        assert 0 <= ch <= 7, "Channel out of range"
+        return self._words[CONFIGURATION_DUMP_OFFSET_ROUTE_IN + dsp_block*8 + ch]
+
+    def output_route_id(self, dsp_block: int, ch: int) -> int:
+        assert 0 <= dsp_block <= 3, "DSP block out of range"
+        assert 0 <= ch <= 7, "Channel out of range"
+        return self._words[CONFIGURATION_DUMP_OFFSET_ROUTE_OUT + dsp_block*8 + ch]
+
+    def input_channel(self, dsp_block: int, ch: int) -> es9_py_pb2.Channel:
+        return es9_try_recover_channel_from_input_route_id(self.input_route_id(dsp_block, ch))
+
+    def output_channel(self, dsp_block: int, ch: int) -> es9_py_pb2.Channel:
+        return es9_try_recover_channel_from_output_route_id(self.output_route_id(dsp_block, ch))
+
+    def crosspoint_level(self, mix_id: int, ch: int) -> int:
+        """
+        Mix ID 0-7 correspond to mixer 1 outputs 1-8,
+        Mix ID 8-15 correspond to mixer 2 outputs 1-8.
+        """
+        assert 0 <= mix_id <= 15, "Mix ID out of range"
+        assert 0 <= ch <= 7, "Channel out of range"
+        return self._words[CONFIGURATION_DUMP_OFFSET_MIX + mix_id*8 + ch]
+
+    def link_enabled(self, link: es9_py_pb2.MixerLink) -> bool:
+        bit = SetLinksMessage.MAP_LINK_ID[link]
+        return bool(self._words[CONFIGURATION_DUMP_OFFSET_LINKS + bit // 16] >> (bit % 16) & 0x01)
+
+    def smoothing_enabled(self, mix_id: int) -> bool:
+        assert 0 <= mix_id <= 15, "Mix ID out of range"
+        return bool(self._words[CONFIGURATION_DUMP_OFFSET_SMOOTHING] >> mix_id & 0x01)
+
+    def dc_offset(self, output: int) -> int:
+        """
+        DC offset of output 0-7.
+        """
+        assert 0 <= output <= 7, "Output out of range"
+        return es9_int16_from_storage_value(self._words[CONFIGURATION_DUMP_OFFSET_DC_OFFSET + output])
+
+    def to_configuration(self) -> es9_py_pb2.Configuration:
+        """
+        Materialize the full Configuration protobuf message.
+        """
+        return es9_decode_configuration_words(self._words)
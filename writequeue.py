@@ -0,0 +1,155 @@
+import asyncio
+
+import logging
+logger = logging.getLogger(__name__)
+
+from interface import (
+    ES9_SYSEX_HEADER,
+    MessageType,
+    Message,
+)
+
+# bytes per second of a MIDI 1.0 DIN link (31250 baud, 10 bits per byte)
+MIDI_DIN_BYTES_PER_SECOND = 3125
+
+_SYSEX_FRAMING_LENGTH = 2 # F0 and F7 added by the port
+_PAYLOAD_START = len(ES9_SYSEX_HEADER) + 1
+
+def coalesce_key(msg: Message) -> tuple | None:
+    """
+    Return the target a Set* message writes to, such that a later message
+    with the same key fully supersedes an earlier one.
+    Returns None for messages that must never be dropped.
+    """
+    msg_type = msg.msg_type
+    payload = msg.data[_PAYLOAD_START:]
+
+    if MessageType.SET_MIX.value <= msg_type <= MessageType.SET_MIX.value + 15:
+        return ('mix', msg_type - MessageType.SET_MIX.value, payload[0])
+    if MessageType.SET_INPUTS.value <= msg_type <= MessageType.SET_INPUTS.value + 3:
+        return ('inputs', msg_type - MessageType.SET_INPUTS.value)
+    if MessageType.SET_OUTPUTS.value <= msg_type <= MessageType.SET_OUTPUTS.value + 3:
+        return ('outputs', msg_type - MessageType.SET_OUTPUTS.value)
+
+    match msg_type:
+        case MessageType.SET_FILTER.value:
+            return ('filter', payload[0], payload[1])
+        case MessageType.SET_DC_OFFSET.value:
+            return ('dc_offset', payload[0])
+        case MessageType.SET_LINKS.value:
+            return ('link', payload[0])
+        case MessageType.SET_SMOOTHING.value:
+            return ('smoothing', payload[0])
+        case MessageType.SET_HPF.value | MessageType.SET_OPTIONS.value | MessageType.SET_MIDI_CHANNELS.value:
+            return (msg_type,)
+    return None
+
+# target kind -> kinds whose queued values a message of that kind must not
+# overtake: routing a linked channel depends on the link state when the
+# SetInputs lands, so a later SetLinks may not replace one queued before it
+_ORDER_DEPENDENCIES = {
+    'inputs': ('link',),
+}
+
+class CoalescingWriteQueue:
+    """
+    Outbound queue that keeps at most one pending message per target.
+
+    Putting a message whose target (see coalesce_key) is already queued
+    drops the queued value and queues the new one last, so intermediate
+    values never reach the port and messages go out in the order they were
+    put. A value is only dropped when nothing queued after it depends on
+    it: messages without a target (requests, resets, dump uploads) and
+    SetInputs after a SetLinks (see _ORDER_DEPENDENCIES) are never
+    overtaken. Sends are paced to bytes_per_second (None disables pacing).
+
+    send is called with each Message, e.g. ES9Client.send.
+    """
+    def __init__(self, send, bytes_per_second: float | None = MIDI_DIN_BYTES_PER_SECOND):
+        self._send = send
+        self._bytes_per_second = bytes_per_second
+        self._pending = {} # key -> Message, in insertion order
+        self._sequence = 0 # keys for messages that are never coalesced
+        self._generations = {} # target kind -> generation, bumped by messages a later value may not overtake
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = None
+
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.superseded_messages = 0
+
+    async def __aenter__(self) -> 'CoalescingWriteQueue':
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.drain()
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def put(self, msg: Message):
+        target = coalesce_key(msg)
+        if target is None:
+            # nothing queued so far may be replaced by a later value
+            self._sequence += 1
+            self._generations.clear()
+            key = ('sequence', self._sequence)
+        else:
+            for kind in _ORDER_DEPENDENCIES.get(target[0], ()):
+                self._generations[kind] = self._generations.get(kind, 0) + 1
+            key = (self._sequence, self._generations.get(target[0], 0)) + target
+            if self._pending.pop(key, None) is not None:
+                self.superseded_messages += 1
+
+        self._pending[key] = msg
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def drain(self):
+        """
+        Wait until every queued message has been sent.
+        """
+        await self._idle.wait()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_send = loop.time()
+        while True:
+            if not self._pending:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = next_send - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue # values may have been superseded while waiting
+
+            key = next(iter(self._pending))
+            msg = self._pending.pop(key)
+            self._send(msg)
+
+            wire_length = len(msg.data) + _SYSEX_FRAMING_LENGTH
+            self.sent_messages += 1
+            self.sent_bytes += wire_length
+            if self._bytes_per_second:
+                next_send = max(next_send, loop.time()) + wire_length / self._bytes_per_second